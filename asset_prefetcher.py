@@ -0,0 +1,125 @@
+import io
+import threading
+
+import pygame
+
+from atlas import Atlas, frame_name
+from game_settings import GameSettings
+from resources import ResourceManager
+from tracing import Tracer
+
+
+class AssetPrefetcher:
+    """
+    Prépare en arrière-plan les ressources d'une scène, en deux phases :
+        - decode(), appelée hors du fil principal, lit et décode les fichiers qui ne sont pas encore en cache (pages
+          de l'atlas, images, sons) ;
+        - commit(), appelée par le fil principal, convertit les images pour l'affichage, crée les sons et met le
+          tout en cache : la scène construite ensuite trouve ses ressources sans accès disque.
+    Utilisé pour le chargement des niveaux (level_loader.py) et le préchargement des scènes
+    (SceneManager.prefetch()).
+    """
+
+    def __init__(self, images=(), sprite_sheets=(), sounds=()) -> None:
+        """
+        Initialise le préchargement (rien n'est lu avant decode() ou start()).
+        :param images: les fichiers d'images (noms ou identifiants dans GameSettings.FILE_NAMES)
+        :param sprite_sheets: les feuilles de sprites, en tuples (fichier, nombre d'images)
+        :param sounds: les fichiers de sons
+        """
+        self._requested_images = [ResourceManager._filename(filename) for filename in images]
+        self._requested_sprite_sheets = [(ResourceManager._filename(filename), nb_frames)
+                                         for filename, nb_frames in sprite_sheets]
+        self._requested_sounds = [ResourceManager._filename(filename) for filename in sounds]
+
+        self._pages = {}  # numéro de page de l'atlas -> surface décodée
+        self._images = {}  # fichier -> surface décodée
+        self._sounds = {}  # fichier -> contenu du fichier
+        self._error = None
+
+        self._nb_steps = 0
+        self._nb_steps_done = 0
+        self._decoded = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        """ Lance decode() dans un fil d'exécution secondaire (une erreur est conservée : voir error()). """
+        self._thread = threading.Thread(target=self._decode_in_background, name="asset_prefetcher", daemon=True)
+        self._thread.start()
+
+    def nb_steps(self) -> int:
+        """ Retourne le nombre de fichiers à lire (connu une fois decode() commencée). """
+        return self._nb_steps
+
+    def nb_steps_done(self) -> int:
+        return self._nb_steps_done
+
+    def is_decoded(self) -> bool:
+        """ Indique si la phase d'arrière-plan est terminée (commit() peut alors être appelée sans attente). """
+        return self._decoded.is_set()
+
+    def error(self) -> Exception or None:
+        """ Retourne l'erreur survenue pendant le décodage lancé par start(), s'il y a lieu. """
+        return self._error
+
+    def decode(self) -> None:
+        """ Lit et décode les fichiers : aucun appel à l'affichage ni au mixer (réservés au fil principal). """
+        atlas = Atlas()
+        resources = ResourceManager()
+        pages = set()
+        image_files = []
+        for filename in self._requested_images:
+            page = atlas.page_of(filename)
+            if page is not None:
+                pages.add(page)
+            elif not resources.is_cached('image', filename):
+                image_files.append(filename)
+        for filename, nb_frames in self._requested_sprite_sheets:
+            frame_pages = {atlas.page_of(frame_name(filename, frame)) for frame in range(nb_frames)}
+            if None not in frame_pages:
+                pages.update(frame_pages)
+            elif not resources.is_cached('frames', filename) and not resources.is_cached('image', filename):
+                image_files.append(filename)
+        pages = [page for page in pages if not atlas.is_page_decoded(page)]
+
+        sound_files = []
+        if not GameSettings.HEADLESS and pygame.mixer.get_init():
+            sound_files = [filename for filename in self._requested_sounds if not resources.is_cached('sound', filename)]
+
+        self._nb_steps = len(pages) + len(image_files) + len(sound_files)
+
+        tracer = Tracer()
+        for page in pages:
+            self._pages[page] = atlas.decode_page(page)
+            self._nb_steps_done += 1
+        for filename in image_files:
+            with tracer.span("decode image", "asset", {"file": filename}):
+                self._images[filename] = pygame.image.load(filename)
+            self._nb_steps_done += 1
+        for filename in sound_files:
+            with tracer.span("read sound", "asset", {"file": filename}), open(filename, "rb") as sound_file:
+                self._sounds[filename] = sound_file.read()
+            self._nb_steps_done += 1
+
+    def commit(self) -> None:
+        """ Termine le travail dans le fil principal (en attendant, au besoin, la fin de start()). """
+        if self._thread is not None:
+            self._thread.join()
+
+        atlas = Atlas()
+        for page, surface in self._pages.items():
+            atlas.add_page(page, surface)
+
+        resources = ResourceManager()
+        for filename, surface in self._images.items():
+            resources.add_image(filename, surface.convert_alpha())
+        for filename, data in self._sounds.items():
+            resources.add_sound(filename, pygame.mixer.Sound(io.BytesIO(data)))
+
+    def _decode_in_background(self) -> None:
+        try:
+            self.decode()
+        except Exception as e:  # ce qui n'a pu être lu le sera par la scène elle-même, qui signalera l'erreur
+            self._error = e
+        finally:
+            self._decoded.set()
@@ -2,15 +2,21 @@ from math import sqrt
 
 import pygame
 import random
-import time
 
 from enum import Enum, auto
 
 from hud import HUD
 from game_settings import GameSettings, Files
 from fatal_error import FatalError
+import frame_cache
+from game_clock import GameClock
 from pad import Pad
-from random import randint
+from resources import ResourceManager
+
+try:
+    import numpy
+except ImportError:  # facultatif : sans NumPy, les trames sont construites pixel par pixel (plus lentement)
+    numpy = None
 
 
 class AstronautState(Enum):
@@ -33,7 +39,10 @@ class Astronaut(pygame.sprite.Sprite):
     _NB_WAITING_IMAGES = 1
     _NB_WAVING_IMAGES = 4
     _NB_JUMPING_IMAGES = 6
+    _NB_SHEET_IMAGES = _NB_WAITING_IMAGES + _NB_WAVING_IMAGES + _NB_JUMPING_IMAGES
     _NB_INTEGRATION_IMAGES = 10
+    _DISSOLVE_SEED = 1  # les trames d'intégration sont aléatoires, mais identiques d'une partie à l'autre
+    _FRAMES_VERSION = 1  # à incrémenter à toute modification de _build_frames() (invalide le cache des trames)
 
     _VELOCITY = 0.2
     _LOOSE_ONE_CENT_EVERY = 0.05  # perd 1 cent tous les 5 centièmes de seconde
@@ -50,29 +59,36 @@ class Astronaut(pygame.sprite.Sprite):
                     AstronautState.JUMPING_RIGHT: 0.15}
 
     _cached_frames = None
+    _random = random.Random()  # délais et clips aléatoires (voir seed_random())
+    _cached_clips = None  # clips sonores partagés par tous les astronautes
 
-    def __init__(self, source_pad: Pad, target_pad: Pad) -> None:
+    def __init__(self, source_pad: Pad, target_pad: Pad, distance: float = None) -> None:
         """
         Initialise une instance d'astronaute.
         :param source_pad: le pad sur lequel apparaîtra l'astronaute
         :param target_pad: le pad où souhaite se rendre l'astronaute
+        :param distance: la distance de la course, si elle est déjà connue (voir level_compiler.py)
         """
         super(Astronaut, self).__init__()
 
         self._source_pad = source_pad
         self._target_pad = target_pad
-        start_x, start_y = self._source_pad.astronaut_start.x, self._source_pad.astronaut_start.y
-        if isinstance(self._target_pad, Pad):
-            end_x, end_y = self._target_pad.astronaut_end.x, self._target_pad.astronaut_end.y
-        else:
-            end_x, end_y = self._target_pad.rect.x, self._target_pad.rect.y
-        distance = sqrt((end_x - start_x) ** 2 + (end_y - start_y) ** 2)
+        if distance is None:
+            start_x, start_y = self._source_pad.astronaut_start.x, self._source_pad.astronaut_start.y
+            if isinstance(self._target_pad, Pad):
+                end_x, end_y = self._target_pad.astronaut_end.x, self._target_pad.astronaut_end.y
+            else:
+                end_x, end_y = self._target_pad.rect.x, self._target_pad.rect.y
+            distance = sqrt((end_x - start_x) ** 2 + (end_y - start_y) ** 2)
         self._trip_money = distance * Astronaut._TARIFF_PER_UNIT_DISTANCE
 
         self._time_is_money = 0.0
         self._last_saved_time = None
         try:
-            self._hey_taxi_clips, self._pad_please_clips, self._hey_clips = Astronaut._load_clips()
+            if Astronaut._cached_clips is None:
+                Astronaut._cached_clips = Astronaut._load_clips()
+
+            self._hey_taxi_clips, self._pad_please_clips, self._hey_clips = Astronaut._cached_clips
 
             if Astronaut._cached_frames is None:
                 Astronaut._cached_frames = Astronaut._load_and_build_frames()
@@ -94,7 +110,7 @@ class Astronaut(pygame.sprite.Sprite):
             self._frames = self._all_frames[self._state]
             self._state_time = 0  # temps écoulé dans l'état actuel
             self._current_frame = 0
-            self._last_frame_time = time.time()
+            self._last_frame_time = GameClock().time()
 
             self._update_state = {
                 AstronautState.INTEGRATING: self._integrating_state,
@@ -109,7 +125,7 @@ class Astronaut(pygame.sprite.Sprite):
             self._frames = self._all_frames[self._state]
             self._state_time = 0  # temps écoulé dans l'état actuel
             self._current_frame = 0
-            self._last_frame_time = time.time()
+            self._last_frame_time = GameClock().time()
             
             self.image, self.mask = self._frames[0]
             self.rect = self.image.get_rect()
@@ -139,14 +155,33 @@ class Astronaut(pygame.sprite.Sprite):
     def target_pad(self) -> Pad:
         return self._target_pad
 
-    def draw(self, surface: pygame.Surface) -> None:
-        """ Dessine l'astronaute, sauf s'il est à bord du taxi. """
+    def draw(self, surface: pygame.Surface) -> pygame.Rect or None:
+        """
+        Dessine l'astronaute, sauf s'il est à bord du taxi.
+        :return: la zone de la surface où l'astronaute a été dessiné (None s'il n'est pas dessiné)
+        """
+        if self._state != AstronautState.ONBOARD:
+            return surface.blit(self.image, self.rect)
+        return None
+
+    def draw_area(self) -> pygame.Rect or None:
+        """ Retourne, sans dessiner, la zone que draw() couvrirait (None si l'astronaute n'est pas dessiné). """
         if self._state != AstronautState.ONBOARD:
-            surface.blit(self.image, self.rect)
+            return self.rect.copy()
+        return None
 
     def get_trip_money(self) -> float:
         return self._trip_money
 
+    def snapshot(self) -> tuple:
+        """ Retourne l'état de l'astronaute qui détermine la suite de la simulation (voir replay.py). """
+        return self._state.value, self.rect.x, self.rect.y, self._trip_money
+
+    @staticmethod
+    def seed_random(seed: int) -> None:
+        """ Initialise le générateur aléatoire des astronautes, pour qu'une partie puisse être rejouée à l'identique. """
+        Astronaut._random.seed(seed)
+
     def has_reached_destination(self) -> bool:
         return self._state == AstronautState.REACHED_DESTINATION
 
@@ -213,7 +248,7 @@ class Astronaut(pygame.sprite.Sprite):
         :param args: inutilisé
         :param kwargs: inutilisé
         """
-        current_time = time.time()
+        current_time = GameClock().time()
 
         # ÉTAPE 1 - diminuer le montant de la course si le moment est venu
         if self._last_saved_time is None:
@@ -264,7 +299,7 @@ class Astronaut(pygame.sprite.Sprite):
     def _call_taxi(self) -> None:
         """ Joue le son d'appel du taxi. """
         if self._state == AstronautState.WAITING:
-            clip = random.choice(self._hey_taxi_clips)
+            clip = Astronaut._random.choice(self._hey_taxi_clips)
             clip.play()
 
         if self._state == AstronautState.ONBOARD:
@@ -311,7 +346,7 @@ class Astronaut(pygame.sprite.Sprite):
     def _waving_state(self):
         if self._is_state_finished():
             self._change_state(AstronautState.WAITING)
-            self._waving_delay = random.uniform(*Astronaut._WAVING_DELAYS)
+            self._waving_delay = Astronaut._random.uniform(*Astronaut._WAVING_DELAYS)
 
     def _jumping_state(self):
         if self.rect.x == self._target_x:
@@ -323,103 +358,139 @@ class Astronaut(pygame.sprite.Sprite):
     def _load_and_build_frames() -> tuple:
         """
         Charge et découpe la feuille de sprites (sprite sheet) pour un astronaute.
+        Les trames sont lues depuis le cache sur disque lorsqu'il existe, sinon construites puis mises en cache.
         :return: un tuple contenant les trames pour chaque état de l'astronaute
         """
-
-        nb_images = Astronaut._NB_WAITING_IMAGES + Astronaut._NB_WAVING_IMAGES + Astronaut._NB_JUMPING_IMAGES
-        sprite_sheet = pygame.image.load(Astronaut._ASTRONAUT_FILENAME).convert_alpha()
-        sheet_width = sprite_sheet.get_width()
-        sheet_height = sprite_sheet.get_height()
-        image_size = (sheet_width / nb_images, sheet_height)
+        nb_frames = (Astronaut._NB_WAITING_IMAGES + Astronaut._NB_INTEGRATION_IMAGES + Astronaut._NB_WAVING_IMAGES +
+                     2 * Astronaut._NB_JUMPING_IMAGES)
+        images = ResourceManager().frames(Astronaut._ASTRONAUT_FILENAME, Astronaut._NB_SHEET_IMAGES)
+        image_size = images[0].get_size()
+
+        # NumPy et random.Random ne tirent pas les mêmes pixels : chaque générateur a son propre cache
+        parameters = (Astronaut._FRAMES_VERSION, Astronaut._DISSOLVE_SEED, Astronaut._NB_INTEGRATION_IMAGES,
+                      "numpy" if numpy else "random")
+        frames = frame_cache.load_frames("astronaut", Astronaut._ASTRONAUT_FILENAME, image_size, nb_frames,
+                                         parameters)
+        if frames is None:
+            frames = Astronaut._build_frames(images)
+            frame_cache.save_frames("astronaut", Astronaut._ASTRONAUT_FILENAME, frames, parameters)
+        frames = iter(frames)
 
         # astronaute qui attend
-        waiting_surface = pygame.Surface(image_size, flags=pygame.SRCALPHA)
-        source_rect = waiting_surface.get_rect()
-        waiting_surface.blit(sprite_sheet, (0, 0), source_rect)
+        waiting_surface = next(frames)
         waiting_mask = pygame.mask.from_surface(waiting_surface)
         waiting_frames = [(waiting_surface, waiting_mask)]
 
-        # astronaute qui s'intègre et se désintègre
-        integrating_frames = []
-        for frame in range(Astronaut._NB_INTEGRATION_IMAGES):
-            surface = pygame.Surface(image_size, flags=pygame.SRCALPHA)
-            source_rect = surface.get_rect()
-            surface.blit(sprite_sheet, (0, 0), source_rect)
-            mask = pygame.mask.from_surface(surface)
-            surface_width = surface.get_width()
-            surface_height = surface.get_height()
-            surface_part = (surface_height / Astronaut._NB_INTEGRATION_IMAGES) * frame
-            reversed_surface_part = surface_height - surface_part
-            surface.lock()
-            for x in range(surface_width):
-                for y in range(surface_height):
-                    if y < reversed_surface_part:
-                        r, g, b, a = surface.get_at((x, y))
-                        erase_pixel = randint(0, 10) > 0
-                        if erase_pixel:
-                            surface.set_at((x, y), (r, g, b, 0))
-            surface.unlock()
-            integrating_frames.append((surface, mask))
+        # astronaute qui s'intègre et se désintègre (le masque reste celui de l'astronaute complet)
+        integrating_frames = [(next(frames), waiting_mask) for _ in range(Astronaut._NB_INTEGRATION_IMAGES)]
         disintegrating_frames = list(reversed(integrating_frames))
 
         # astronaute qui envoie la main
         waving_frames = []
-        first_frame = Astronaut._NB_WAITING_IMAGES
-        for frame in range(first_frame, first_frame + Astronaut._NB_WAVING_IMAGES):
-            surface = pygame.Surface(image_size, flags=pygame.SRCALPHA)
-            source_rect = surface.get_rect()
-            source_rect.x = frame * source_rect.width
-            surface.blit(sprite_sheet, (0, 0), source_rect)
-            mask = pygame.mask.from_surface(surface)
-            waving_frames.append((surface, mask))
+        for _ in range(Astronaut._NB_WAVING_IMAGES):
+            surface = next(frames)
+            waving_frames.append((surface, pygame.mask.from_surface(surface)))
         waving_frames.extend(waving_frames[-2::-1][:2])
         waving_frames.extend(waving_frames[2:] + waving_frames[-2::-1])
         waving_frames.extend(waving_frames[:1])
 
         # astronaute qui se déplace en sautant
-        jumping_left_frames = []
         jumping_right_frames = []
-        first_frame = Astronaut._NB_WAITING_IMAGES + Astronaut._NB_WAVING_IMAGES
-        for frame in range(first_frame, first_frame + Astronaut._NB_JUMPING_IMAGES):
-            surface = pygame.Surface(image_size, flags=pygame.SRCALPHA)
-            source_rect = surface.get_rect()
-            source_rect.x = frame * source_rect.width
-            surface.blit(sprite_sheet, (0, 0), source_rect)
-            mask = pygame.mask.from_surface(surface)
-            jumping_right_frames.append((surface, mask))
-
-            flipped_surface = pygame.transform.flip(surface, True, False)
-            flipped_mask = pygame.mask.from_surface(flipped_surface)
-            jumping_left_frames.append((flipped_surface, flipped_mask))
+        for _ in range(Astronaut._NB_JUMPING_IMAGES):
+            surface = next(frames)
+            jumping_right_frames.append((surface, pygame.mask.from_surface(surface)))
+        jumping_left_frames = []
+        for _ in range(Astronaut._NB_JUMPING_IMAGES):
+            surface = next(frames)
+            jumping_left_frames.append((surface, pygame.mask.from_surface(surface)))
 
         return  waiting_frames, integrating_frames, disintegrating_frames, waving_frames, jumping_left_frames, jumping_right_frames
 
+    @staticmethod
+    def _build_frames(images: list) -> list:
+        """
+        Construit la bande de trames de l'astronaute, dans l'ordre : attente, intégration, salutation,
+        saut vers la droite, saut vers la gauche.
+        :param images: les images (déjà découpées) de la feuille de sprites
+        :return: la liste des trames (pygame.Surface)
+        """
+        def cut(image: int) -> pygame.Surface:
+            return images[image].copy()
+
+        first_waving_image = Astronaut._NB_WAITING_IMAGES
+        first_jumping_image = first_waving_image + Astronaut._NB_WAVING_IMAGES
+        jumping_images = [cut(image) for image in range(first_jumping_image,
+                                                         first_jumping_image + Astronaut._NB_JUMPING_IMAGES)]
+
+        frames = [cut(0)]
+        frames.extend(Astronaut._build_integration_frames(cut(0)))
+        frames.extend(cut(image) for image in range(first_waving_image, first_jumping_image))
+        frames.extend(jumping_images)
+        frames.extend(pygame.transform.flip(surface, True, False) for surface in jumping_images)
+        return frames
+
+    @staticmethod
+    def _build_integration_frames(surface: pygame.Surface) -> list:
+        """
+        Construit les trames d'intégration : à chaque trame, une bande plus haute de l'astronaute est visible,
+        le reste étant effacé à 10 pixels sur 11 (au hasard, mais toujours de la même façon).
+        :param surface: l'image complète de l'astronaute
+        :return: la liste des trames (pygame.Surface), de la plus effacée à la plus complète
+        """
+        surface_width, surface_height = surface.get_size()
+        frames = []
+        if numpy:
+            generator = numpy.random.default_rng(Astronaut._DISSOLVE_SEED)
+            rows = numpy.arange(surface_height)
+            for frame in range(Astronaut._NB_INTEGRATION_IMAGES):
+                reversed_surface_part = surface_height - (surface_height / Astronaut._NB_INTEGRATION_IMAGES) * frame
+                frame_surface = surface.copy()
+                alpha = pygame.surfarray.pixels_alpha(frame_surface)
+                erased_pixels = generator.integers(0, 11, size=alpha.shape) > 0
+                alpha[erased_pixels & (rows < reversed_surface_part)] = 0
+                del alpha  # libère le verrou sur la surface
+                frames.append(frame_surface)
+        else:
+            generator = random.Random(Astronaut._DISSOLVE_SEED)
+            for frame in range(Astronaut._NB_INTEGRATION_IMAGES):
+                reversed_surface_part = surface_height - (surface_height / Astronaut._NB_INTEGRATION_IMAGES) * frame
+                frame_surface = surface.copy()
+                frame_surface.lock()
+                for x in range(surface_width):
+                    for y in range(surface_height):
+                        if y < reversed_surface_part and generator.randint(0, 10) > 0:
+                            r, g, b, a = frame_surface.get_at((x, y))
+                            frame_surface.set_at((x, y), (r, g, b, 0))
+                frame_surface.unlock()
+                frames.append(frame_surface)
+        return frames
 
     @staticmethod
     def _load_clips() -> tuple:
         """
         Charge les clips sonores (voix).
         :return: un tuple contenant dans l'ordre:
-                 - une liste de clips (pygame.mixer.Sound) "Hey, taxi"
-                 - une liste de clips (pygame.mixer.Sound) "Pad # please" ou "Up please"
-                 - une liste de clips (pygame.mixer.Sound) "Hey!"
+                 - une liste de clips (pygame.mixer.Sound ou NullSound) "Hey, taxi"
+                 - une liste de clips (pygame.mixer.Sound ou NullSound) "Pad # please" ou "Up please"
+                 - une liste de clips (pygame.mixer.Sound ou NullSound) "Hey!"
         """
+        resources = ResourceManager()
         hey_taxis = [
-            pygame.mixer.Sound(GameSettings.FILE_NAMES[Files.VOICES_ASTRONAUT_HEY_TAXI][0]),
-            pygame.mixer.Sound(GameSettings.FILE_NAMES[Files.VOICES_ASTRONAUT_HEY_TAXI][1]),
-            pygame.mixer.Sound(GameSettings.FILE_NAMES[Files.VOICES_ASTRONAUT_HEY_TAXI][2])
+            resources.sound(GameSettings.FILE_NAMES[Files.VOICES_ASTRONAUT_HEY_TAXI][0]),
+            resources.sound(GameSettings.FILE_NAMES[Files.VOICES_ASTRONAUT_HEY_TAXI][1]),
+            resources.sound(GameSettings.FILE_NAMES[Files.VOICES_ASTRONAUT_HEY_TAXI][2])
         ]
 
         pad_pleases = [
-            pygame.mixer.Sound(GameSettings.FILE_NAMES[Files.VOICES_ASTRONAUT_PAD][0]),
-            pygame.mixer.Sound(GameSettings.FILE_NAMES[Files.VOICES_ASTRONAUT_PAD][1]),
-            pygame.mixer.Sound(GameSettings.FILE_NAMES[Files.VOICES_ASTRONAUT_PAD][2]),
-            pygame.mixer.Sound(GameSettings.FILE_NAMES[Files.VOICES_ASTRONAUT_PAD][3]),
-            pygame.mixer.Sound(GameSettings.FILE_NAMES[Files.VOICES_ASTRONAUT_PAD][4]),
-            pygame.mixer.Sound(GameSettings.FILE_NAMES[Files.VOICES_ASTRONAUT_PAD][5])
+            resources.sound(GameSettings.FILE_NAMES[Files.VOICES_ASTRONAUT_PAD][0]),
+            resources.sound(GameSettings.FILE_NAMES[Files.VOICES_ASTRONAUT_PAD][1]),
+            resources.sound(GameSettings.FILE_NAMES[Files.VOICES_ASTRONAUT_PAD][2]),
+            resources.sound(GameSettings.FILE_NAMES[Files.VOICES_ASTRONAUT_PAD][3]),
+            resources.sound(GameSettings.FILE_NAMES[Files.VOICES_ASTRONAUT_PAD][4]),
+            resources.sound(GameSettings.FILE_NAMES[Files.VOICES_ASTRONAUT_PAD][5])
         ]
 
-        heys = [pygame.mixer.Sound(GameSettings.FILE_NAMES[Files.VOICES_ASTRONAUT_HEY])]
+        heys = [resources.sound(Files.VOICES_ASTRONAUT_HEY)]
 
         return hey_taxis, pad_pleases, heys
 
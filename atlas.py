@@ -0,0 +1,130 @@
+import json
+import os
+
+import pygame
+
+from game_settings import GameSettings
+from tracing import traced
+
+
+def frame_name(filename: str, frame: int) -> str:
+    """
+    Retourne le nom, dans l'atlas, d'une image découpée d'une feuille de sprites.
+    :param filename: le nom du fichier de la feuille de sprites
+    :param frame: le numéro de l'image dans la feuille (de gauche à droite, à partir de 0)
+    :return: le nom de l'image dans l'atlas
+    """
+    return f"{filename}#{frame}"
+
+
+def source_signature(filename: str) -> list:
+    """ Retourne la signature (date de modification, taille) d'un fichier source, sans l'ouvrir. """
+    stat = os.stat(filename)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+class Atlas:
+    """
+    Singleton qui donne accès aux images regroupées par atlas_builder.py dans quelques grandes pages.
+    Chaque page n'est décodée qu'une seule fois, au premier besoin ; les images sont des sous-surfaces de la page.
+
+    Sans atlas (non construit, ou construit à partir de fichiers sources depuis modifiés), les images ne sont
+    simplement pas trouvées : l'appelant les charge alors depuis leur fichier d'origine.
+    """
+
+    INDEX_FILENAME = "atlas.json"
+
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super(Atlas, cls).__new__(cls, *args, **kwargs)
+        return cls._instance
+
+    def __init__(self) -> None:
+        if not hasattr(self, '_initialized'):
+            self._pages = []  # nom de fichier de chaque page
+            self._page_surfaces = {}  # numéro de page -> surface décodée
+            self._sprites = {}  # nom -> (numéro de page, rectangle dans la page, fichier source)
+            self._valid_sources = {}  # fichier source -> True si l'atlas est à jour pour ce fichier
+            self._sources = {}
+            self._load_index()
+
+            self._initialized = True
+
+    def image(self, name: str) -> pygame.Surface or None:
+        """
+        Retourne une image de l'atlas.
+        :param name: le nom du fichier de l'image, ou le nom retourné par frame_name()
+        :return: une sous-surface d'une page de l'atlas (à ne pas modifier), ou None si l'image n'y est pas
+        """
+        sprite = self._sprites.get(name)
+        if sprite is None:
+            return None
+
+        page, rect, source = sprite
+        if not self._is_valid(source):
+            return None
+
+        if page not in self._page_surfaces:
+            try:
+                self.add_page(page, self.decode_page(page))
+            except (OSError, pygame.error):
+                self._sprites = {}  # atlas incomplet : on s'en passe
+                return None
+
+        return self._page_surfaces[page].subsurface(rect)
+
+    def page_of(self, name: str) -> int or None:
+        """
+        Indique quelle page contient une image.
+        :param name: le nom de l'image dans l'atlas
+        :return: le numéro de la page, ou None si l'image n'est pas dans l'atlas (ou n'y est plus à jour)
+        """
+        sprite = self._sprites.get(name)
+        if sprite is None or not self._is_valid(sprite[2]):
+            return None
+        return sprite[0]
+
+    def is_page_decoded(self, page: int) -> bool:
+        return page in self._page_surfaces
+
+    @traced(category="asset")
+    def decode_page(self, page: int) -> pygame.Surface:
+        """
+        Décode une page de l'atlas, sans la convertir pour l'affichage (peut être appelée depuis un autre fil
+        d'exécution ; la page doit ensuite être confiée à add_page() par le fil principal).
+        :param page: le numéro de la page
+        :return: la surface décodée
+        """
+        return pygame.image.load(os.path.join(GameSettings.ATLAS_DIRECTORY, self._pages[page]))
+
+    def page_sizes(self) -> dict:
+        """ Retourne la taille en mémoire, en octets, de chaque page décodée (par nom de fichier). """
+        return {self._pages[page]: surface.get_pitch() * surface.get_height()
+                for page, surface in self._page_surfaces.items()}
+
+    def add_page(self, page: int, surface: pygame.Surface) -> None:
+        """ Convertit pour l'affichage une page décodée par decode_page() et la rend disponible. """
+        if page not in self._page_surfaces:
+            self._page_surfaces[page] = surface.convert_alpha()
+
+    def _is_valid(self, source: str) -> bool:
+        if source not in self._valid_sources:
+            try:
+                self._valid_sources[source] = source_signature(source) == self._sources.get(source)
+            except OSError:
+                self._valid_sources[source] = False
+        return self._valid_sources[source]
+
+    def _load_index(self) -> None:
+        try:
+            with open(os.path.join(GameSettings.ATLAS_DIRECTORY, Atlas.INDEX_FILENAME)) as index_file:
+                index = json.load(index_file)
+        except (OSError, ValueError):
+            return
+
+        self._pages = index["pages"]
+        self._sources = index["sources"]
+        self._sprites = {name: (sprite["page"], pygame.Rect(sprite["rect"]), sprite["source"])
+                         for name, sprite in index["sprites"].items()}
@@ -0,0 +1,133 @@
+"""
+  Construit l'atlas des images du jeu (à relancer après toute modification d'une image) :
+
+      python atlas_builder.py
+
+  Toutes les images de GameSettings.FILE_NAMES sont regroupées dans quelques grandes pages (PNG), avec un index
+  (atlas.json) qui donne la position de chaque image. Les feuilles de sprites du taxi et de l'astronaute y sont
+  déjà découpées, image par image. Au démarrage, le jeu décode ainsi une page plutôt qu'une vingtaine de fichiers.
+  L'image de l'écran titre reste à part : la première trame n'attend pas le décodage de toute une page.
+"""
+import json
+import os
+
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
+import pygame
+
+from astronaut import Astronaut
+from atlas import Atlas, frame_name, source_signature
+from game_settings import GameSettings, Files
+from taxi import Taxi
+
+_PAGE_SIZE = 2048
+_IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+_EXCLUDED_IMAGES = (GameSettings.FILE_NAMES[Files.IMG_SPLASH],)  # chargées seules (voir plus haut)
+
+# feuilles de sprites découpées à l'avance (nombre d'images, de gauche à droite)
+_SPRITE_SHEETS = {
+    GameSettings.FILE_NAMES[Files.IMG_TAXIS]: Taxi._NB_TAXI_IMAGES,
+    GameSettings.FILE_NAMES[Files.IMG_ASTRONAUT]: Astronaut._NB_SHEET_IMAGES,
+}
+
+
+def main() -> None:
+    """ Programme principal. """
+    sprites = _collect_sprites()
+    pages, placements = _pack(sprites)
+
+    os.makedirs(GameSettings.ATLAS_DIRECTORY, exist_ok=True)
+    page_filenames = []
+    for number, page in enumerate(pages):
+        page_filename = f"page{number}.png"
+        pygame.image.save(page, os.path.join(GameSettings.ATLAS_DIRECTORY, page_filename))
+        page_filenames.append(page_filename)
+
+    index = {
+        "pages": page_filenames,
+        "sources": {source: source_signature(source) for _, _, source in sprites},
+        "sprites": {name: {"page": page, "rect": list(rect), "source": source}
+                    for (name, _, source), (page, rect) in zip(sprites, placements)},
+    }
+    with open(os.path.join(GameSettings.ATLAS_DIRECTORY, Atlas.INDEX_FILENAME), "w") as index_file:
+        json.dump(index, index_file, indent=1)
+
+    print(f"{len(sprites)} images regroupées en {len(pages)} page(s) dans {GameSettings.ATLAS_DIRECTORY}/")
+
+
+def _collect_sprites() -> list:
+    """
+    Charge les images à regrouper.
+    :return: une liste de tuples (nom dans l'atlas, surface, fichier source)
+    """
+    filenames = []
+    for value in GameSettings.FILE_NAMES.values():
+        for filename in value if isinstance(value, list) else [value]:
+            if (filename.lower().endswith(_IMAGE_EXTENSIONS) and filename not in _EXCLUDED_IMAGES
+                    and filename not in filenames):
+                filenames.append(filename)
+
+    sprites = []
+    for filename in filenames:
+        try:
+            image = _load_with_alpha(filename)
+        except FileNotFoundError:
+            print(f"introuvable, ignoré : {filename}")
+            continue
+
+        nb_frames = _SPRITE_SHEETS.get(filename)
+        if nb_frames is None:
+            sprites.append((filename, image, filename))
+            continue
+
+        frame_width = image.get_width() // nb_frames
+        for frame in range(nb_frames):
+            frame_rect = (frame * frame_width, 0, frame_width, image.get_height())
+            sprites.append((frame_name(filename, frame), image.subsurface(frame_rect), filename))
+    return sprites
+
+
+def _load_with_alpha(filename: str) -> pygame.Surface:
+    """ Charge une image en 32 bits avec transparence (les images opaques deviennent entièrement opaques). """
+    image = pygame.image.load(filename)
+    surface = pygame.Surface(image.get_size(), flags=pygame.SRCALPHA)
+    if image.get_flags() & pygame.SRCALPHA:
+        surface.blit(image, (0, 0))
+    else:
+        surface.fill((0, 0, 0, 255))
+        surface.blit(image, (0, 0))
+    return surface
+
+
+def _pack(sprites: list) -> tuple:
+    """
+    Place les images par rangées (des plus hautes aux plus basses), en ouvrant une nouvelle page au besoin.
+    :param sprites: la liste retournée par _collect_sprites()
+    :return: un tuple contenant la liste des pages (pygame.Surface) et, pour chaque image, sa
+             position (numéro de page, pygame.Rect)
+    """
+    order = sorted(range(len(sprites)), key=lambda i: sprites[i][1].get_height(), reverse=True)
+    placements = [None] * len(sprites)
+    page_heights = []  # hauteur utilisée de chaque page
+    page = -1
+    x = y = row_height = _PAGE_SIZE  # force l'ouverture de la première page
+
+    for i in order:
+        width, height = sprites[i][1].get_size()
+        if x + width > _PAGE_SIZE:  # nouvelle rangée
+            x, y, row_height = 0, y + row_height, height
+        if y + height > _PAGE_SIZE:  # nouvelle page
+            page += 1
+            page_heights.append(0)
+            x, y, row_height = 0, 0, height
+        placements[i] = (page, pygame.Rect(x, y, width, height))
+        page_heights[page] = max(page_heights[page], y + height)
+        x += width
+
+    pages = [pygame.Surface((_PAGE_SIZE, height), flags=pygame.SRCALPHA) for height in page_heights]
+    for (_, image, _), (page, rect) in zip(sprites, placements):
+        pages[page].blit(image, rect)
+    return pages, placements
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,477 @@
+"""
+  Mesures de performance des chemins critiques du jeu, sans affichage (pilotes SDL factices), à charge fixe :
+
+      python benchmark.py                                   # toutes les mesures
+      python benchmark.py --filter taxi hud                 # seulement celles dont le nom contient « taxi » ou « hud »
+      python benchmark.py --save reference.json             # enregistre les résultats comme référence
+      python benchmark.py --compare reference.json          # compare à une référence (code de sortie 1 si régression)
+
+  La mesure « startup » lance le jeu dans un processus distinct, jusqu'à la première trame de l'écran titre. Le
+  temps de démarrage rapporté par le jeu (médiane) doit en outre rester sous GameSettings.STARTUP_BUDGET_MS (code
+  de sortie 1 sinon).
+
+  Chaque mesure exécute une opération un nombre fixe de fois (après une période de réchauffement) et rapporte le
+  nombre d'opérations par seconde et les centiles de la durée d'un appel. Les niveaux synthétiques (« stress »)
+  contiennent beaucoup plus d'obstacles, de plateformes, de pompes et d'astronautes que les niveaux du jeu.
+"""
+import argparse
+import itertools
+import json
+import platform
+import random
+import re
+import subprocess
+import sys
+import time
+from functools import partial
+from math import sqrt
+
+import pygame
+
+from astronaut import Astronaut
+from black_scene import BlackScene
+from collision_world import CollisionWorld
+from game_clock import GameClock
+from frame_stats import percentile
+from game_settings import GameSettings, Files
+from headless import enable_headless
+from hud import HUD
+from input_state import InputManager, InputState
+from level_compiler import CompiledLevel, PackedMask, load_level
+from level_scene import LevelScene
+from obstacle import Obstacle
+from pad import Pad
+from pump import Pump
+from resources import ResourceManager
+from scene_manager import SceneManager
+from taxi import Taxi
+
+_RESULTS_VERSION = 1
+_DEFAULT_THRESHOLD = 0.10  # baisse relative du nombre d'opérations par seconde considérée comme une régression
+_WARMUP_RATIO = 0.1  # proportion d'appels exécutés (et ignorés) avant la mesure
+_PERCENTILES = (50, 90, 99)
+
+_STRESS_SEED = 2024
+_STRESS_NB_OBSTACLES = 150
+_STRESS_NB_PADS = 30
+_STRESS_NB_PUMPS = 12
+_STRESS_NB_ASTRONAUTS = 40
+_STRESS_TAXI_CLEARANCE = pygame.Rect(0, 0, 240, 200)  # zone libre au centre de l'écran, où apparaît le taxi
+
+_INPUT_KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN)
+_INPUT_HOLD_STEPS = 25  # les touches enfoncées changent tous les 25 pas
+
+
+class Benchmark:
+    """ Une mesure : une opération à répéter un nombre fixe de fois, préparée par une fonction d'initialisation. """
+
+    def __init__(self, name: str, iterations: int, setup) -> None:
+        """
+        :param name: le nom de la mesure (clé dans les fichiers de résultats)
+        :param iterations: le nombre d'appels mesurés (avant mise à l'échelle)
+        :param setup: une fonction sans argument qui prépare la mesure et retourne l'opération (sans argument)
+        """
+        self.name = name
+        self.iterations = iterations
+        self.setup = setup
+
+    def run(self, scale: float = 1.0) -> dict:
+        """
+        Exécute la mesure.
+        :param scale: facteur appliqué au nombre d'appels
+        :return: les résultats (nombre d'appels, opérations par seconde, durées en microsecondes)
+        """
+        operation = self.setup()
+        iterations = max(1, round(self.iterations * scale))
+
+        for _ in range(max(1, round(iterations * _WARMUP_RATIO))):
+            operation()
+
+        durations = []
+        perf_counter_ns = time.perf_counter_ns
+        for _ in range(iterations):
+            start = perf_counter_ns()
+            operation()
+            durations.append(perf_counter_ns() - start)
+
+        durations.sort()
+        total = sum(durations)
+        results = {"iterations": iterations,
+                   "ops_per_sec": iterations / max(total / 1e9, 1e-9),
+                   "mean_us": total / iterations / 1000}
+        for rank in _PERCENTILES:
+            results[f"p{rank}_us"] = percentile(durations, rank) / 1000
+        results["max_us"] = durations[-1] / 1000
+        return results
+
+
+def stress_level(seed: int = _STRESS_SEED) -> CompiledLevel:
+    """
+    Construit un niveau synthétique chargé (obstacles qui se chevauchent, nombreuses plateformes et courses).
+    :param seed: la graine qui détermine la position des éléments (même graine, même niveau)
+    :return: le niveau compilé, prêt à être passé à LevelScene
+    """
+    rng = random.Random(seed)
+    width, height = GameSettings.SCREEN_WIDTH, GameSettings.SCREEN_HEIGHT
+    clearance = _STRESS_TAXI_CLEARANCE.copy()
+    clearance.center = (width // 2, height // 2)
+    images = {}
+
+    def place(filename: str) -> tuple:
+        """ Choisit une position où l'image est entièrement à l'écran, hors de la zone du taxi. """
+        if filename not in images:
+            images[filename] = pygame.image.load(filename)
+        image_width, image_height = images[filename].get_size()
+        while True:
+            rect = pygame.Rect(rng.randrange(width - image_width), rng.randrange(height - image_height),
+                               image_width, image_height)
+            if not rect.colliderect(clearance):
+                return rect.topleft
+
+    level = CompiledLevel()
+    level.gate = load_level(1).gate
+
+    small_obstacles = GameSettings.FILE_NAMES[Files.IMG_OBSTACLES][4:]  # les autres occupent tout un bord
+    for _ in range(_STRESS_NB_OBSTACLES):
+        image = rng.choice(small_obstacles)
+        level.obstacles.append((image, *place(image)))
+
+    for _ in range(_STRESS_NB_PUMPS):
+        level.pumps.append(place(GameSettings.FILE_NAMES[Files.IMG_PUMP]))
+
+    pad_images = GameSettings.FILE_NAMES[Files.IMG_PADS]
+    for number in range(1, _STRESS_NB_PADS + 1):
+        image = pad_images[(number - 1) % len(pad_images)]
+        x, y = place(image)
+        pad_width = images[image].get_width()
+        level.pads.append((number, image, x, y, 10, pad_width - 30))
+
+    for image_filename in level.images():
+        image = images.get(image_filename) or pygame.image.load(image_filename)
+        mask = pygame.mask.from_surface(image)
+        level.masks[image_filename] = PackedMask.pack(mask)
+        if image_filename in pad_images:
+            level.pad_extents[image_filename] = Pad.compute_extents(image, mask)
+
+    for _ in range(_STRESS_NB_ASTRONAUTS):
+        source_number, target_number = rng.sample(range(1, _STRESS_NB_PADS + 1), 2)
+        _, _, source_x, source_y, start_x, _ = level.pads[source_number - 1]
+        _, _, target_x, target_y, _, end_x = level.pads[target_number - 1]
+        distance = sqrt((target_x + end_x - source_x - start_x) ** 2 + (target_y - source_y) ** 2)
+        level.astronauts.append((source_number, target_number, distance))
+
+    return level
+
+
+def scripted_inputs(seed: int):
+    """
+    Génère sans fin les commandes d'un joueur imaginaire : quelques touches de direction enfoncées, le train
+    d'atterrissage manipulé de temps à autre et la touche Retour pressée à chaque pas, pour recommencer dès que
+    le taxi est détruit.
+    :param seed: la graine (mêmes commandes pour la même graine)
+    """
+    rng = random.Random(seed)
+    held = frozenset()
+    step = 0
+    while True:
+        if step % _INPUT_HOLD_STEPS == 0:
+            held = frozenset(key for key in _INPUT_KEYS if rng.random() < 0.3)
+        pressed = {pygame.K_RETURN}
+        if rng.random() < 0.01:
+            pressed.add(pygame.K_SPACE)
+        yield InputState(held | pressed, pressed)
+        step += 1
+
+
+def _level_sprites(compiled_level: CompiledLevel) -> tuple:
+    """ Construit les éléments immobiles d'un niveau compilé, comme le fait LevelScene. """
+    resources = ResourceManager()
+    for image, packed_mask in compiled_level.masks.items():
+        if not resources.is_cached('mask', image):
+            resources.add_mask(image, packed_mask.unpack())
+    for image, extents in compiled_level.pad_extents.items():
+        Pad.add_extents(image, extents)
+
+    obstacles = [Obstacle(image, (x, y)) for image, x, y in compiled_level.obstacles]
+    pads = [Pad(number, image, (x, y), start_x, end_x) for number, image, x, y, start_x, end_x in compiled_level.pads]
+    pumps = [Pump(GameSettings.FILE_NAMES[Files.IMG_PUMP], pos) for pos in compiled_level.pumps]
+    return obstacles, pads, pumps
+
+
+def _setup_taxi_update(compiled_level: CompiledLevel):
+    obstacles, pads, pumps = _level_sprites(compiled_level)
+    screen_rect = pygame.display.get_surface().get_rect()
+    taxi = Taxi(screen_rect.center)
+    taxi.collision_world = CollisionWorld(screen_rect.size, pads + obstacles + pumps)
+    inputs = scripted_inputs(_STRESS_SEED)
+
+    def operation():
+        taxi.update(next(inputs))
+        if not screen_rect.contains(taxi.rect):
+            taxi.reset()
+
+    return operation
+
+
+def _setup_taxi_crash_on_obstacle(compiled_level: CompiledLevel):
+    obstacles, _, _ = _level_sprites(compiled_level)
+    taxi = Taxi(pygame.display.get_surface().get_rect().center)
+
+    # positions où le rectangle du taxi touche celui d'un obstacle (avec ou sans contact des pixels)
+    rng = random.Random(_STRESS_SEED)
+    probes = []
+    for _ in range(1000):
+        obstacle = rng.choice(obstacles)
+        x = rng.randint(obstacle.rect.left - taxi.rect.width + 1, obstacle.rect.right - 1)
+        y = rng.randint(obstacle.rect.top - taxi.rect.height + 1, obstacle.rect.bottom - 1)
+        probes.append((obstacle, (x, y)))
+    probes = itertools.cycle(probes)
+
+    def operation():
+        obstacle, position = next(probes)
+        if taxi.is_destroyed():
+            taxi.reset()
+        taxi.rect.topleft = position
+        taxi.crash_on_obstacle(obstacle)
+
+    return operation
+
+
+def _setup_hud_render():
+    hud = HUD()
+    hud.visible = True
+    hud.reset()
+    screen = pygame.display.get_surface()
+    step = 0
+
+    def operation():
+        nonlocal step
+        step += 1
+        hud.set_trip_money(step % 1000 / 100)
+        hud.set_current_fuel(100 - step % 100)
+        hud.render(screen)
+
+    return operation
+
+
+def _setup_pad_draw(compiled_level: CompiledLevel):
+    _, pads, _ = _level_sprites(compiled_level)
+    screen = pygame.display.get_surface()
+
+    def operation():
+        for pad in pads:
+            pad.draw(screen)
+
+    return operation
+
+
+def _setup_astronauts_update(compiled_level: CompiledLevel):
+    _, pads, _ = _level_sprites(compiled_level)
+    astronauts = [Astronaut(pads[source - 1], pads[target - 1], distance)
+                  for source, target, distance in compiled_level.astronauts]
+    screen = pygame.display.get_surface()
+    clock = GameClock()
+
+    def operation():
+        clock.step()
+        for astronaut in astronauts:
+            astronaut.update()
+            astronaut.draw(screen)
+
+    return operation
+
+
+def _start_level(compiled_level: CompiledLevel or None) -> LevelScene:
+    """ Prépare un niveau comme scène courante, piloté par des commandes scriptées. """
+    Astronaut.seed_random(_STRESS_SEED)
+    scene_manager = SceneManager()
+    scene_manager.clear()
+    level_scene = LevelScene(1, compiled_level)
+    scene_manager.add_scene("level1", level_scene)
+    scene_manager.set_scene("level1")
+    for exit_name in ("game_over", "level2_load"):
+        scene_manager.add_scene(exit_name, BlackScene())
+
+    inputs = scripted_inputs(_STRESS_SEED)
+    InputManager().set_source(lambda: next(inputs))
+    return level_scene
+
+
+def _level_step(level_scene: LevelScene):
+    """ Retourne une fonction qui avance le niveau d'un pas de simulation. """
+    clock = GameClock()
+    input_manager = InputManager()
+    hud = HUD()
+
+    def step():
+        clock.step()
+        input_manager.poll()
+        level_scene.update()
+        if hud.get_lives() <= 1:
+            hud.reset()  # la partie ne se termine jamais
+
+    return step
+
+
+def _setup_level_update(compiled_level: CompiledLevel or None):
+    return _level_step(_start_level(compiled_level))
+
+
+def _setup_level_render(compiled_level: CompiledLevel or None, dirty_rects: bool):
+    """ Le niveau est mis à jour avant chaque rendu, pour que les éléments mobiles bougent. """
+    level_scene = _start_level(compiled_level)
+    update = _level_step(level_scene)
+    screen = pygame.display.get_surface()
+
+    def operation():
+        update()
+        GameSettings.DIRTY_RECTS = dirty_rects
+        level_scene.render(screen)
+        GameSettings.DIRTY_RECTS = False
+
+    return operation
+
+
+def _setup_astronaut_load_frames():
+    Astronaut._load_and_build_frames()  # crée le cache sur disque s'il n'existe pas
+    return Astronaut._load_and_build_frames
+
+
+def _setup_astronaut_build_frames():
+    images = ResourceManager().frames(Astronaut._ASTRONAUT_FILENAME, Astronaut._NB_SHEET_IMAGES)
+    return lambda: Astronaut._build_frames(images)
+
+
+def _setup_startup(startup_times: list):
+    command = [sys.executable, "space_taxi.py", "--headless", "--ticks", "1"]
+
+    def operation():
+        process = subprocess.run(command, check=True, capture_output=True, text=True)
+        startup_times.append(float(re.search(r"démarrage en (\d+) ms", process.stdout + process.stderr).group(1)))
+
+    return operation
+
+
+def benchmarks(startup_times: list) -> list:
+    """
+    Retourne la liste de toutes les mesures, dans l'ordre d'exécution.
+    :param startup_times: reçoit les temps de démarrage (ms) rapportés par le jeu pendant la mesure « startup »
+    """
+    stress = stress_level()
+    return [
+        Benchmark("taxi_update[stress]", 20000, partial(_setup_taxi_update, stress)),
+        Benchmark("taxi_crash_on_obstacle[stress]", 20000, partial(_setup_taxi_crash_on_obstacle, stress)),
+        Benchmark("hud_render", 5000, _setup_hud_render),
+        Benchmark("pad_draw[stress]", 2000, partial(_setup_pad_draw, stress)),
+        Benchmark("astronauts_update[stress]", 2000, partial(_setup_astronauts_update, stress)),
+        Benchmark("level_update[level1]", 10000, partial(_setup_level_update, None)),
+        Benchmark("level_update[stress]", 10000, partial(_setup_level_update, stress)),
+        Benchmark("level_render[level1]", 1000, partial(_setup_level_render, None, False)),
+        Benchmark("level_render[stress]", 1000, partial(_setup_level_render, stress, False)),
+        Benchmark("level_render_dirty_rects[stress]", 2000, partial(_setup_level_render, stress, True)),
+        Benchmark("astronaut_load_frames", 50, _setup_astronaut_load_frames),
+        Benchmark("astronaut_build_frames", 10, _setup_astronaut_build_frames),
+        Benchmark("startup", 10, partial(_setup_startup, startup_times)),
+    ]
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Compare des résultats à une référence.
+    :param results: les résultats (nom de la mesure -> résultats)
+    :param baseline: les résultats de référence
+    :param threshold: la baisse relative du nombre d'opérations par seconde tolérée (0.10 : 10 %)
+    :return: la liste des noms des mesures en régression
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        change = result["ops_per_sec"] / baseline[name]["ops_per_sec"] - 1
+        if change < -threshold:
+            regressions.append(name)
+        status = "RÉGRESSION" if change < -threshold else "amélioration" if change > threshold else ""
+        print(f"  {name:<36} {baseline[name]['ops_per_sec']:>12.0f} -> {result['ops_per_sec']:>12.0f} ops/s "
+              f"({change:+.1%}) {status}")
+    return regressions
+
+
+def _environment() -> dict:
+    return {"python": platform.python_version(), "pygame": pygame.version.ver, "platform": platform.platform(),
+            "machine": platform.machine()}
+
+
+def _parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Mesures de performance de Space Taxi (sans affichage)")
+    parser.add_argument("--filter", nargs="+", metavar="TEXTE", default=None,
+                        help="n'exécute que les mesures dont le nom contient l'un de ces textes")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="facteur appliqué au nombre d'appels de chaque mesure")
+    parser.add_argument("--save", metavar="FICHIER", default=None,
+                        help="enregistre les résultats (JSON) pour servir de référence")
+    parser.add_argument("--compare", metavar="FICHIER", default=None,
+                        help="compare les résultats à une référence (code de sortie 1 si régression)")
+    parser.add_argument("--threshold", type=float, default=_DEFAULT_THRESHOLD,
+                        help=f"baisse relative tolérée avant de signaler une régression (défaut : "
+                             f"{_DEFAULT_THRESHOLD})")
+    parser.add_argument("--list", action="store_true", help="affiche le nom des mesures sans les exécuter")
+    return parser.parse_args()
+
+
+def main() -> None:
+    """ Exécute les mesures, puis enregistre ou compare les résultats. """
+    args = _parse_arguments()
+
+    enable_headless()
+    pygame.init()
+    pygame.display.set_mode((GameSettings.SCREEN_WIDTH, GameSettings.SCREEN_HEIGHT))
+
+    startup_times = []
+    selected = [benchmark for benchmark in benchmarks(startup_times)
+                if not args.filter or any(text in benchmark.name for text in args.filter)]
+    if args.list:
+        for benchmark in selected:
+            print(benchmark.name)
+        return
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+
+    results = {}
+    print(f"{'mesure':<36} {'appels':>8} {'ops/s':>12} {'p50 (µs)':>10} {'p90 (µs)':>10} {'p99 (µs)':>10}")
+    for benchmark in selected:
+        result = benchmark.run(args.scale)
+        results[benchmark.name] = result
+        print(f"{benchmark.name:<36} {result['iterations']:>8} {result['ops_per_sec']:>12.0f} "
+              f"{result['p50_us']:>10.1f} {result['p90_us']:>10.1f} {result['p99_us']:>10.1f}")
+    InputManager().set_source(None)
+
+    if args.save:
+        with open(args.save, "w") as results_file:
+            json.dump({"version": _RESULTS_VERSION, "environment": _environment(), "results": results},
+                      results_file, indent=2)
+        print(f"résultats enregistrés : {args.save}")
+
+    regressions = []
+    if startup_times:
+        startup_ms = percentile(sorted(startup_times), 50)
+        print(f"démarrage (rapporté par le jeu) : {startup_ms:.0f} ms (budget : {GameSettings.STARTUP_BUDGET_MS} ms)")
+        if startup_ms > GameSettings.STARTUP_BUDGET_MS:
+            regressions.append("startup")
+
+    if baseline:
+        if baseline.get("environment") != _environment():
+            print("attention : la référence a été mesurée dans un autre environnement")
+        print(f"comparaison avec {args.compare} (seuil : {args.threshold:.0%}) :")
+        regressions += compare(results, baseline["results"], args.threshold)
+        if regressions:
+            print(f"{len(regressions)} régression(s) : {', '.join(regressions)}")
+
+    pygame.quit()
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
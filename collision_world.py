@@ -0,0 +1,123 @@
+import pygame
+
+from tracing import traced
+
+
+class CollisionWorld:
+    """
+    Géométrie de collision immobile d'un niveau : les masques de toutes les plateformes, obstacles et pompes réunis
+    en un seul masque de la taille du niveau. Savoir si le taxi touche quelque chose ne demande ainsi qu'un seul
+    Mask.overlap, quel que soit le nombre d'éléments.
+
+    Une carte des identifiants (une surface dont chaque pixel opaque encode le numéro de l'élément qui l'occupe)
+    n'est consultée qu'après un contact, pour savoir quels éléments sont touchés.
+    """
+
+    _SWEEP_STEP: float = 4.0  # px, écart maximal entre deux positions vérifiées lors d'un balayage
+
+    @traced(category="collision")
+    def __init__(self, size: tuple, elements: list) -> None:
+        """
+        Construit le masque et la carte des identifiants d'un niveau.
+        :param size: la taille du niveau, en pixels
+        :param elements: les éléments immobiles (avec rect et mask), dans l'ordre où leurs collisions sont traitées
+        """
+        self._elements = list(elements)
+        self._mask = pygame.mask.Mask(size)
+        self._ids = pygame.Surface(size, 0, 32)
+        self._ids.fill((0, 0, 0))
+        self._neighbours = [[] for _ in self._elements]  # éléments dont les pixels chevauchent ceux de l'élément
+
+        for number, element in enumerate(self._elements):
+            self._mask.draw(element.mask, element.rect.topleft)
+            element.mask.to_surface(self._ids, setcolor=CollisionWorld._id_to_color(number + 1), unsetcolor=None,
+                                    dest=element.rect.topleft)
+            for other_number, other in enumerate(self._elements[:number]):
+                offset = (other.rect.x - element.rect.x, other.rect.y - element.rect.y)
+                if element.rect.colliderect(other.rect) and element.mask.overlap(other.mask, offset):
+                    self._neighbours[number].append(other_number)
+                    self._neighbours[other_number].append(number)
+
+    @traced(category="collision")
+    def hits(self, mask: pygame.mask.Mask, pos: tuple) -> list:
+        """
+        Retourne les éléments dont au moins un pixel touche un masque.
+        :param mask: le masque (celui du taxi)
+        :param pos: la position du coin supérieur gauche du masque dans le niveau
+        :return: la liste des éléments touchés, dans l'ordre donné à la construction (vide, le plus souvent)
+        """
+        point = self._mask.overlap(mask, pos)
+        if point is None:
+            return []
+
+        # chaque élément trouvé est retiré d'une copie du masque, jusqu'à ce qu'il ne touche plus rien
+        found = set()
+        remaining = mask.copy()
+        while point is not None:
+            number = CollisionWorld._color_to_id(self._ids.get_at(point)) - 1
+            found.add(number)
+            element = self._elements[number]
+            remaining.erase(element.mask, (element.rect.x - pos[0], element.rect.y - pos[1]))
+            point = self._mask.overlap(remaining, pos)
+
+        # un élément qui chevauche un élément trouvé a pu être retiré avec lui : il est vérifié séparément
+        for number in [neighbour for number in found for neighbour in self._neighbours[number]]:
+            if number not in found:
+                element = self._elements[number]
+                if mask.overlap(element.mask, (element.rect.x - pos[0], element.rect.y - pos[1])):
+                    found.add(number)
+
+        return [self._elements[number] for number in sorted(found)]
+
+    @traced(category="collision")
+    def time_of_impact(self, mask: pygame.mask.Mask, start: pygame.Vector2, end: pygame.Vector2) -> float:
+        """
+        Balaie le déplacement d'un masque, pour qu'un déplacement rapide ne traverse pas un élément mince.
+        Seul un nouveau contact compte : les éléments déjà touchés au départ sont ignorés.
+        :param mask: le masque qui se déplace
+        :param start: la position de départ (coin supérieur gauche)
+        :param end: la position d'arrivée
+        :return: la fraction du déplacement (de 0 à 1) à laquelle survient le premier nouveau contact, 1 si aucun
+        """
+        nb_samples = int(start.distance_to(end) // CollisionWorld._SWEEP_STEP)
+        if nb_samples == 0:
+            return 1.0
+
+        touched = self.hits(mask, CollisionWorld._rounded(start))
+
+        def position_at(t: float) -> tuple:
+            return CollisionWorld._rounded(start.lerp(end, t))
+
+        def new_contact(t: float) -> bool:
+            return any(element not in touched for element in self.hits(mask, position_at(t)))
+
+        # échantillons espacés d'au plus _SWEEP_STEP pixels, puis dichotomie entre le dernier libre et le premier touché
+        free, hit = 0.0, None
+        for sample in range(1, nb_samples + 2):
+            t = min(1.0, sample / (nb_samples + 1))
+            if new_contact(t):
+                hit = t
+                break
+            free = t
+        if hit is None:
+            return 1.0
+
+        while max(abs(a - b) for a, b in zip(position_at(free), position_at(hit))) > 1:
+            middle = (free + hit) / 2
+            if new_contact(middle):
+                hit = middle
+            else:
+                free = middle
+        return hit
+
+    @staticmethod
+    def _rounded(position: pygame.Vector2) -> tuple:
+        return round(position.x), round(position.y)
+
+    @staticmethod
+    def _id_to_color(element_id: int) -> tuple:
+        return element_id & 0xFF, (element_id >> 8) & 0xFF, (element_id >> 16) & 0xFF
+
+    @staticmethod
+    def _color_to_id(color: pygame.Color) -> int:
+        return color.r | (color.g << 8) | (color.b << 16)
@@ -1,6 +1,6 @@
-import pygame
-
 from scene import Scene
+from tracing import traced
+from tween import Tween, TweenScheduler
 
 
 class Fade:
@@ -13,9 +13,8 @@ class Fade:
         self._source_alpha = 255  # opaque
         self._target_alpha = 0    # transparent
 
-        self._duration = None
+        self._progress = 0.0  # de 0 (source seule) à 1 (cible seule), animé par le TweenScheduler
         self._fading = False
-        self._start_time = None
 
     def start(self, duration: int = 0) -> None:
         """
@@ -23,30 +22,27 @@ class Fade:
         :param duration: durée en millisecondes (0 = instantané par défaut)
         :return: aucun
         """
-        self._duration = duration
-        self._start_time = pygame.time.get_ticks()
-
         if duration > 0:
             self._fading = True
+            TweenScheduler().add(Tween(self, '_progress', 0.0, 1.0, duration / 1000))
         else:
             source_surface = self._source.surface()
             source_surface.set_alpha(0)
             target_surface = self._target.surface()
             target_surface.set_alpha(255)
 
+    @traced(category="scene")
     def update(self) -> None:
         if not self._fading:
             return
 
-        elapsed_time = pygame.time.get_ticks() - self._start_time
-
         # source : d'opaque à transparent
-        self._source_alpha = max(0, 255 - (elapsed_time / self._duration) * 255)
+        self._source_alpha = max(0, 255 - self._progress * 255)
         source_surface = self._source.surface()
         source_surface.set_alpha(self._source_alpha)
 
         # cible : de transparent à opaque
-        self._target_alpha = min(255, (elapsed_time / self._duration) * 255)
+        self._target_alpha = min(255, self._progress * 255)
         target_surface = self._target.surface()
         target_surface.set_alpha(self._target_alpha)
 
@@ -4,8 +4,6 @@ import sys
 
 from game_settings import GameSettings
 
-pygame.init()
-
 import pygame
 import time
 import threading
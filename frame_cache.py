@@ -0,0 +1,71 @@
+import hashlib
+import os
+
+import pygame
+
+from game_settings import GameSettings
+from tracing import traced
+
+_CACHE_VERSION = 2  # à incrémenter si le format des fichiers de cache change
+
+
+def _cache_filename(name: str, source_filename: str, parameters: tuple) -> str:
+    """
+    Construit le nom du fichier de cache d'une bande de trames, à partir de l'empreinte du fichier source et des
+    paramètres de construction : une feuille de sprites modifiée ou une construction différente (version du
+    constructeur, graine, générateur aléatoire...) invalide donc automatiquement le cache.
+    :param name: nom de la bande de trames (ex. : "astronaut")
+    :param source_filename: le fichier à partir duquel les trames sont construites
+    :param parameters: les paramètres de construction des trames (valeurs dont repr() est stable)
+    :return: le chemin du fichier de cache
+    """
+    digest = hashlib.sha1(repr((_CACHE_VERSION, parameters)).encode())
+    with open(source_filename, "rb") as source_file:
+        digest.update(source_file.read())
+    return os.path.join(GameSettings.CACHE_DIRECTORY, f"{name}_{digest.hexdigest()}.png")
+
+
+@traced(category="asset")
+def load_frames(name: str, source_filename: str, frame_size: tuple, nb_frames: int,
+                parameters: tuple = ()) -> list or None:
+    """
+    Charge une bande de trames précédemment mise en cache.
+    :param name: nom de la bande de trames
+    :param source_filename: le fichier à partir duquel les trames ont été construites
+    :param frame_size: dimensions (largeur, hauteur) d'une trame
+    :param nb_frames: nombre de trames attendues
+    :param parameters: les paramètres de construction des trames (les mêmes qu'à save_frames())
+    :return: la liste des trames (pygame.Surface), ou None si le cache est absent ou invalide
+    """
+    try:
+        strip = pygame.image.load(_cache_filename(name, source_filename, parameters)).convert_alpha()
+    except (OSError, pygame.error):
+        return None
+
+    width, height = frame_size
+    if strip.get_size() != (width * nb_frames, height):
+        return None
+
+    return [strip.subsurface((frame * width, 0, width, height)).copy() for frame in range(nb_frames)]
+
+
+def save_frames(name: str, source_filename: str, frames: list, parameters: tuple = ()) -> None:
+    """
+    Met en cache une bande de trames (de même taille), en une seule image PNG.
+    Un cache qui ne peut pas être écrit (disque en lecture seule, par exemple) est simplement ignoré.
+    :param name: nom de la bande de trames
+    :param source_filename: le fichier à partir duquel les trames ont été construites
+    :param frames: la liste des trames (pygame.Surface)
+    :param parameters: les paramètres de construction des trames (voir _cache_filename())
+    :return: aucun
+    """
+    width, height = frames[0].get_size()
+    strip = pygame.Surface((width * len(frames), height), flags=pygame.SRCALPHA)
+    for frame, surface in enumerate(frames):
+        strip.blit(surface, (frame * width, 0))
+
+    try:
+        os.makedirs(GameSettings.CACHE_DIRECTORY, exist_ok=True)
+        pygame.image.save(strip, _cache_filename(name, source_filename, parameters))
+    except (OSError, pygame.error):
+        pass
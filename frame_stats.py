@@ -0,0 +1,208 @@
+import csv
+import json
+import platform
+import time
+from array import array
+from contextlib import contextmanager
+
+import pygame
+
+from game_settings import GameSettings
+from tracing import Tracer
+
+
+class FrameStats:
+    """
+    Singleton qui mesure la durée de chaque trame affichée, par phase de la boucle de jeu (événements, mise à jour,
+    rendu, affichage) et par scène. Seules les mesures des dernières trames sont conservées, avec le nombre total
+    de trames et de trames hors budget : les statistiques de cette fenêtre glissante alimentent la superposition
+    de performance (performance_overlay.py). Pour exporter les mesures de toute la partie (export()), il faut
+    demander dès le départ de les conserver toutes (keep_history(), quelques octets par trame).
+    """
+
+    PHASES = ('events', 'update', 'render', 'flip')
+    WINDOW = 300  # trames de la fenêtre glissante
+
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super(FrameStats, cls).__new__(cls, *args, **kwargs)
+        return cls._instance
+
+    def __init__(self) -> None:
+        if not hasattr(self, '_initialized'):
+            self._budget_ms = 1000 / GameSettings.FPS
+            self._history = {name: array('d') for name in ('frame', 'work') + FrameStats.PHASES}  # ms, par trame
+            self._scene_history = {}  # (scène, 'update' ou 'render') -> ms, par trame où la scène a été active
+            self._keep_history = False  # False : seules les trames de la fenêtre glissante sont conservées
+            self._nb_frames = 0
+            self._nb_over_budget = 0
+            self._startup_ms = None  # du lancement à la première trame de l'écran titre (voir space_taxi.py)
+
+            self._frame_start = None
+            self._previous_frame_start = None
+            self._phases = dict.fromkeys(FrameStats.PHASES, 0.0)
+            self._scenes = {}
+
+            self._initialized = True
+
+    @property
+    def budget_ms(self) -> float:
+        return self._budget_ms
+
+    def set_target_fps(self, fps: int) -> None:
+        """ Fixe la cadence visée : une trame dont le travail dépasse 1/fps seconde est hors budget. """
+        self._budget_ms = 1000 / fps
+
+    def keep_history(self) -> None:
+        """ Conserve les mesures de toutes les trames à venir (pour export()), plutôt que la fenêtre seulement. """
+        self._keep_history = True
+
+    def set_startup_time(self, startup_ms: float) -> None:
+        self._startup_ms = startup_ms
+
+    def begin_frame(self) -> None:
+        """ Débute la mesure d'une trame (la précédente, si elle n'a pas été terminée, est abandonnée). """
+        self._frame_start = time.perf_counter()
+        self._phases = dict.fromkeys(FrameStats.PHASES, 0.0)
+        self._scenes = {}
+
+    def end_frame(self) -> None:
+        """ Termine la mesure de la trame en cours et l'ajoute à l'historique. """
+        if self._frame_start is None:
+            return
+
+        history = self._history
+        if history['frame'] and self._previous_frame_start is not None:
+            history['frame'][-1] = (self._frame_start - self._previous_frame_start) * 1000
+        self._previous_frame_start = self._frame_start
+
+        work_ms = 0.0
+        for name, seconds in self._phases.items():
+            history[name].append(seconds * 1000)
+            work_ms += seconds * 1000
+        history['work'].append(work_ms)
+        history['frame'].append(work_ms)  # corrigée au début de la trame suivante (attente comprise)
+        self._nb_frames += 1
+        if work_ms > self._budget_ms:
+            self._nb_over_budget += 1
+
+        for key, seconds in self._scenes.items():
+            self._scene_history.setdefault(key, array('d')).append(seconds * 1000)
+        self._frame_start = None
+
+        if not self._keep_history and len(history['work']) >= 2 * FrameStats.WINDOW:
+            # une fois toutes les WINDOW trames : la mémoire reste bornée sans décaler les valeurs à chaque trame
+            for values in list(history.values()) + list(self._scene_history.values()):
+                del values[:-FrameStats.WINDOW]
+
+    @contextmanager
+    def phase(self, name: str):
+        """ Mesure une phase de la trame en cours (with FrameStats().phase('render'): ...). """
+        start = time.perf_counter()
+        try:
+            with Tracer().span(name, "frame"):
+                yield
+        finally:
+            self._phases[name] += time.perf_counter() - start
+
+    @contextmanager
+    def scene(self, scene, kind: str):
+        """
+        Mesure le travail d'une scène pendant la trame en cours.
+        :param scene: la scène
+        :param kind: 'update' ou 'render'
+        """
+        start = time.perf_counter()
+        try:
+            with Tracer().span(f"{type(scene).__name__}.{kind}", "scene"):
+                yield
+        finally:
+            key = (type(scene).__name__, kind)
+            self._scenes[key] = self._scenes.get(key, 0.0) + time.perf_counter() - start
+
+    def nb_frames(self) -> int:
+        return self._nb_frames
+
+    def nb_over_budget(self, window: bool = False) -> int:
+        """ Retourne le nombre de trames hors budget, de toute la partie ou de la fenêtre glissante. """
+        if not window:
+            return self._nb_over_budget
+        return sum(1 for work_ms in self._history['work'][-FrameStats.WINDOW:] if work_ms > self._budget_ms)
+
+    def last(self, name: str) -> float:
+        """ Retourne la durée (ms) d'une phase, de 'work' ou de 'frame' à la dernière trame terminée. """
+        values = self._history[name]
+        return values[-1] if values else 0.0
+
+    def window(self, name: str) -> array:
+        """ Retourne les durées (ms) d'une phase, de 'work' ou de 'frame' pour les trames de la fenêtre glissante. """
+        return self._history[name][-FrameStats.WINDOW:]
+
+    def statistics(self, name: str, window: bool = False) -> dict:
+        """
+        Calcule les statistiques d'une phase, de 'work' (somme des phases) ou de 'frame' (d'une trame à l'autre).
+        :param name: le nom de la mesure
+        :param window: True pour la fenêtre glissante seulement, False pour toutes les trames conservées (toute la
+                       partie avec keep_history())
+        :return: un dictionnaire (nombre de trames, moyenne, p50, p95, p99 et maximum en ms)
+        """
+        return FrameStats._summarize(self.window(name) if window else self._history[name])
+
+    def scene_statistics(self, window: bool = False) -> dict:
+        """ Calcule les statistiques de chaque scène, par (nom de la classe, 'update' ou 'render'). """
+        return {key: FrameStats._summarize(values[-FrameStats.WINDOW:] if window else values)
+                for key, values in self._scene_history.items()}
+
+    def summary(self) -> dict:
+        """ Retourne les statistiques de toute la partie (voir export()). """
+        return {
+            "environment": {"python": platform.python_version(), "pygame": pygame.version.ver,
+                            "platform": platform.platform(), "machine": platform.machine()},
+            "startup_ms": self._startup_ms,
+            "frames": self.nb_frames(),
+            "budget_ms": self._budget_ms,
+            "frames_over_budget": self._nb_over_budget,
+            "phases": {name: self.statistics(name) for name in ('frame', 'work') + FrameStats.PHASES},
+            "scenes": {f"{scene}.{kind}": statistics
+                       for (scene, kind), statistics in self.scene_statistics().items()},
+        }
+
+    def export(self, filename: str) -> None:
+        """
+        Exporte les mesures de la partie (voir keep_history()) : un fichier .csv contient une rangée par trame
+        (durée de chaque phase), tout autre fichier reçoit le résumé (summary()) en JSON.
+        :param filename: le nom du fichier
+        """
+        if filename.lower().endswith(".csv"):
+            names = ('frame', 'work') + FrameStats.PHASES
+            with open(filename, "w", newline="") as csv_file:
+                writer = csv.writer(csv_file)
+                writer.writerow(["trame"] + [f"{name}_ms" for name in names] + ["hors_budget"])
+                for number, values in enumerate(zip(*(self._history[name] for name in names))):
+                    writer.writerow([number] + [f"{value:.3f}" for value in values] +
+                                    [int(values[1] > self._budget_ms)])
+        else:
+            with open(filename, "w") as json_file:
+                json.dump(self.summary(), json_file, indent=2)
+
+    @staticmethod
+    def _summarize(values) -> dict:
+        ordered = sorted(values)
+        if not ordered:
+            return {"frames": 0}
+        return {"frames": len(ordered), "mean_ms": sum(ordered) / len(ordered),
+                "p50_ms": percentile(ordered, 50), "p95_ms": percentile(ordered, 95),
+                "p99_ms": percentile(ordered, 99), "max_ms": ordered[-1]}
+
+
+def percentile(sorted_values, rank: float) -> float:
+    """
+    Centile par rang le plus proche.
+    :param sorted_values: les valeurs, triées
+    :param rank: le centile voulu (de 0 à 100)
+    :return: la valeur
+    """
+    index = max(1, round(rank / 100 * len(sorted_values)))
+    return sorted_values[min(index, len(sorted_values)) - 1]
@@ -0,0 +1,95 @@
+import pygame
+
+from game_settings import GameSettings
+
+
+class GameClock:
+    """
+    Singleton pour l'horloge du jeu.
+
+    La simulation avance par pas fixes (GameSettings.SIMULATION_RATE pas par seconde), peu importe
+    la cadence d'affichage : le temps réel écoulé entre deux trames est accumulé, puis consommé par
+    tranches d'un pas. Le reste de l'accumulateur sert à interpoler l'affichage entre les deux
+    derniers états simulés. Le temps retourné par time() et get_ticks() est celui de la simulation.
+
+    En mode pas à pas (headless), chaque tick dure exactement un pas de simulation, sans aucune
+    attente : la boucle de jeu tourne alors aussi vite que le processeur le permet.
+    """
+
+    _MAX_STEPS_PER_FRAME = 5  # au-delà, le retard est abandonné plutôt que rattrapé
+
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super(GameClock, cls).__new__(cls, *args, **kwargs)
+        return cls._instance
+
+    def __init__(self) -> None:
+        if not hasattr(self, '_initialized'):
+            self._clock = pygame.time.Clock()
+            self._stepped = False
+            self._step_ms = 1000 / GameSettings.SIMULATION_RATE
+            self._simulation_ms = 0.0
+            self._accumulator_ms = 0.0
+
+            self._initialized = True
+
+    def reset(self) -> None:
+        """ Remet le temps de simulation à zéro. """
+        self._simulation_ms = 0.0
+        self._accumulator_ms = 0.0
+
+    def set_stepped(self, stepped: bool) -> None:
+        """
+        Active ou désactive le mode pas à pas.
+        :param stepped: True pour que chaque tick avance d'une trame sans attendre
+        """
+        self._stepped = stepped
+
+    def is_stepped(self) -> bool:
+        return self._stepped
+
+    def tick(self, fps: int = 0) -> float:
+        """
+        Termine une trame affichée et accumule le temps écoulé depuis la précédente.
+        :param fps: cadence d'affichage maximale en mode normal (ignorée en mode pas à pas)
+        :return: durée de la trame en millisecondes
+        """
+        frame_ms = self._step_ms if self._stepped else self._clock.tick(fps)
+        self._accumulator_ms += frame_ms
+        return frame_ms
+
+    def pending_steps(self) -> int:
+        """
+        Retire de l'accumulateur les pas de simulation à effectuer pour la trame courante.
+        :return: le nombre de pas à simuler (0 si la trame a été plus courte qu'un pas)
+        """
+        nb_steps = int((self._accumulator_ms + 1e-6) // self._step_ms)
+        if nb_steps > GameClock._MAX_STEPS_PER_FRAME:
+            nb_steps = GameClock._MAX_STEPS_PER_FRAME
+            self._accumulator_ms = nb_steps * self._step_ms
+        self._accumulator_ms = max(0.0, self._accumulator_ms - nb_steps * self._step_ms)
+        return nb_steps
+
+    def step(self) -> None:
+        """ Fait avancer le temps de simulation d'un pas. """
+        self._simulation_ms += self._step_ms
+
+    def interpolation(self) -> float:
+        """
+        Retourne la fraction de pas écoulée depuis le dernier état simulé, pour l'affichage.
+        :return: une valeur entre 0 (dernier état) et 1 (prochain état)
+        """
+        return min(1.0, self._accumulator_ms / self._step_ms)
+
+    def get_ticks(self) -> int:
+        """ Retourne le temps de simulation en millisecondes (remplace pygame.time.get_ticks). """
+        return int(self._simulation_ms)
+
+    def time(self) -> float:
+        """ Retourne le temps de simulation en secondes (remplace time.time). """
+        return self._simulation_ms / 1000
+
+    def get_fps(self) -> float:
+        return self._clock.get_fps()
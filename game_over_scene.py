@@ -1,7 +1,8 @@
 import pygame
 
 from fatal_error import FatalError
-from game_settings import Files, GameSettings
+from game_settings import Files
+from resources import ResourceManager
 from scene import Scene
 
 
@@ -10,13 +11,18 @@ class GameOver(Scene):
     def __init__(self) -> None:
         super().__init__()
         try:
-         self._surface = pygame.image.load(GameSettings.FILE_NAMES[Files.GAME_OVER_IMG]).convert_alpha()
+         self._surface = ResourceManager().image(Files.GAME_OVER_IMG).copy()  # copie : modifiée par les fondus
         except FileNotFoundError as e:
             directory_plus_filename = str(e).split("'")[1]
             filename = directory_plus_filename.split("/")[-1]
             fatal_error_app = FatalError()
             fatal_error_app.run(filename)
 
+    @staticmethod
+    def required_files() -> tuple:
+        """ Dresse la liste des fichiers utilisés par la scène (voir LevelLoadingScene.required_files()). """
+        return [Files.GAME_OVER_IMG], [], []
+
     def handle_event(self, event: pygame.event.Event) -> None:
         pass
 
@@ -37,10 +37,19 @@ class GameSettings:
 
     SCREEN_WIDTH = 1280
     SCREEN_HEIGHT = 720
-    FPS = 90
+    FPS = 90  # cadence d'affichage maximale
+    SIMULATION_RATE = 90  # pas de simulation par seconde (la physique du taxi est calibrée pour ce rythme)
+    STARTUP_BUDGET_MS = 500  # délai maximal entre le lancement et la première trame de l'écran titre
+
+    HEADLESS = False  # sans fenêtre ni audio, horloge pas à pas (voir headless.py)
+    DIRTY_RECTS = False  # rendu partiel : seules les zones modifiées sont redessinées et rafraîchies
 
     NB_PLAYER_LIVES = 5
 
+    CACHE_DIRECTORY = "cache"  # trames et données précalculées, reconstruites au besoin
+    ATLAS_DIRECTORY = "atlas"  # pages d'images construites par atlas_builder.py
+    RESOURCE_MEMORY_BUDGET = 64 * 1024 * 1024  # octets de ressources gardées en cache (voir resources.py)
+
     FILE_NAMES = {
         Files.CFG_LEVEL: "levels/level#.cfg",
         Files.FONT: "fonts/boombox2.ttf",
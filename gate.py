@@ -13,9 +13,16 @@ class Gate(Obstacle):
     def close(self) -> None:
         self._closed = True
 
-    def draw(self, surface: pygame.Surface) -> None:
+    def draw(self, surface: pygame.Surface) -> pygame.Rect or None:
         if self._closed:
-            surface.blit(self.image, self.rect)
+            return surface.blit(self.image, self.rect)
+        return None
+
+    def draw_area(self) -> pygame.Rect or None:
+        """ Retourne, sans dessiner, la zone que draw() couvrirait (None si la barrière est ouverte). """
+        if self._closed:
+            return self.rect.copy()
+        return None
 
     def is_closed(self) -> bool:
         return self._closed
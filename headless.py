@@ -0,0 +1,17 @@
+import os
+
+from game_clock import GameClock
+from game_settings import GameSettings
+
+
+def enable_headless(keep_sounds: bool = False) -> None:
+    """
+    Active le mode sans affichage (headless) : pilotes vidéo et audio factices, sons muets
+    et horloge pas à pas sans limite de cadence. Doit être appelée avant pygame.init().
+    :param keep_sounds: True pour charger quand même les sons (inaudibles) : leur durée reste alors celle des
+                        fichiers, comme dans une partie normale (voir replay.py)
+    """
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    os.environ['SDL_AUDIODRIVER'] = 'dummy'
+    GameSettings.HEADLESS = not keep_sounds
+    GameClock().set_stepped(True)
@@ -1,8 +1,19 @@
-import threading
-import time
 import pygame
 
+from enum import Enum, auto
+
 from game_settings import GameSettings, Files
+from resources import ResourceManager
+from tween import Tween, TweenScheduler
+
+
+class HUDWidget(Enum):
+    """ Différents éléments (widgets) du HUD, dans leur ordre d'affichage. """
+    LIVES = auto()
+    BANK_MONEY = auto()
+    TRIP_MONEY = auto()
+    PAD_MESSAGE = auto()
+    FUEL = auto()
 
 
 class HUD:
@@ -13,6 +24,10 @@ class HUD:
     _FUEL_GAUGE_EMPTY = GameSettings.FILE_NAMES[Files.IMG_FUEL_GAUGE_EMPTY]
     _LIVES_ICONS_SPACING = 10
 
+    _PAD_MESSAGE_FADE_IN = 0.26  # s
+    _PAD_MESSAGE_DISPLAY = 1.75  # s
+    _PAD_MESSAGE_FADE_OUT = 0.52  # s
+
     _instance = None
 
     def __new__(cls, *args, **kwargs):
@@ -36,50 +51,107 @@ class HUD:
             self._trip_money_surface = self._render_trip_money_surface()
 
             self._lives = self._settings.NB_PLAYER_LIVES
-            self._lives_icon = pygame.image.load(HUD._LIVES_ICONS_FILENAME).convert_alpha()
+            self._lives_icon = ResourceManager().image(HUD._LIVES_ICONS_FILENAME)
             self._lives_pos = pygame.Vector2(20, self._settings.SCREEN_HEIGHT - (self._lives_icon.get_height() + 40))
 
             self._fuel_status = None
-            self._fuel_full_hud = pygame.image.load(HUD._FUEL_GAUGE_FULL).convert_alpha()
-            self._fuel_empty_hud = pygame.image.load(HUD._FUEL_GAUGE_EMPTY).convert_alpha()
+            self._fuel_full_hud = HUD._build_fuel_gauge(ResourceManager().image(HUD._FUEL_GAUGE_FULL))
+            self._fuel_visible_width = self._fuel_full_hud.get_width()
+            self._fuel_empty_hud = ResourceManager().image(HUD._FUEL_GAUGE_EMPTY)
             self._fuel_hud_pos = pygame.Vector2((self._settings.SCREEN_WIDTH - (self._fuel_full_hud.get_width())) / 2, self._settings.SCREEN_HEIGHT - self._fuel_full_hud.get_height())
             self._fuel_message_pos = pygame.Vector2((self._settings.SCREEN_WIDTH / 2, self._settings.SCREEN_HEIGHT - self._fuel_full_hud.get_height()))
 
+            self._fuel_message_surface = self._render_fuel_message_surface()
+
             self._current_pad = None
             self._current_pad_surface = None
-            self._text_thread = None
-            self._lock = threading.Lock()
             self._opacity = 0
+            self._displayed_opacity = 0
+
+            # superposition conservée d'une trame à l'autre : seuls les widgets modifiés sont recomposés
+            self._overlay = pygame.Surface((self._settings.SCREEN_WIDTH, self._settings.SCREEN_HEIGHT), pygame.SRCALPHA)
+            self._widget_rects = {widget: None for widget in HUDWidget}
+            self._dirty_widgets = set(HUDWidget)
+            self._draw_widget = {
+                HUDWidget.LIVES: self._draw_lives,
+                HUDWidget.BANK_MONEY: self._draw_bank_money,
+                HUDWidget.TRIP_MONEY: self._draw_trip_money,
+                HUDWidget.PAD_MESSAGE: self._draw_pad_message,
+                HUDWidget.FUEL: self._draw_fuel
+            }
 
             self.visible = False
 
             self._initialized = True
 
-    def render(self, screen: pygame.Surface) -> None:
-        spacing = self._lives_icon.get_width() + HUD._LIVES_ICONS_SPACING
-        for n in range(self._lives):
-            screen.blit(self._lives_icon, (self._lives_pos.x + (n * spacing), self._lives_pos.y))
-
-        screen.blit(self._bank_money_surface, (self._bank_money_pos.x, self._bank_money_pos.y))
-
-        x = self._settings.SCREEN_WIDTH - self._trip_money_surface.get_width() - 20
-        y = self._settings.SCREEN_HEIGHT - self._trip_money_surface.get_height() - 10
-        screen.blit(self._trip_money_surface, (x, y))
-
-        if self._current_pad_surface:
-            self._current_pad_surface.set_alpha(self._opacity)
-            x = (self._settings.SCREEN_WIDTH - self._current_pad_surface.get_width()) / 2
-            y = self._settings.SCREEN_HEIGHT / 2
-            screen.blit(self._current_pad_surface, (x, y))
-
-        screen.blit(self._fuel_empty_hud, self._fuel_hud_pos)
-        screen.blit(self._fuel_full_hud, self._fuel_hud_pos)
-        screen.blit(self._render_fuel_message_surface(), self._fuel_message_pos)
+    def render(self, screen: pygame.Surface, areas: list = None) -> list:
+        """
+        Affiche le HUD. Les widgets modifiés depuis le dernier affichage sont d'abord recomposés dans
+        la surface de superposition, qui est ensuite copiée à l'écran.
+        :param screen: écran (surface sur laquelle effectuer le rendu)
+        :param areas: si fournie, seules ces zones de l'écran sont recopiées (rendu partiel) ; l'appelant doit
+                      alors avoir déjà appelé update_overlay() pour connaître les zones touchées par le HUD
+        :return: la liste des zones de l'écran où le HUD a été dessiné
+        """
+        if areas is None:
+            self.update_overlay()
+
+        bounds = self._overlay_bounds()
+        if bounds is None:
+            return []
+        if areas is None:
+            return [screen.blit(self._overlay, bounds, bounds)]
+
+        rects = []
+        for area in areas:
+            area = area.clip(bounds)
+            if area:
+                rects.append(screen.blit(self._overlay, area, area))
+        return rects
+
+    def update_overlay(self) -> list:
+        """
+        Recompose, dans la surface de superposition, les widgets modifiés depuis le dernier appel.
+        :return: la liste des zones de l'écran touchées (ancienne et nouvelle position des widgets modifiés)
+        """
+        if self._current_pad_surface and self._opacity != self._displayed_opacity:
+            self._dirty_widgets.add(HUDWidget.PAD_MESSAGE)
+
+        if not self._dirty_widgets:
+            return []
+
+        cleared_rects = [self._widget_rects[widget] for widget in self._dirty_widgets if self._widget_rects[widget]]
+        for rect in cleared_rects:
+            self._overlay.fill((0, 0, 0, 0), rect)
+
+        # un widget voisin effacé par erreur (zones qui se chevauchent) est redessiné lui aussi
+        widgets = set(self._dirty_widgets)
+        for widget, rect in self._widget_rects.items():
+            if rect and rect.collidelist(cleared_rects) != -1:
+                widgets.add(widget)
+
+        dirty_rects = list(cleared_rects)
+        for widget in HUDWidget:
+            if widget in widgets:
+                self._widget_rects[widget] = self._draw_widget[widget]()
+                if self._widget_rects[widget]:
+                    dirty_rects.append(self._widget_rects[widget])
+
+        self._dirty_widgets.clear()
+        return dirty_rects
 
     def add_bank_money(self, amount: float) -> None:
         self._bank_money += round(amount, 2)
         self._last_saved_money = amount
         self._bank_money_surface = self._render_bank_money_surface()
+        self._dirty_widgets.add(HUDWidget.BANK_MONEY)
+
+    def pay_hitting_fine(self) -> None:
+        """ Retire de la banque l'amende pour avoir frappé un astronaute (la moitié de la dernière course). """
+        self._bank_money -= self._last_saved_money / 2
+        self._bank_money_surface = self._render_bank_money_surface()
+        self._last_saved_money = 0.0
+        self._dirty_widgets.add(HUDWidget.BANK_MONEY)
 
     def get_lives(self) -> int:
         return self._lives
@@ -87,27 +159,66 @@ class HUD:
     def loose_live(self) -> None:
         if self._lives > 0:
             self._lives -= 1
+            self._dirty_widgets.add(HUDWidget.LIVES)
 
     def reset(self) -> None:
         self._bank_money = 0
         self._bank_money_surface = self._render_bank_money_surface()
         self._lives = self._settings.NB_PLAYER_LIVES
+        self._dirty_widgets.update((HUDWidget.BANK_MONEY, HUDWidget.LIVES))
 
     def set_trip_money(self, trip_money: float) -> None:
         if self._trip_money != trip_money:
             self._trip_money = trip_money
             self._trip_money_surface = self._render_trip_money_surface()
+            self._dirty_widgets.add(HUDWidget.TRIP_MONEY)
 
     def set_current_pad(self, pad: str) -> None:
-        with self._lock:
-            self._current_pad = pad
-            self._current_pad_surface = self._render_current_pad_surface()
-            self._text_thread = threading.Thread(target=self._animate_text)
-            self._text_thread.start()
+        self._current_pad = pad
+        self._current_pad_surface = self._render_current_pad_surface()
+        self._dirty_widgets.add(HUDWidget.PAD_MESSAGE)
+        self._animate_text()
 
     def set_current_fuel(self, fuel_status: float) -> None:
         self._fuel_status = fuel_status
-        self._fuel_full_hud = self._render_fuel_hud()
+        visible_width = self._compute_fuel_visible_width()
+        if visible_width != self._fuel_visible_width:
+            self._fuel_visible_width = visible_width
+            self._dirty_widgets.add(HUDWidget.FUEL)
+
+    def _overlay_bounds(self) -> pygame.Rect or None:
+        """ Retourne la plus petite zone contenant tous les widgets affichés (None si aucun). """
+        rects = [rect for rect in self._widget_rects.values() if rect]
+        return rects[0].unionall(rects[1:]) if rects else None
+
+    def _draw_lives(self) -> pygame.Rect or None:
+        spacing = self._lives_icon.get_width() + HUD._LIVES_ICONS_SPACING
+        rects = [self._overlay.blit(self._lives_icon, (self._lives_pos.x + (n * spacing), self._lives_pos.y))
+                 for n in range(self._lives)]
+        return rects[0].unionall(rects[1:]) if rects else None
+
+    def _draw_bank_money(self) -> pygame.Rect:
+        return self._overlay.blit(self._bank_money_surface, (self._bank_money_pos.x, self._bank_money_pos.y))
+
+    def _draw_trip_money(self) -> pygame.Rect:
+        x = self._settings.SCREEN_WIDTH - self._trip_money_surface.get_width() - 20
+        y = self._settings.SCREEN_HEIGHT - self._trip_money_surface.get_height() - 10
+        return self._overlay.blit(self._trip_money_surface, (x, y))
+
+    def _draw_pad_message(self) -> pygame.Rect or None:
+        self._displayed_opacity = self._opacity
+        if not self._current_pad_surface or self._opacity == 0:
+            return None
+        self._current_pad_surface.set_alpha(self._opacity)
+        x = (self._settings.SCREEN_WIDTH - self._current_pad_surface.get_width()) / 2
+        y = self._settings.SCREEN_HEIGHT / 2
+        return self._overlay.blit(self._current_pad_surface, (x, y))
+
+    def _draw_fuel(self) -> pygame.Rect:
+        rect = self._overlay.blit(self._fuel_empty_hud, self._fuel_hud_pos)
+        fuel_area = pygame.Rect(0, 0, self._fuel_visible_width, self._fuel_full_hud.get_height())
+        self._overlay.blit(self._fuel_full_hud, self._fuel_hud_pos, fuel_area)
+        return rect.union(self._overlay.blit(self._fuel_message_surface, self._fuel_message_pos))
 
     def _render_bank_money_surface(self) -> pygame.Surface:
         money_str = f"{self._bank_money:.2f}"
@@ -125,31 +236,36 @@ class HUD:
         message_str = f"Fuel"
         return self._fuel_font.render(f"{message_str}", True, (255, 255, 255))
 
-    def _render_fuel_hud(self) -> pygame.Surface:
-        fuel_used = self._fuel_status / 100
-        visible_width = int(self._fuel_full_hud.get_width() * fuel_used)
-
-        self._fuel_full_hud.lock()
-        for x in range(self._fuel_full_hud.get_width()):
-            for y in range(self._fuel_full_hud.get_height()):
-                r, g, b, a = self._fuel_full_hud.get_at((x, y))
-                if x > visible_width or (r, g, b) == (0, 0, 0):
-                    self._fuel_full_hud.set_at((x, y), (r, g, b, 0))
-                elif x < visible_width:
-                    self._fuel_full_hud.set_at((x, y), (r, g, b, 255))
-        self._fuel_full_hud.unlock()
-
-        return self._fuel_full_hud
+    def _compute_fuel_visible_width(self) -> int:
+        """
+        Calcule la largeur de la jauge pleine à afficher pour le niveau d'essence courant. La jauge
+        est ensuite affichée en une seule opération, en ne copiant que cette partie de l'image.
+        :return: la largeur visible, en pixels
+        """
+        fuel_used = max(0.0, min(1.0, self._fuel_status / 100))
+        return int(self._fuel_full_hud.get_width() * fuel_used)
+
+    @staticmethod
+    def _build_fuel_gauge(gauge: pygame.Surface) -> pygame.Surface:
+        """
+        Prépare (une seule fois, au chargement) l'image de la jauge pleine : les pixels noirs deviennent
+        transparents et les autres, opaques.
+        :param gauge: l'image de la jauge pleine telle que chargée
+        :return: une nouvelle surface, l'image fournie n'est pas modifiée
+        """
+        gauge = gauge.copy()
+        gauge.lock()
+        for x in range(gauge.get_width()):
+            for y in range(gauge.get_height()):
+                r, g, b, a = gauge.get_at((x, y))
+                gauge.set_at((x, y), (r, g, b, 0 if (r, g, b) == (0, 0, 0) else 255))
+        gauge.unlock()
+        return gauge
 
     def _animate_text(self) -> None:
-        for alpha in range(0, 256, 10):
-            self._opacity = alpha
-            time.sleep(0.01)
-
-        time.sleep(1.75)
-
-        for alpha in range(255, -1, -5):
-            self._opacity = alpha
-            time.sleep(0.01)
-
-        self._animating = False
+        """ Fait apparaître, puis disparaître graduellement le message de destination. """
+        scheduler = TweenScheduler()
+        scheduler.cancel(self, '_opacity')
+        scheduler.add(Tween(self, '_opacity', 0, 255, HUD._PAD_MESSAGE_FADE_IN))
+        scheduler.add(Tween(self, '_opacity', 255, 0, HUD._PAD_MESSAGE_FADE_OUT,
+                            delay=HUD._PAD_MESSAGE_FADE_IN + HUD._PAD_MESSAGE_DISPLAY))
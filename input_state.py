@@ -0,0 +1,165 @@
+import pygame
+
+
+class InputState:
+    """
+    État des commandes (clavier et manette) à un pas de simulation. Immuable : une fois lu, il ne change plus,
+    peu importe les événements qui surviennent ensuite.
+
+    Les touches et boutons « enfoncés » le sont présentement ; les touches et boutons « pressés » ont été enfoncés
+    depuis le pas précédent (fronts), ce qui sert aux actions ponctuelles comme sortir le train d'atterrissage.
+    """
+
+    START_KEYS = (pygame.K_RETURN, pygame.K_SPACE)
+    START_BUTTON = 9
+
+    __slots__ = ('_keys', '_pressed_keys', '_buttons', '_pressed_buttons', '_axes')
+
+    def __init__(self, keys: frozenset = frozenset(), pressed_keys: frozenset = frozenset(),
+                 buttons: frozenset = frozenset(), pressed_buttons: frozenset = frozenset(), axes: tuple = ()) -> None:
+        """
+        Initialise un état des commandes (sans argument : aucune commande).
+        :param keys: les touches enfoncées
+        :param pressed_keys: les touches enfoncées depuis le pas précédent
+        :param buttons: les boutons de la manette enfoncés
+        :param pressed_buttons: les boutons de la manette enfoncés depuis le pas précédent
+        :param axes: la position des axes de la manette (de -1 à 1)
+        """
+        object.__setattr__(self, '_keys', frozenset(keys))
+        object.__setattr__(self, '_pressed_keys', frozenset(pressed_keys))
+        object.__setattr__(self, '_buttons', frozenset(buttons))
+        object.__setattr__(self, '_pressed_buttons', frozenset(pressed_buttons))
+        object.__setattr__(self, '_axes', tuple(axes))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("InputState est immuable")
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, InputState) and all(getattr(self, slot) == getattr(other, slot)
+                                                     for slot in InputState.__slots__)
+
+    def __hash__(self) -> int:
+        return hash(tuple(getattr(self, slot) for slot in InputState.__slots__))
+
+    @property
+    def keys(self) -> frozenset:
+        return self._keys
+
+    @property
+    def pressed_keys(self) -> frozenset:
+        return self._pressed_keys
+
+    @property
+    def buttons(self) -> frozenset:
+        return self._buttons
+
+    @property
+    def pressed_buttons(self) -> frozenset:
+        return self._pressed_buttons
+
+    @property
+    def axes(self) -> tuple:
+        return self._axes
+
+    def is_key_held(self, key: int) -> bool:
+        return key in self._keys
+
+    def is_any_key_held(self) -> bool:
+        return bool(self._keys)
+
+    def was_key_pressed(self, key: int) -> bool:
+        return key in self._pressed_keys
+
+    def was_button_pressed(self, button: int) -> bool:
+        return button in self._pressed_buttons
+
+    def axis(self, number: int) -> float:
+        """ Retourne la position d'un axe de la manette (0 si l'axe, ou la manette, n'existe pas). """
+        return self._axes[number] if number < len(self._axes) else 0.0
+
+    def was_start_pressed(self) -> bool:
+        """ Indique si le joueur a demandé de commencer ou de recommencer (Retour, Espace ou bouton Start). """
+        return any(key in self._pressed_keys for key in InputState.START_KEYS) or \
+            InputState.START_BUTTON in self._pressed_buttons
+
+
+class InputManager:
+    """
+    Singleton qui tient à jour l'état du clavier et des manettes à partir des événements PyGame (y compris le
+    branchement et le débranchement des manettes), puis en tire un InputState à chaque pas de simulation (poll()).
+
+    Une source peut remplacer les périphériques (set_source()) : le jeu est alors piloté par cette source, par
+    exemple en mode sans affichage ou pour rejouer une partie.
+    """
+
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super(InputManager, cls).__new__(cls, *args, **kwargs)
+        return cls._instance
+
+    def __init__(self) -> None:
+        if not hasattr(self, '_initialized'):
+            self._joysticks = {}  # identifiant d'instance -> pygame.joystick.Joystick
+            self._keys = set()
+            self._pressed_keys = set()
+            self._buttons = set()
+            self._pressed_buttons = set()
+            self._source = None
+            self._state = InputState()
+
+            self._initialized = True
+
+    @staticmethod
+    def is_start_event(event: pygame.event.Event) -> bool:
+        """ Indique si un événement demande de commencer ou de recommencer (Retour, Espace ou bouton Start). """
+        return (event.type == pygame.KEYDOWN and event.key in InputState.START_KEYS) or \
+            (event.type == pygame.JOYBUTTONDOWN and event.button == InputState.START_BUTTON)
+
+    def handle_event(self, event: pygame.event.Event) -> None:
+        """ Tient compte d'un événement PyGame (à appeler pour chaque événement, avant les scènes). """
+        if event.type == pygame.KEYDOWN:
+            self._keys.add(event.key)
+            self._pressed_keys.add(event.key)
+        elif event.type == pygame.KEYUP:
+            self._keys.discard(event.key)
+        elif event.type == pygame.JOYBUTTONDOWN:
+            self._buttons.add(event.button)
+            self._pressed_buttons.add(event.button)
+        elif event.type == pygame.JOYBUTTONUP:
+            self._buttons.discard(event.button)
+        elif event.type == pygame.JOYDEVICEADDED:
+            joystick = pygame.joystick.Joystick(event.device_index)
+            self._joysticks[joystick.get_instance_id()] = joystick
+        elif event.type == pygame.JOYDEVICEREMOVED:
+            self._joysticks.pop(event.instance_id, None)
+            if not self._joysticks:
+                self._buttons.clear()
+
+    def set_source(self, source) -> None:
+        """
+        Remplace (ou rétablit) les périphériques comme source des commandes.
+        :param source: une fonction sans argument qui retourne l'InputState de chaque pas, ou None pour revenir
+                       au clavier et aux manettes
+        """
+        self._source = source
+
+    def poll(self) -> InputState:
+        """
+        Lit l'état des commandes pour le prochain pas de simulation (une seule fois par pas).
+        :return: l'état des commandes, aussi retourné ensuite par state()
+        """
+        if self._source:
+            self._state = self._source()
+        else:
+            gamepad = self._joysticks[min(self._joysticks)] if self._joysticks else None
+            axes = tuple(gamepad.get_axis(axis) for axis in range(gamepad.get_numaxes())) if gamepad else ()
+            self._state = InputState(self._keys, self._pressed_keys, self._buttons, self._pressed_buttons, axes)
+        self._pressed_keys.clear()
+        self._pressed_buttons.clear()
+        return self._state
+
+    def state(self) -> InputState:
+        """ Retourne l'état des commandes du pas de simulation en cours. """
+        return self._state
@@ -0,0 +1,290 @@
+"""
+  Compile un niveau (levels/levelN.cfg et les images qu'il utilise) en un fichier binaire compact, placé dans
+  GameSettings.CACHE_DIRECTORY : positions résolues, masques de collision (1 bit par pixel), étendue des
+  plateformes, courses des astronautes et leur distance. Le fichier est recompilé automatiquement lorsque la
+  configuration ou l'une des images change (date de modification ou taille différente).
+
+      python level_compiler.py [numéro de niveau...]     # sans numéro : tous les niveaux de levels/
+"""
+import configparser
+import glob
+import os
+import struct
+import sys
+from math import sqrt
+
+import pygame
+
+from game_settings import GameSettings, Files
+from pad import Pad
+from tracing import traced
+
+_MAGIC = b"STLV"
+_VERSION = 1
+
+# table de conversion : un octet du masque compacté -> 8 pixels RGBA (opaques ou transparents)
+_BYTE_TO_PIXELS = [b"".join(b"\xff\xff\xff\xff" if byte & (0x80 >> bit) else b"\x00\x00\x00\x00" for bit in range(8))
+                   for byte in range(256)]
+_ALPHA_TO_BIT = bytes(ord("0") if alpha == 0 else ord("1") for alpha in range(256))
+
+
+class PackedMask:
+    """ Masque de collision compacté (1 bit par pixel, chaque rangée complétée à un nombre entier d'octets). """
+
+    def __init__(self, size: tuple, data: bytes) -> None:
+        self.size = size
+        self.data = data
+
+    @staticmethod
+    def pack(mask: pygame.mask.Mask) -> 'PackedMask':
+        width, height = mask.get_size()
+        row_bytes = (width + 7) // 8
+        alpha = pygame.image.tobytes(mask.to_surface(setcolor=(255, 255, 255, 255), unsetcolor=(0, 0, 0, 0)),
+                                     "RGBA")[3::4]
+        rows = []
+        for y in range(height):
+            bits = alpha[y * width:(y + 1) * width].translate(_ALPHA_TO_BIT).ljust(row_bytes * 8, b"0")
+            rows.append(int(bits, 2).to_bytes(row_bytes, "big") if row_bytes else b"")
+        return PackedMask((width, height), b"".join(rows))
+
+    def unpack(self) -> pygame.mask.Mask:
+        width, height = self.size
+        padded_width = (width + 7) // 8 * 8
+        pixels = b"".join(_BYTE_TO_PIXELS[byte] for byte in self.data)
+        surface = pygame.image.frombuffer(pixels, (padded_width, height), "RGBA")
+        return pygame.mask.from_surface(surface.subsurface((0, 0, width, height)))
+
+
+class CompiledLevel:
+    """ Un niveau compilé : tout ce qu'il faut pour construire un LevelScene, sans analyse de texte ni d'image. """
+
+    def __init__(self) -> None:
+        self.sources = {}  # fichier -> (date de modification en ns, taille)
+        self.masks = {}  # image -> PackedMask
+        self.pad_extents = {}  # image de plateforme -> étendue (voir Pad.compute_extents)
+        self.gate = (0, 0)  # position de la barrière
+        self.obstacles = []  # (image, x, y)
+        self.pumps = []  # (x, y)
+        self.pads = []  # (numéro, image, x, y, départ des astronautes, arrivée des astronautes)
+        self.astronauts = []  # (plateforme de départ, plateforme d'arrivée ou None pour UP, distance)
+
+    def images(self) -> list:
+        """ Retourne la liste des images utilisées par le niveau (hors image de fond). """
+        images = [GameSettings.FILE_NAMES[Files.IMG_GATE]]
+        images.extend(image for image, _, _ in self.obstacles)
+        if self.pumps:
+            images.append(GameSettings.FILE_NAMES[Files.IMG_PUMP])
+        images.extend(pad[1] for pad in self.pads)
+        return list(dict.fromkeys(images))
+
+    def is_up_to_date(self) -> bool:
+        """ Indique si aucun des fichiers sources n'a changé depuis la compilation. """
+        try:
+            return all(_signature(filename) == signature for filename, signature in self.sources.items())
+        except OSError:
+            return False
+
+
+def level_filename(level: int) -> str:
+    return GameSettings.FILE_NAMES[Files.CFG_LEVEL].replace("#", str(level))
+
+
+def available_levels() -> list:
+    """ Retourne, en ordre, les numéros des niveaux dont le fichier de configuration existe (levels/levelN.cfg). """
+    prefix, suffix = GameSettings.FILE_NAMES[Files.CFG_LEVEL].split("#")
+    numbers = (filename[len(prefix):len(filename) - len(suffix)] for filename in glob.glob(f"{prefix}*{suffix}"))
+    return sorted(int(number) for number in numbers if number.isdigit())
+
+
+def compiled_filename(level: int) -> str:
+    return os.path.join(GameSettings.CACHE_DIRECTORY, f"level{level}.bin")
+
+
+@traced(category="asset")
+def load_level(level: int) -> CompiledLevel:
+    """
+    Charge un niveau compilé, en le (re)compilant au besoin.
+    :param level: le numéro de niveau
+    :return: le niveau compilé
+    """
+    try:
+        with open(compiled_filename(level), "rb") as compiled_file:
+            compiled_level = _read(compiled_file.read())
+        if compiled_level.is_up_to_date():
+            return compiled_level
+    except (OSError, ValueError, struct.error):
+        pass
+
+    compiled_level = compile_level(level)
+    try:
+        os.makedirs(GameSettings.CACHE_DIRECTORY, exist_ok=True)
+        with open(compiled_filename(level), "wb") as compiled_file:
+            compiled_file.write(_write(compiled_level))
+    except OSError:
+        pass  # sans cache, le niveau sera simplement recompilé la prochaine fois
+    return compiled_level
+
+
+@traced(category="asset")
+def compile_level(level: int) -> CompiledLevel:
+    """
+    Compile un niveau à partir de son fichier de configuration et de ses images (n'utilise pas l'affichage :
+    peut être appelée depuis un autre fil d'exécution).
+    :param level: le numéro de niveau
+    :return: le niveau compilé
+    """
+    config_filename = level_filename(level)
+    config = configparser.ConfigParser()
+    with open(config_filename) as config_file:  # FileNotFoundError si le niveau n'existe pas
+        config.read_file(config_file)
+
+    compiled_level = CompiledLevel()
+    compiled_level.sources[config_filename] = _signature(config_filename)
+
+    x, y = config.get("gate", "gate").split(",")
+    compiled_level.gate = (int(x), int(y))
+
+    for key in config["obstacles"]:
+        obstacle_num, x, y = config.get("obstacles", key).split(", ")
+        compiled_level.obstacles.append((GameSettings.FILE_NAMES[Files.IMG_OBSTACLES][int(obstacle_num) - 1],
+                                         int(x), int(y)))
+
+    for key in config["pumps"]:
+        x, y = config.get("pumps", key).split(", ")
+        compiled_level.pumps.append((int(x), int(y)))
+
+    for key in config["pads"]:
+        pad_num, x, y, start_x, end_x = config.get("pads", key).split(", ")
+        compiled_level.pads.append((int(key[3:]), GameSettings.FILE_NAMES[Files.IMG_PADS][int(pad_num) - 1],
+                                    int(x), int(y), int(start_x), int(end_x)))
+
+    pad_images = [pad[1] for pad in compiled_level.pads]
+    for image_filename in compiled_level.images():
+        image = pygame.image.load(image_filename)
+        mask = pygame.mask.from_surface(image)
+        compiled_level.sources[image_filename] = _signature(image_filename)
+        compiled_level.masks[image_filename] = PackedMask.pack(mask)
+        if image_filename in pad_images:
+            compiled_level.pad_extents[image_filename] = Pad.compute_extents(image, mask)
+
+    for key in config["astronauts"]:
+        source_pad, target_pad = config.get("astronauts", key).split(", ")
+        source = compiled_level.pads[int(source_pad) - 1]
+        start = (source[2] + source[4], source[3] - Pad._ASTRONAUT_OFFSET_Y)
+        try:
+            target_pad = int(target_pad)
+            target = compiled_level.pads[target_pad - 1]
+            end = (target[2] + target[5], target[3] - Pad._ASTRONAUT_OFFSET_Y)
+        except ValueError:  # "up" : vers la barrière
+            target_pad = None
+            end = compiled_level.gate
+        distance = sqrt((end[0] - start[0]) ** 2 + (end[1] - start[1]) ** 2)
+        compiled_level.astronauts.append((int(source_pad), target_pad, distance))
+
+    return compiled_level
+
+
+def _signature(filename: str) -> tuple:
+    stat = os.stat(filename)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _write(compiled_level: CompiledLevel) -> bytes:
+    """ Sérialise un niveau compilé (entiers petit-boutistes, chaînes UTF-8 précédées de leur longueur). """
+    strings = list(dict.fromkeys(list(compiled_level.sources) + list(compiled_level.masks)))
+    index = {string: i for i, string in enumerate(strings)}
+
+    chunks = [struct.pack("<4sHH", _MAGIC, _VERSION, len(strings))]
+    for string in strings:
+        encoded = string.encode("utf-8")
+        chunks.append(struct.pack("<H", len(encoded)) + encoded)
+
+    chunks.append(struct.pack("<H", len(compiled_level.sources)))
+    for filename, (mtime, size) in compiled_level.sources.items():
+        chunks.append(struct.pack("<Hqq", index[filename], mtime, size))
+
+    chunks.append(struct.pack("<H", len(compiled_level.masks)))
+    for filename, packed_mask in compiled_level.masks.items():
+        extents = compiled_level.pad_extents.get(filename, (-1, -1, -1, -1))
+        chunks.append(struct.pack("<HHHI4h", index[filename], *packed_mask.size, len(packed_mask.data), *extents))
+        chunks.append(packed_mask.data)
+
+    chunks.append(struct.pack("<2h", *compiled_level.gate))
+
+    chunks.append(struct.pack("<H", len(compiled_level.obstacles)))
+    for image, x, y in compiled_level.obstacles:
+        chunks.append(struct.pack("<H2h", index[image], x, y))
+
+    chunks.append(struct.pack("<H", len(compiled_level.pumps)))
+    for x, y in compiled_level.pumps:
+        chunks.append(struct.pack("<2h", x, y))
+
+    chunks.append(struct.pack("<H", len(compiled_level.pads)))
+    for number, image, x, y, start_x, end_x in compiled_level.pads:
+        chunks.append(struct.pack("<HH4h", number, index[image], x, y, start_x, end_x))
+
+    chunks.append(struct.pack("<H", len(compiled_level.astronauts)))
+    for source_pad, target_pad, distance in compiled_level.astronauts:
+        chunks.append(struct.pack("<HHd", source_pad, target_pad or 0, distance))
+
+    return b"".join(chunks)
+
+
+def _read(data: bytes) -> CompiledLevel:
+    """ Désérialise un niveau compilé par _write() (ValueError si le fichier n'est pas reconnu). """
+    magic, version, nb_strings = struct.unpack_from("<4sHH", data)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError("format de niveau compilé inconnu")
+    offset = struct.calcsize("<4sHH")
+
+    def unpack(fmt: str) -> tuple:
+        nonlocal offset
+        values = struct.unpack_from(fmt, data, offset)
+        offset += struct.calcsize(fmt)
+        return values
+
+    strings = []
+    for _ in range(nb_strings):
+        length, = unpack("<H")
+        strings.append(data[offset:offset + length].decode("utf-8"))
+        offset += length
+
+    compiled_level = CompiledLevel()
+    for _ in range(unpack("<H")[0]):
+        string, mtime, size = unpack("<Hqq")
+        compiled_level.sources[strings[string]] = (mtime, size)
+
+    for _ in range(unpack("<H")[0]):
+        string, width, height, length, *extents = unpack("<HHHI4h")
+        compiled_level.masks[strings[string]] = PackedMask((width, height), data[offset:offset + length])
+        offset += length
+        if extents[0] >= 0:
+            compiled_level.pad_extents[strings[string]] = tuple(extents)
+
+    compiled_level.gate = unpack("<2h")
+
+    for _ in range(unpack("<H")[0]):
+        string, x, y = unpack("<H2h")
+        compiled_level.obstacles.append((strings[string], x, y))
+
+    for _ in range(unpack("<H")[0]):
+        compiled_level.pumps.append(unpack("<2h"))
+
+    for _ in range(unpack("<H")[0]):
+        number, string, x, y, start_x, end_x = unpack("<HH4h")
+        compiled_level.pads.append((number, strings[string], x, y, start_x, end_x))
+
+    for _ in range(unpack("<H")[0]):
+        source_pad, target_pad, distance = unpack("<HHd")
+        compiled_level.astronauts.append((source_pad, target_pad or None, distance))
+
+    return compiled_level
+
+
+if __name__ == "__main__":
+    for level in [int(argument) for argument in sys.argv[1:]] or available_levels():
+        compiled = compile_level(level)
+        os.makedirs(GameSettings.CACHE_DIRECTORY, exist_ok=True)
+        with open(compiled_filename(level), "wb") as output_file:
+            output_file.write(_write(compiled))
+        print(f"niveau {level} compilé : {compiled_filename(level)}")
@@ -0,0 +1,74 @@
+import threading
+
+from asset_prefetcher import AssetPrefetcher
+from level_compiler import load_level
+from level_scene import LevelScene
+from tracing import traced
+
+
+class LevelLoader:
+    """
+    Construit un niveau en arrière-plan, en deux phases :
+        - un fil d'exécution secondaire charge le niveau compilé (voir level_compiler.py), puis lit et décode les fichiers du niveau qui ne sont
+          pas encore en cache (voir asset_prefetcher.py) ;
+        - le fil principal termine le travail (finalize()) : mise en cache des ressources décodées, puis
+          construction du LevelScene, dont toutes les ressources sont alors en cache.
+    Pendant ce temps, la scène de chargement continue de s'animer et affiche la progression.
+    """
+
+    def __init__(self, level: int) -> None:
+        """
+        Initialise le chargeur (le chargement ne débute qu'à l'appel de start()).
+        :param level: le numéro de niveau
+        """
+        self._level = level
+        self._compiled_level = None
+        self._assets = None
+        self._error = None
+        self._finalized = False
+
+        self._decoded = threading.Event()
+        self._thread = threading.Thread(target=self._decode, name=f"level{level}_loader", daemon=True)
+
+    def start(self) -> None:
+        """ Démarre la phase de lecture et de décodage, en arrière-plan. """
+        self._thread.start()
+
+    def progress(self) -> float:
+        """ Retourne la progression du chargement, de 0 (début) à 1 (niveau construit). """
+        if self._finalized:
+            return 1.0
+        if self._assets is None:
+            return 0.0
+        return self._assets.nb_steps_done() / (self._assets.nb_steps() + 1)  # + 1 : finalize(), dans le fil principal
+
+    def is_decoded(self) -> bool:
+        """ Indique si la phase d'arrière-plan est terminée (finalize() peut alors être appelée). """
+        return self._decoded.is_set()
+
+    @traced(category="asset")
+    def finalize(self) -> LevelScene:
+        """
+        Termine le chargement dans le fil principal et construit le niveau.
+        :return: le niveau
+        """
+        self._thread.join()
+        if self._error:
+            raise self._error
+
+        self._assets.commit()
+        level_scene = LevelScene(self._level, self._compiled_level)
+        self._finalized = True
+        return level_scene
+
+    @traced(category="asset")
+    def _decode(self) -> None:
+        """ Phase d'arrière-plan : aucun appel à l'affichage ni au mixer (réservés au fil principal). """
+        try:
+            self._compiled_level = load_level(self._level)
+            self._assets = AssetPrefetcher(*LevelScene.required_files(self._compiled_level))
+            self._assets.decode()
+        except Exception as e:  # relancée dans le fil principal, par finalize()
+            self._error = e
+        finally:
+            self._decoded.set()
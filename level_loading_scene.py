@@ -3,58 +3,63 @@ import random
 import pygame
 from pygame import Vector2
 
-from level_scene import LevelScene
+from level_loader import LevelLoader
 from fatal_error import FatalError
+from game_clock import GameClock
+from input_state import InputManager
 from scene import Scene
 from scene_manager import SceneManager
 from game_settings import GameSettings, Files
+from resources import ResourceManager
 from star import Star
 from taxi import Taxi
+from tracing import traced
 
 
 class LevelLoadingScene(Scene):
     """ Scène de chargement d'un niveau. """
 
     _FADE_OUT_DURATION: int = 500  # ms
+    _PROGRESS_BAR_SIZE = (300, 6)
+    _PROGRESS_BAR_COLOR = (255, 255, 255)
+    _TEXT_FONT_SIZE = 24
 
+    @traced(category="scene")
     def __init__(self, level: int) -> None:
         super().__init__()
         self._settings = GameSettings()
-        self._text_font = pygame.font.Font(GameSettings.FILE_NAMES[Files.FONT], 24)
+        self._text_font = ResourceManager().font(Files.FONT, LevelLoadingScene._TEXT_FONT_SIZE)
 
         self._level = level
         self._music_started = False
         self._fade_out_start_time = None
-        self._scene_in_use = False
+        self._loader = None
+        self._level_ready = False
+        self._leave_requested = False  # le joueur a demandé à passer, mais le niveau n'est pas encore prêt
 
         try:
-            self._surface = pygame.image.load(GameSettings.FILE_NAMES[Files.IMG_LOADING]).convert_alpha()
-            self._taxi_surface = pygame.image.load(GameSettings.FILE_NAMES[Files.IMG_TAXIS]).convert_alpha()
+            # copie : la transparence de la surface de la scène est modifiée par les fondus
+            self._surface = ResourceManager().image(Files.IMG_LOADING).copy()
+            self._taxi_surface = ResourceManager().frames(Files.IMG_TAXIS, Taxi._NB_TAXI_IMAGES)[0]
             self._level_name_pos = Vector2(
                 (self._settings.SCREEN_WIDTH - self._render_level_message_surface().get_width()) / 2,
                 (self._settings.SCREEN_HEIGHT - self._render_level_message_surface().get_height()) / 2,
             )
-            self._music = pygame.mixer.Sound(GameSettings.FILE_NAMES[Files.SND_MUSIC_LOADING])
+            self._music = ResourceManager().sound(Files.SND_MUSIC_LOADING)
         except FileNotFoundError as e:
             directory_plus_filename = str(e).split("'")[1]
             filename = directory_plus_filename.split("/")[-1]
             fatal_error_app = FatalError()
             fatal_error_app.run(filename)
 
-        pygame.joystick.init()
-        if pygame.joystick.get_count() > 0:
-            self.joystick = pygame.joystick.Joystick(0)
-            self.joystick.init()
-        else:
-            self.joystick = None
         self._stars = [
             Star(angle, Vector2(self._settings.SCREEN_WIDTH / 2, self._settings.SCREEN_HEIGHT / 2))
             for angle in [0, 90, 180, 270, 45, 135, 225, 315]
         ]
         self._taxi_width = self._taxi_surface.get_width()
         self._taxi_height = self._taxi_surface.get_height()
-        self._taxi_sprite = self._taxi_surface.subsurface((0, 0, self._taxi_width / Taxi._NB_TAXI_IMAGES, self._taxi_height))
-        self._taxi_position = Vector2((self._settings.SCREEN_WIDTH - (self._taxi_width / Taxi._NB_TAXI_IMAGES) - 25) / 2,
+        self._taxi_sprite = self._taxi_surface
+        self._taxi_position = Vector2((self._settings.SCREEN_WIDTH - self._taxi_width - 25) / 2,
                                       self._settings.SCREEN_HEIGHT)
         self._vertical_speed = 1
         self._horizontal_speed = 2
@@ -63,29 +68,48 @@ class LevelLoadingScene(Scene):
         self._distance_traveled = 0
         self._first_segment = True
 
-    def handle_event(self, event: pygame.event.Event) -> None:
-        if event.type in (pygame.KEYDOWN, pygame.JOYBUTTONDOWN):
-            is_key_event = (event.type == pygame.KEYDOWN and event.key in (pygame.K_RETURN, pygame.K_SPACE))
-            is_joy_event = (event.type == pygame.JOYBUTTONDOWN and pygame.joystick.Joystick(0).get_button(9))
+    @staticmethod
+    def required_files() -> tuple:
+        """
+        Dresse la liste des fichiers utilisés par la scène (pour les charger à l'avance, voir SceneManager.prefetch()).
+        :return: un tuple contenant la liste des images, celle des feuilles de sprites et celle des sons
+        """
+        return [Files.IMG_LOADING], [(Files.IMG_TAXIS, Taxi._NB_TAXI_IMAGES)], [Files.SND_MUSIC_LOADING]
 
-            if is_key_event or is_joy_event:
-                self._fade_out_start_time = pygame.time.get_ticks()
-                SceneManager().change_scene(f"level{self._level}", LevelLoadingScene._FADE_OUT_DURATION)
+    def handle_event(self, event: pygame.event.Event) -> None:
+        if InputManager.is_start_event(event):
+            self._leave_requested = True
 
     def update(self) -> None:
-        if not self._scene_in_use:
-            SceneManager().add_scene(f"level{self._level}", LevelScene(self._level))
-            self._scene_in_use = True
+        if self._loader is None:
+            self._loader = LevelLoader(self._level)
+            self._loader.start()
+        elif not self._level_ready and self._loader.is_decoded():
+            try:
+                SceneManager().add_scene(f"level{self._level}", self._loader.finalize())
+            except FileNotFoundError as e:
+                directory_plus_filename = str(e).split("'")[1]
+                filename = directory_plus_filename.split("/")[-1]
+                fatal_error_app = FatalError()
+                fatal_error_app.run(filename)
+            self._level_ready = True
+
+        if self._leave_requested and self._level_ready:
+            self._leave_requested = False
+            self._fade_out_start_time = GameClock().get_ticks()
+            SceneManager().change_scene(f"level{self._level}", LevelLoadingScene._FADE_OUT_DURATION)
 
         if not self._music_started:
+            self._music.set_volume(1.0)  # le son est partagé : un chargement précédent a pu le laisser muet
             self._music.play()
             self._music_started = True
 
         if self._fade_out_start_time:
-            elapsed_time = pygame.time.get_ticks() - self._fade_out_start_time
+            elapsed_time = GameClock().get_ticks() - self._fade_out_start_time
             volume = max(0.0, 1.0 - (elapsed_time / LevelLoadingScene._FADE_OUT_DURATION))
             self._music.set_volume(volume)
             if volume == 0:
+                self._music.stop()
                 self._fade_out_start_time = None
 
         for star in self._stars:
@@ -103,10 +127,8 @@ class LevelLoadingScene(Scene):
                 self._distance_traveled = 0
                 self._first_segment = False
 
-                self._taxi_sprite = pygame.transform.flip(
-                    self._taxi_surface.subsurface((0, 0, self._taxi_width / Taxi._NB_TAXI_IMAGES, self._taxi_height)),
-                    self._direction_taxi == -1, False)
-        else:
+                self._taxi_sprite = pygame.transform.flip(self._taxi_surface, self._direction_taxi == -1, False)
+        elif self._level_ready:
             SceneManager().change_scene(f"level{self._level}", LevelLoadingScene._FADE_OUT_DURATION)
 
     def render(self, screen: pygame.Surface) -> None:
@@ -118,9 +140,29 @@ class LevelLoadingScene(Scene):
         for star in self._stars:
             star.draw(screen)
 
+        if not self._level_ready:
+            self._render_progress_bar(screen)
+
     def surface(self) -> pygame.Surface:
         return self._surface
 
+    def release(self) -> None:
+        resources = ResourceManager()
+        resources.release('font', Files.FONT, LevelLoadingScene._TEXT_FONT_SIZE)
+        resources.release('image', Files.IMG_LOADING)
+        resources.release('frames', Files.IMG_TAXIS, Taxi._NB_TAXI_IMAGES)
+        resources.release('sound', Files.SND_MUSIC_LOADING)
+
+    def _render_progress_bar(self, screen: pygame.Surface) -> None:
+        """ Affiche, sous le nom du niveau, la progression de son chargement. """
+        width, height = LevelLoadingScene._PROGRESS_BAR_SIZE
+        progress = self._loader.progress() if self._loader else 0.0
+        bar = pygame.Rect(0, 0, width, height)
+        bar.midtop = (self._settings.SCREEN_WIDTH / 2,
+                      self._level_name_pos.y + self._render_level_message_surface().get_height() + 10)
+        pygame.draw.rect(screen, LevelLoadingScene._PROGRESS_BAR_COLOR, bar, 1)
+        pygame.draw.rect(screen, LevelLoadingScene._PROGRESS_BAR_COLOR, (bar.x, bar.y, round(width * progress), height))
+
     def _render_level_message_surface(self) -> pygame.Surface:
         message_str = f"Level 1"
         return self._text_font.render(f"{message_str}", True, (255, 255, 255))
\ No newline at end of file
@@ -1,21 +1,26 @@
 import os.path
 
 import pygame
-import time
-import configparser
 
 import pad
 from astronaut import Astronaut
+from collision_world import CollisionWorld
 from game_settings import GameSettings, Files
 from fatal_error import FatalError
+from game_clock import GameClock
 from gate import Gate
 from hud import HUD
+from input_state import InputManager
+from level_compiler import CompiledLevel, load_level
 from obstacle import Obstacle
 from pad import Pad
 from pump import Pump
 from scene import Scene
 from scene_manager import SceneManager
+from spatial_grid import SpatialGrid
+from resources import ResourceManager
 from taxi import Taxi
+from tracing import Tracer, traced
 
 
 class LevelScene(Scene):
@@ -24,14 +29,17 @@ class LevelScene(Scene):
     _FADE_OUT_DURATION: int = 500  # ms
     _TIME_BETWEEN_ASTRONAUTS: int = 5  # s
 
-    def __init__(self, level: int) -> None:
+    @traced(category="scene")
+    def __init__(self, level: int, compiled_level: CompiledLevel = None) -> None:
         """
         Initialise une instance de niveau de jeu.
         :param level: le numéro de niveau
+        :param compiled_level: le niveau compilé, s'il a déjà été chargé (voir level_loader.py)
         """
         super().__init__()
         self._level = level
         self._surface = None
+        self._static_layer = None
         self._music = None
         self._music_started = False
         self._fade_out_start_time = None
@@ -42,58 +50,51 @@ class LevelScene(Scene):
         self._obstacles = None
         self._pumps = None
         self._pads = None
-        self._last_taxied_astronaut_time = time.time()
+        self._pad_grid = None
+        self._pump_grid = None
+        self._collision_world = None
+        self._last_taxied_astronaut_time = GameClock().time()
         self._astronauts = []
 
-        self._jingle_sound_effect = pygame.mixer.Sound(GameSettings.FILE_NAMES[Files.SND_JINGLE])
+        self._full_redraw = True
+        self._previous_rects = []
+        self._dirty_rects = None
+
+        self._jingle_sound_effect = ResourceManager().sound(Files.SND_JINGLE)
         self._is_jingle_sound_on = True
         self._jingle_begin_time = 0
         self._is_first_update_valid = False
-        pygame.joystick.init()
-        if pygame.joystick.get_count() > 0:
-            self.joystick = pygame.joystick.Joystick(0)
-            self.joystick.init()
-        else:
-            self.joystick = None
 
         try:
-            self.config = configparser.ConfigParser()
-            self.config.read(GameSettings.FILE_NAMES[Files.CFG_LEVEL].replace("#", str(self._level)))
+            self._compiled_level = compiled_level if compiled_level else load_level(self._level)
+            self._install_compiled_data()
 
-            self._surface = pygame.image.load(GameSettings.FILE_NAMES[Files.IMG_LEVEL]).convert_alpha()
-            self._music = pygame.mixer.Sound(GameSettings.FILE_NAMES[Files.SND_MUSIC_LEVEL])
+            self._surface = ResourceManager().image(Files.IMG_LEVEL)
+            self._music = ResourceManager().sound(Files.SND_MUSIC_LEVEL)
 
             self._settings = GameSettings()
             self._hud = HUD()
 
             self._taxi = Taxi((self._settings.SCREEN_WIDTH / 2, self._settings.SCREEN_HEIGHT / 2))
 
-            gate_path = self.config.get("gate", "gate")
-            gate_data = gate_path.split(",")
-            x, y = map(int, gate_data[:])
-            self._gate = Gate(GameSettings.FILE_NAMES[Files.IMG_GATE], (x, y))
+            self._gate = Gate(GameSettings.FILE_NAMES[Files.IMG_GATE], self._compiled_level.gate)
 
-            self._obstacles = []
-            for key in self.config["obstacles"]:
-                obstacle_num, x, y = self.config.get("obstacles", key).split(", ")
-                self._obstacles.append(Obstacle(GameSettings.FILE_NAMES[Files.IMG_OBSTACLES][int(obstacle_num) - 1], (int(x), int(y))))
+            self._obstacles = [Obstacle(image, (x, y)) for image, x, y in self._compiled_level.obstacles]
             self._obstacle_sprites = pygame.sprite.Group()
             self._obstacle_sprites.add(self._obstacles)
 
-            self._pumps = []
-            for key in self.config["pumps"]:
-                x, y = self.config.get("pumps", key).split(", ")
-                self._pumps.append(Pump(GameSettings.FILE_NAMES[Files.IMG_PUMP], (int(x), int(y))))
+            self._pumps = [Pump(GameSettings.FILE_NAMES[Files.IMG_PUMP], pos) for pos in self._compiled_level.pumps]
             self._pump_sprites = pygame.sprite.Group()
             self._pump_sprites.add(self._pumps)
 
-            self._pads = []
-            for key in self.config["pads"]:
-                pad_num, x, y, width, height = self.config.get("pads", key).split(", ")
-                self._pads.append(Pad(int(key[3:]), GameSettings.FILE_NAMES[Files.IMG_PADS][int(pad_num) - 1], (int(x), int(y)), int(width), int(height)))
+            self._pads = [Pad(number, image, (x, y), start_x, end_x)
+                          for number, image, x, y, start_x, end_x in self._compiled_level.pads]
             self._pad_sprites = pygame.sprite.Group()
             self._pad_sprites.add(self._pads)
 
+            self._build_collision_data()
+            self._build_static_layer()
+
             Pad.UP = self._gate
             self._reinitialize()
             self._hud.visible = True
@@ -104,38 +105,70 @@ class LevelScene(Scene):
             fatal_error_app = FatalError()
             fatal_error_app.run(filename)
 
-    def _spawn_astronaut(self, start_pad_number, end_pad_number):
-        start_pad = self._pads[int(start_pad_number) - 1]
-        try:
-            end_pad = self._pads[int(end_pad_number) - 1]
-        except ValueError:
-            end_pad = Pad.UP
-        return Astronaut(start_pad, end_pad)
+    @staticmethod
+    def required_files(compiled_level: CompiledLevel) -> tuple:
+        """
+        Dresse la liste des fichiers utilisés par un niveau (pour les charger à l'avance).
+        :param compiled_level: le niveau compilé
+        :return: un tuple contenant dans l'ordre:
+                 - la liste des images
+                 - la liste des feuilles de sprites, en tuples (fichier, nombre d'images)
+                 - la liste des sons
+        """
+        images = [GameSettings.FILE_NAMES[Files.IMG_LEVEL]] + compiled_level.images()
+
+        sprite_sheets = [(Taxi._TAXIS_FILENAME, Taxi._NB_TAXI_IMAGES),
+                         (Astronaut._ASTRONAUT_FILENAME, Astronaut._NB_SHEET_IMAGES)]
+
+        sounds = [GameSettings.FILE_NAMES[file] for file in (Files.SND_MUSIC_LEVEL, Files.SND_JINGLE, Files.SND_REACTOR,
+                                                             Files.SND_CRASH, Files.SMOOTH_LANDING, Files.ROUGH_LANDING,
+                                                             Files.VOICES_ASTRONAUT_HEY)]
+        sounds.extend(GameSettings.FILE_NAMES[Files.VOICES_ASTRONAUT_HEY_TAXI])
+        sounds.extend(GameSettings.FILE_NAMES[Files.VOICES_ASTRONAUT_PAD])
+
+        return images, sprite_sheets, sounds
+
+    def _install_compiled_data(self) -> None:
+        """ Fournit les masques et l'étendue des plateformes précalculés, pour qu'ils ne soient pas recalculés. """
+        resources = ResourceManager()
+        for image, packed_mask in self._compiled_level.masks.items():
+            if not resources.is_cached('mask', image):
+                resources.add_mask(image, packed_mask.unpack())
+        for image, extents in self._compiled_level.pad_extents.items():
+            Pad.add_extents(image, extents)
+
+    @traced(category="collision")
+    def _build_collision_data(self) -> None:
+        """
+        Réunit le décor immobile en un seul masque (voir collision_world.py) et indexe les plateformes et les pompes,
+        pour lesquelles il suffit que les rectangles se touchent (atterrissage, plein d'essence).
+        """
+        self._collision_world = CollisionWorld(self._surface.get_size(), self._pads + self._obstacles + self._pumps)
+
+        self._pad_grid = SpatialGrid()
+        for pad in self._pads:
+            self._pad_grid.insert(pad)
+
+        self._pump_grid = SpatialGrid()
+        for pump in self._pumps:
+            self._pump_grid.insert(pump)
+
+        self._taxi.collision_world = self._collision_world
+
+    def _spawn_astronaut(self, start_pad_number: int, end_pad_number: int or None, distance: float) -> Astronaut:
+        start_pad = self._pads[start_pad_number - 1]
+        end_pad = self._pads[end_pad_number - 1] if end_pad_number else Pad.UP
+        return Astronaut(start_pad, end_pad, distance)
 
     def _jingle_sound_play(self):
         self._is_jingle_sound_on = True
-        self._jingle_begin_time = pygame.time.get_ticks()
+        self._jingle_begin_time = GameClock().get_ticks()
         self._jingle_sound_effect.play()
         self._last_taxied_astronaut_time += self._jingle_sound_effect.get_length()
 
     def handle_event(self, event: pygame.event.Event) -> None:
-        """ Gère les événements PyGame. """
-
-        if self._is_jingle_sound_on:
-            return
-
-        if event.type in (pygame.KEYDOWN, pygame.JOYBUTTONDOWN) and self._taxi.is_destroyed():
-            is_key_event = (event.type == pygame.KEYDOWN and event.key in (pygame.K_RETURN, pygame.K_SPACE))
-            is_joy_event = (event.type == pygame.JOYBUTTONDOWN and pygame.joystick.Joystick(0).get_button(9))
-
-            if is_key_event or is_joy_event :
-                self._taxi.reset()
-                self._retry_current_astronaut()
-                self._jingle_sound_play()
-                return
-
-        if self._taxi:
-            self._taxi.handle_event(event)
+        """ Gère les événements PyGame (les commandes du joueur sont lues à chaque pas, voir update()). """
+        pass
 
     def update(self) -> None:
         """
@@ -148,24 +181,33 @@ class LevelScene(Scene):
             self._is_first_update_valid = True
             return
 
+        input_state = InputManager().state()
+        if not self._is_jingle_sound_on and self._taxi and self._taxi.is_destroyed() and \
+                input_state.was_start_pressed():
+            self._taxi.reset()
+            self._retry_current_astronaut()
+            self._jingle_sound_play()
+
         if self._is_jingle_sound_on:
-            jingle_play_duration = (pygame.time.get_ticks() - self._jingle_begin_time) / 1000
+            jingle_play_duration = (GameClock().get_ticks() - self._jingle_begin_time) / 1000
             if jingle_play_duration > self._jingle_sound_effect.get_length():
                 self._is_jingle_sound_on = False
-                self._last_taxied_astronaut_time = time.time()
+                self._last_taxied_astronaut_time = GameClock().time()
             return
 
         # Initialisation de la musique si ce n'est pas déjà fait
         if not self._music_started:
+            self._music.set_volume(1.0)  # le son est partagé : un niveau précédent a pu le laisser muet
             self._music.play(-1)
             self._music_started = True
 
         # Gestion du fade-out
         if self._fade_out_start_time:
-            elapsed_time = pygame.time.get_ticks() - self._fade_out_start_time
+            elapsed_time = GameClock().get_ticks() - self._fade_out_start_time
             volume = max(0.0, 1.0 - (elapsed_time / LevelScene._FADE_OUT_DURATION))
             self._music.set_volume(volume)
             if volume == 0:
+                self._music.stop()
                 self._fade_out_start_time = None
 
         if self._taxi is None:
@@ -183,7 +225,7 @@ class LevelScene(Scene):
                     elif self._taxi.has_exited():
                         self._taxi.unboard_astronaut()
                         self._taxi = None
-                        self._fade_out_start_time = pygame.time.get_ticks()
+                        self._fade_out_start_time = GameClock().get_ticks()
                         if os.path.exists(GameSettings.FILE_NAMES[Files.CFG_LEVEL].replace("#", str(self._level + 1))):
                             SceneManager().change_scene(f"level{self._level + 1}_load", LevelScene._FADE_OUT_DURATION)
                         else:
@@ -193,7 +235,7 @@ class LevelScene(Scene):
                 if self._nb_taxied_astronauts < len(self._astronauts) - 1:
                     self._nb_taxied_astronauts += 1
                     self._astronaut = None
-                    self._last_taxied_astronaut_time = time.time()
+                    self._last_taxied_astronaut_time = GameClock().time()
             elif self._taxi.hit_astronaut(self._astronaut):
                 self._retry_current_astronaut()
             elif self._taxi.pad_landed_on:
@@ -203,36 +245,32 @@ class LevelScene(Scene):
             elif self._astronaut.is_jumping_on_starting_pad():
                 self._astronaut.wait()
         else:
-            if self._nb_taxied_astronauts < len(self._astronauts) and time.time() - self._last_taxied_astronaut_time >= LevelScene._TIME_BETWEEN_ASTRONAUTS:
-                astronaut_info = self._astronauts[self._nb_taxied_astronauts]
-                self._astronaut = self._spawn_astronaut(astronaut_info[0], astronaut_info[1])
-                self._last_taxied_astronaut_time = time.time()
+            if self._nb_taxied_astronauts < len(self._astronauts) and GameClock().time() - self._last_taxied_astronaut_time >= LevelScene._TIME_BETWEEN_ASTRONAUTS:
+                self._astronaut = self._spawn_astronaut(*self._astronauts[self._nb_taxied_astronauts])
+                self._last_taxied_astronaut_time = GameClock().time()
 
         # Mise à jour du taxi et gestion des collisions
-        self._taxi.update()
+        self._taxi.update(input_state)
 
-        for pad in self._pads:
-            if self._taxi.land_on_pad(pad):
-                pass  # Effets secondaires d'un atterrissage ici
-            elif self._taxi.crash_on_obstacle(pad):
-                self.reset_money_after_crash()
-                self._hud.loose_live()
+        with Tracer().span("LevelScene.collisions", "collision"):
+            # atterrissages d'abord (ils peuvent déplacer le taxi), puis un seul test de contact avec tout le décor
+            landed_pads = [pad for pad in self._pad_grid.query(self._taxi.rect) if self._taxi.land_on_pad(pad)]
 
-        for obstacle in self._obstacles:
-            if self._taxi.crash_on_obstacle(obstacle):
-                self.reset_money_after_crash()
-                self._hud.loose_live()
-
-        if self._gate.is_closed() and self._taxi.crash_on_obstacle(self._gate):
-            self.reset_money_after_crash()
-            self._hud.loose_live()
+            crashed_elements = []
+            for element in self._collision_world.hits(self._taxi.mask, self._taxi.rect.topleft):
+                if element not in landed_pads and self._taxi.crash_on_obstacle(element):
+                    crashed_elements.append(element)
+                    self.reset_money_after_crash()
+                    self._hud.loose_live()
 
-        for pump in self._pumps:
-            if self._taxi.crash_on_obstacle(pump):
+            if self._gate.is_closed() and self._taxi.crash_on_obstacle(self._gate):
                 self.reset_money_after_crash()
                 self._hud.loose_live()
-            elif self._taxi.refuel_from(pump):
-                self._taxi.is_refueling()
+
+            # une pompe percutée pendant ce pas ne fait pas le plein
+            for pump in self._pump_grid.query(self._taxi.rect):
+                if pump not in crashed_elements and self._taxi.refuel_from(pump):
+                    self._taxi.is_refueling()
 
         self.game_over_validation()
 
@@ -241,20 +279,113 @@ class LevelScene(Scene):
         Effectue le rendu du niveau pour l'afficher à l'écran.
         :param screen: écran (surface sur laquelle effectuer le rendu)
         """
-        screen.blit(self._surface, (0, 0))
-        self._obstacle_sprites.draw(screen)
-        self._gate.draw(screen)
-        self._pump_sprites.draw(screen)
-        for pad_sprites in self._pad_sprites:
-            pad_sprites.draw(screen)
-        if self._taxi:
-            self._taxi.draw(screen)
-        if self._astronaut:
-            self._astronaut.draw(screen)
+        if GameSettings.DIRTY_RECTS and not self._full_redraw:
+            self._render_dirty_rects(screen)
+            return
+
+        screen.blit(self._static_layer, (0, 0))
+        self._previous_rects = self._draw_dynamic_sprites(screen)
         self._hud.render(screen)
+        self._dirty_rects = None
+        self._full_redraw = False
 
     def surface(self) -> pygame.Surface:
-        return self._surface
+        return self._static_layer
+
+    def invalidate(self) -> None:
+        self._full_redraw = True
+
+    def release(self) -> None:
+        resources = ResourceManager()
+        resources.release('image', Files.IMG_LEVEL)
+        for file in (Files.SND_MUSIC_LEVEL, Files.SND_JINGLE):
+            resources.release('sound', file)
+        for sprite in [self._taxi, self._gate] + (self._obstacles or []) + (self._pumps or []) + (self._pads or []):
+            if sprite:
+                sprite.release()
+
+    def dirty_rects(self) -> list or None:
+        return self._dirty_rects
+
+    def snapshot(self) -> tuple:
+        """ Retourne l'état du niveau qui détermine la suite de la simulation (voir replay.py). """
+        return (GameClock().time(), self._nb_taxied_astronauts, self._gate.is_closed(), self._hud.get_lives(),
+                self._taxi.snapshot() if self._taxi else None,
+                self._astronaut.snapshot() if self._astronaut else None)
+
+    def _render_dirty_rects(self, screen: pygame.Surface) -> None:
+        """
+        Rendu partiel : restaure la couche fixe sous les éléments mobiles (position précédente et courante)
+        et sous les widgets modifiés du HUD, redessine les éléments mobiles, puis recopie le HUD dans ces zones.
+        :param screen: écran (surface sur laquelle effectuer le rendu)
+        """
+        current_rects = self._dynamic_sprite_areas(screen)
+
+        # zones disjointes, pour que rien (le HUD semi-transparent surtout) ne soit dessiné deux fois au même endroit
+        dirty_rects = LevelScene._merge_rects(self._previous_rects + self._hud.update_overlay() + current_rects)
+        for rect in dirty_rects:
+            screen.blit(self._static_layer, rect, rect)
+
+        self._draw_dynamic_sprites(screen)  # chaque élément mobile n'est dessiné qu'une fois par trame
+        self._hud.render(screen, dirty_rects)
+        self._dirty_rects = dirty_rects
+        self._previous_rects = current_rects
+
+    @staticmethod
+    def _merge_rects(rects: list) -> list:
+        """
+        Fusionne les rectangles qui se chevauchent.
+        :param rects: liste de pygame.Rect
+        :return: une liste de rectangles disjoints couvrant au moins les mêmes zones
+        """
+        merged = []
+        for rect in rects:
+            rect = rect.copy()
+            index = rect.collidelist(merged)
+            while index != -1:
+                rect.union_ip(merged.pop(index))
+                index = rect.collidelist(merged)
+            merged.append(rect)
+        return merged
+
+    @traced(category="scene")
+    def _build_static_layer(self) -> None:
+        """
+        Compose une fois pour toutes l'arrière-plan et les éléments qui ne bougent jamais (obstacles, pompes,
+        plateformes et leurs étiquettes) sur une seule surface au format de l'écran. Seuls les éléments mobiles
+        sont ensuite dessinés à chaque trame. À rappeler si un élément fixe est ajouté, retiré ou modifié.
+        """
+        static_layer = pygame.Surface((self._settings.SCREEN_WIDTH, self._settings.SCREEN_HEIGHT))
+        static_layer.blit(self._surface, (0, 0))
+        self._obstacle_sprites.draw(static_layer)
+        self._pump_sprites.draw(static_layer)
+        for pad_sprite in self._pad_sprites:
+            pad_sprite.draw(static_layer)
+        self._static_layer = static_layer.convert()
+        self._full_redraw = True
+
+    def _draw_dynamic_sprites(self, screen: pygame.Surface) -> list:
+        """
+        Dessine les éléments qui peuvent bouger d'une trame à l'autre (barrière, taxi et astronaute).
+        :param screen: écran (surface sur laquelle effectuer le rendu)
+        :return: la liste des zones de l'écran où ces éléments ont été dessinés
+        """
+        rects = [self._gate.draw(screen)]
+        if self._taxi:
+            rects.append(self._taxi.draw(screen))
+        if self._astronaut:
+            rects.append(self._astronaut.draw(screen))
+        return [rect for rect in rects if rect]
+
+    def _dynamic_sprite_areas(self, screen: pygame.Surface) -> list:
+        """
+        Calcule, sans dessiner, les zones de l'écran que couvrira _draw_dynamic_sprites().
+        :param screen: écran (les zones sont limitées à sa surface, comme celles retournées par blit())
+        :return: la liste des zones
+        """
+        sprites = [self._gate, self._taxi, self._astronaut]
+        areas = [sprite.draw_area() for sprite in sprites if sprite]
+        return [area.clip(screen.get_rect()) for area in areas if area and area.colliderect(screen.get_rect())]
 
     def _reinitialize(self) -> None:
         """ Initialise (ou réinitialise) le niveau. """
@@ -265,11 +396,8 @@ class LevelScene(Scene):
     def _retry_current_astronaut(self) -> None:
         """ Replace le niveau dans l'état où il était avant la course actuelle. """
         self._gate.close()
-        self._astronauts = []
-        for key in self.config["astronauts"]:
-            astronaut = self.config.get("astronauts", key).split(", ")
-            self._astronauts.append(astronaut)
-        self._last_taxied_astronaut_time = time.time()
+        self._astronauts = self._compiled_level.astronauts
+        self._last_taxied_astronaut_time = GameClock().time()
         self._astronaut = None
 
     def reset_money_after_crash(self):
@@ -0,0 +1,265 @@
+"""
+  Instrumentation de la mémoire, activée à la demande :
+
+      python space_taxi.py --memory-profile memoire.json [--memory-budget 65536]
+      python memory_profiler.py memoire.json
+
+  Pendant la partie : un instantané tracemalloc à l'entrée et à la sortie de chaque scène (avec les lignes de code
+  dont l'allocation a le plus changé depuis l'instantané précédent), l'allocation de chaque trame (pic de mémoire
+  allouée au-dessus du niveau de début de trame et variation du nombre de blocs), un relevé périodique pour suivre
+  la croissance au fil d'une longue partie, et la taille des ressources partagées. Un budget d'allocation par trame
+  peut être imposé : les trames qui le dépassent sont signalées et le programme se termine alors avec le code 1.
+
+  La mémoire des pixels des surfaces est allouée par SDL, hors de portée de tracemalloc : elle est comptée dans
+  la section des ressources (ResourceManager et pages de l'atlas), pas dans l'allocation des trames.
+"""
+import json
+import sys
+import time
+import tracemalloc
+from array import array
+
+from atlas import Atlas
+from frame_stats import FrameStats, percentile
+from resources import ResourceManager
+
+
+class MemoryProfiler:
+    """ Singleton qui recueille les mesures de mémoire (voir l'en-tête du module). """
+
+    SAMPLE_INTERVAL = 900  # trames entre deux relevés périodiques (10 s à 90 FPS)
+
+    _TOP_DIFFERENCES = 10  # lignes de code retenues à chaque instantané de scène
+    _MAX_REPORTED_FRAMES = 100  # trames hors budget conservées en détail
+
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super(MemoryProfiler, cls).__new__(cls, *args, **kwargs)
+        return cls._instance
+
+    def __init__(self) -> None:
+        if not hasattr(self, '_initialized'):
+            self._enabled = False
+            self._frame_budget = None
+            self._start_time = 0.0
+
+            self._scene_name = None
+            self._frame_start_traced = 0
+            self._frame_start_blocks = 0
+            self._frame_allocations = array('q')  # octets, par trame
+            self._frame_blocks = array('q')  # variation du nombre de blocs alloués, par trame
+            self._scene_allocations = {}  # scène -> octets, par trame
+            self._over_budget = []
+            self._nb_over_budget = 0
+            self._samples = []
+            self._scene_events = []
+            self._previous_snapshot = None
+
+            self._initialized = True
+
+    def enable(self, frame_budget: int = None) -> None:
+        """
+        Démarre tracemalloc et les mesures (ralentit sensiblement le jeu).
+        :param frame_budget: l'allocation maximale permise par trame, en octets (None : aucun budget)
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._enabled = True
+        self._frame_budget = frame_budget
+        self._start_time = time.perf_counter()
+        self._previous_snapshot = MemoryProfiler._snapshot()
+
+    def is_enabled(self) -> bool:
+        return self._enabled
+
+    def nb_over_budget(self) -> int:
+        return self._nb_over_budget
+
+    def scene_event(self, scene, event: str) -> None:
+        """
+        Prend un instantané à l'entrée ou à la sortie d'une scène (voir SceneManager).
+        :param scene: la scène
+        :param event: 'enter' ou 'exit'
+        """
+        if not self._enabled:
+            return
+
+        scene_name = type(scene).__name__
+        if event == 'enter':
+            self._scene_name = scene_name
+
+        snapshot = MemoryProfiler._snapshot()
+        differences = snapshot.compare_to(self._previous_snapshot, 'lineno')[:MemoryProfiler._TOP_DIFFERENCES]
+        self._previous_snapshot = snapshot
+
+        self._scene_events.append(dict(self._measure(), event=event, scene=scene_name, top_growth=[
+            {"where": str(difference.traceback), "size_diff": difference.size_diff,
+             "count_diff": difference.count_diff, "size": difference.size}
+            for difference in differences]))
+
+    def begin_frame(self) -> None:
+        if not self._enabled:
+            return
+        tracemalloc.reset_peak()
+        self._frame_start_traced = tracemalloc.get_traced_memory()[0]
+        self._frame_start_blocks = sys.getallocatedblocks()
+
+    def end_frame(self) -> None:
+        if not self._enabled:
+            return
+        traced, peak = tracemalloc.get_traced_memory()
+        allocated = peak - self._frame_start_traced
+        blocks = sys.getallocatedblocks() - self._frame_start_blocks
+
+        frame = len(self._frame_allocations)
+        self._frame_allocations.append(allocated)
+        self._frame_blocks.append(blocks)
+        self._scene_allocations.setdefault(self._scene_name, array('q')).append(allocated)
+
+        if self._frame_budget is not None and allocated > self._frame_budget:
+            self._nb_over_budget += 1
+            if len(self._over_budget) < MemoryProfiler._MAX_REPORTED_FRAMES:
+                self._over_budget.append({"frame": frame, "scene": self._scene_name, "bytes": allocated})
+
+        if frame % MemoryProfiler.SAMPLE_INTERVAL == 0:
+            self._samples.append(self._measure())
+
+    def save(self, filename: str) -> None:
+        """ Enregistre les mesures (JSON), à lire avec : python memory_profiler.py FICHIER """
+        if not self._enabled:
+            return
+        resources = ResourceManager()
+        assets = [{"kind": kind, "file": file, "parameter": parameter, "bytes": size, "references": references}
+                  for kind, file, parameter, size, references in resources.usage()]
+        assets.extend({"kind": "atlas page", "file": page, "parameter": None, "bytes": size, "references": None}
+                      for page, size in Atlas().page_sizes().items())
+        assets.sort(key=lambda asset: asset["bytes"], reverse=True)
+
+        profile = {
+            "frame_budget": self._frame_budget,
+            "frames": len(self._frame_allocations),
+            "frame_allocations": MemoryProfiler._summarize(self._frame_allocations),
+            "frame_blocks": MemoryProfiler._summarize(self._frame_blocks),
+            "scenes": {str(scene): MemoryProfiler._summarize(allocations)
+                       for scene, allocations in self._scene_allocations.items()},
+            "frames_over_budget": self._nb_over_budget,
+            "over_budget": self._over_budget,
+            "samples": self._samples + [self._measure()],
+            "scene_events": self._scene_events,
+            "assets": assets,
+        }
+        with open(filename, "w") as profile_file:
+            json.dump(profile, profile_file, indent=2)
+
+    def _measure(self) -> dict:
+        traced, _ = tracemalloc.get_traced_memory()
+        return {"frame": len(self._frame_allocations), "seconds": time.perf_counter() - self._start_time,
+                "traced": traced, "instrumentation": self._instrumentation_size(), "blocks": sys.getallocatedblocks(),
+                "resources": ResourceManager().memory_used()}
+
+    def _instrumentation_size(self) -> int:
+        """ Taille des historiques par trame (les nôtres et ceux de FrameStats), qui croissent avec la partie. """
+        histories = [self._frame_allocations, self._frame_blocks, *self._scene_allocations.values(),
+                     *FrameStats()._history.values(), *FrameStats()._scene_history.values()]
+        return sum(len(history) * history.itemsize for history in histories)
+
+    @staticmethod
+    def _snapshot() -> tracemalloc.Snapshot:
+        """ Prend un instantané, sans les allocations de tracemalloc lui-même. """
+        return tracemalloc.take_snapshot().filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),))
+
+    @staticmethod
+    def _summarize(values) -> dict:
+        ordered = sorted(values)
+        if not ordered:
+            return {"frames": 0}
+        return {"frames": len(ordered), "mean": sum(ordered) / len(ordered), "p50": percentile(ordered, 50),
+                "p95": percentile(ordered, 95), "p99": percentile(ordered, 99), "max": ordered[-1]}
+
+
+def report(profile: dict) -> list:
+    """
+    Met en forme les mesures enregistrées par MemoryProfiler.save().
+    :param profile: les mesures
+    :return: les lignes du rapport
+    """
+    def kib(size: float) -> str:
+        return f"{size / 1024:,.1f} Kio"
+
+    lines = []
+    allocations = profile["frame_allocations"]
+    lines.append(f"Trames : {profile['frames']}")
+    if allocations["frames"]:
+        lines.append(f"  allocation par trame : moyenne {kib(allocations['mean'])}, p50 {kib(allocations['p50'])}, "
+                     f"p95 {kib(allocations['p95'])}, p99 {kib(allocations['p99'])}, max {kib(allocations['max'])}")
+        blocks = profile["frame_blocks"]
+        lines.append(f"  variation des blocs par trame : moyenne {blocks['mean']:+.1f}, p95 {blocks['p95']:+d}, "
+                     f"max {blocks['max']:+d}")
+    for scene, statistics in profile["scenes"].items():
+        if statistics["frames"]:
+            lines.append(f"  {scene} : {statistics['frames']} trames, moyenne {kib(statistics['mean'])}, "
+                         f"p95 {kib(statistics['p95'])}, max {kib(statistics['max'])}")
+
+    if profile["frame_budget"] is not None:
+        lines.append(f"Budget par trame : {kib(profile['frame_budget'])}, dépassé {profile['frames_over_budget']} fois")
+        for frame in profile["over_budget"][:20]:
+            lines.append(f"  trame {frame['frame']} ({frame['scene']}) : {kib(frame['bytes'])}")
+
+    samples = profile["samples"]
+    lines.append("Croissance :")
+    for sample in samples:
+        lines.append(f"  {sample['seconds']:8.1f} s  trame {sample['frame']:>7}  python {kib(sample['traced'])} "
+                     f"(dont mesures {kib(sample['instrumentation'])}), {sample['blocks']} blocs, "
+                     f"ressources {kib(sample['resources'])}")
+    steady_samples = samples[1:]  # le premier relevé précède la mise en route (caches, premières trames)
+    if len(steady_samples) >= 3:
+        for sample in steady_samples:
+            sample['game'] = sample['traced'] - sample['instrumentation']
+        lines.append(f"  tendance : {_slope(steady_samples, 'game') * 60 / 1024:+,.1f} Kio/min (python, hors mesures), "
+                     f"{_slope(steady_samples, 'blocks') * 60:+,.0f} blocs/min")
+
+    lines.append("Scènes (instantanés tracemalloc) :")
+    for event in profile["scene_events"]:
+        lines.append(f"  trame {event['frame']} : {'entrée dans' if event['event'] == 'enter' else 'sortie de'} "
+                     f"{event['scene']}, python {kib(event['traced'])}, ressources {kib(event['resources'])}")
+        for difference in event["top_growth"][:5]:
+            lines.append(f"      {difference['size_diff'] / 1024:+10,.1f} Kio {difference['count_diff']:+7d} blocs  "
+                         f"{difference['where']}")
+
+    lines.append("Ressources :")
+    total = sum(asset["bytes"] for asset in profile["assets"])
+    lines.append(f"  total {kib(total)}")
+    for asset in profile["assets"]:
+        name = asset["file"] if asset["parameter"] is None else f"{asset['file']} ({asset['parameter']})"
+        references = "" if asset["references"] is None else f", {asset['references']} référence(s)"
+        lines.append(f"  {kib(asset['bytes']):>14}  {asset['kind']:<10} {name}{references}")
+    return lines
+
+
+def _slope(samples: list, key: str) -> float:
+    """ Pente (par seconde) de la droite des moindres carrés d'une mesure en fonction du temps. """
+    times = [sample["seconds"] for sample in samples]
+    values = [sample[key] for sample in samples]
+    mean_time = sum(times) / len(times)
+    mean_value = sum(values) / len(values)
+    variance = sum((t - mean_time) ** 2 for t in times)
+    if variance == 0:
+        return 0.0
+    return sum((t - mean_time) * (v - mean_value) for t, v in zip(times, values)) / variance
+
+
+def main() -> None:
+    """ Affiche le rapport des mesures enregistrées. """
+    if len(sys.argv) != 2:
+        print("usage : python memory_profiler.py memoire.json")
+        sys.exit(2)
+    with open(sys.argv[1]) as profile_file:
+        profile = json.load(profile_file)
+    print("\n".join(report(profile)))
+    sys.exit(1 if profile["frames_over_budget"] else 0)
+
+
+if __name__ == "__main__":
+    main()
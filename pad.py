@@ -1,6 +1,7 @@
 import pygame
 import gate
 from game_settings import GameSettings
+from resources import ResourceManager
 
 
 class Pad(pygame.sprite.Sprite):
@@ -11,8 +12,12 @@ class Pad(pygame.sprite.Sprite):
 
     _TEXT_COLOR = (255, 255, 255)
     _HEIGHT = 40
+    _ASTRONAUT_OFFSET_Y = 24  # les astronautes se tiennent au-dessus de la plateforme
 
-    _PAD_SURFACES = {}
+    _PAD_EXTENTS = {}  # étendue de la plate-forme, par fichier
+    _LABEL_TEXTS = {}  # texte de l'étiquette, par numéro de plateforme
+    _LABEL_BACKGROUNDS = {}  # fond de l'étiquette, par dimensions
+    _LABELLED_SURFACES = {}  # image de la plateforme avec son étiquette, par (fichier, numéro)
 
     def __init__(self, number: int, filename: str, pos: tuple, astronaut_start_x: int, astronaut_end_x: int) -> None:
         """
@@ -27,53 +32,100 @@ class Pad(pygame.sprite.Sprite):
 
         self.number = number
 
-        if filename in self._PAD_SURFACES:
-            self.image, self.mask = self._PAD_SURFACES[filename]
-        else:
-            self.image = pygame.image.load(filename).convert_alpha()
-            self.mask = pygame.mask.from_surface(self.image)
-            self._PAD_SURFACES[filename] = (self.image, self.mask)
+        self._filename = filename
+        self.image = ResourceManager().image(filename)
+        self.mask = ResourceManager().mask(filename)
+        if filename not in self._PAD_EXTENTS:
+            self._PAD_EXTENTS[filename] = Pad.compute_extents(self.image, self.mask)
+        transparent_pixels_left, visible_pixels_pad, transparent_pixels_right, top_offset = self._PAD_EXTENTS[filename]
 
-        font = GameSettings().pad_font
-        self._label_text = font.render(f"  PAD {number}  ", True, Pad._TEXT_COLOR)
+        if number not in self._LABEL_TEXTS:
+            font = GameSettings().pad_font
+            self._LABEL_TEXTS[number] = font.render(f"  PAD {number}  ", True, Pad._TEXT_COLOR)
+        self._label_text = self._LABEL_TEXTS[number]
 
         text_width, text_height = self._label_text.get_size()
 
         background_height = text_height + 4
         background_width = text_width + background_height  # + hauteur, pour les coins arrondis
-        self._label_background = Pad._build_label(background_width, background_height)
-
-        visible_pixels_pad = 0
-        transparent_pixels_pad = 0
-        self.image.lock()
-        for x in range(self.image.get_width()):
-            r, g, b, a = self.image.get_at((x, 0))
-            if a != 0:
-                visible_pixels_pad += 1
-            elif a == 0 and visible_pixels_pad == 0:
-                transparent_pixels_pad += 1
-        self.image.unlock()
-        self._label_text_offset = ((visible_pixels_pad - text_width) / 2 + transparent_pixels_pad + 1, 3)
-        self._label_background_offset = ((visible_pixels_pad - background_width) / 2 + transparent_pixels_pad, 2)
+        if (background_width, background_height) not in self._LABEL_BACKGROUNDS:
+            self._LABEL_BACKGROUNDS[(background_width, background_height)] = Pad._build_label(background_width,
+                                                                                                background_height)
+        self._label_background = self._LABEL_BACKGROUNDS[(background_width, background_height)]
+
+        self._label_text_offset = ((visible_pixels_pad - text_width) / 2 + transparent_pixels_left + 1, 3)
+        self._label_background_offset = ((visible_pixels_pad - background_width) / 2 + transparent_pixels_left, 2)
+
+        if (filename, number) not in self._LABELLED_SURFACES:
+            self._LABELLED_SURFACES[(filename, number)] = self._build_labelled_image()
+        self._labelled_image = self._LABELLED_SURFACES[(filename, number)]
 
         self.rect = self.image.get_rect()
         self.rect.x = pos[0]
         self.rect.y = pos[1]
 
-        self.astronaut_start = pygame.Vector2(self.rect.x + astronaut_start_x, self.rect.y - 24)
-        self.astronaut_end = pygame.Vector2(self.rect.x + astronaut_end_x, self.rect.y - 24)
+        # étendue de la surface d'atterrissage, en coordonnées d'écran (calculée une seule fois)
+        self.platform_left = self.rect.left + transparent_pixels_left
+        self.platform_right = self.rect.right - transparent_pixels_right
+        self.landing_y = self.rect.top + top_offset  # première rangée opaque de la plateforme
 
-    def draw(self, surface: pygame.Surface) -> None:
-        image_copy = self.image.copy()
+        self.astronaut_start = pygame.Vector2(self.rect.x + astronaut_start_x, self.rect.y - Pad._ASTRONAUT_OFFSET_Y)
+        self.astronaut_end = pygame.Vector2(self.rect.x + astronaut_end_x, self.rect.y - Pad._ASTRONAUT_OFFSET_Y)
 
-        image_copy.blit(self._label_background, self._label_background_offset)
-        image_copy.blit(self._label_text, self._label_text_offset)
+    def draw(self, surface: pygame.Surface) -> pygame.Rect:
+        return surface.blit(self._labelled_image, self.rect)
 
-        surface.blit(image_copy, self.rect)
+    def release(self) -> None:
+        """ Libère les ressources partagées utilisées par cette plateforme. """
+        resources = ResourceManager()
+        resources.release('image', self._filename)
+        resources.release('mask', self._filename)
 
     def update(self, *args, **kwargs) -> None:
         pass
 
+    def _build_labelled_image(self) -> pygame.Surface:
+        """
+        Construit l'image de la plateforme avec son étiquette (une seule fois par image et par numéro).
+        :return: une nouvelle surface, l'image d'origine (partagée) n'est pas modifiée
+        """
+        labelled_image = self.image.copy()
+        labelled_image.blit(self._label_background, self._label_background_offset)
+        labelled_image.blit(self._label_text, self._label_text_offset)
+        return labelled_image
+
+    @staticmethod
+    def add_extents(filename: str, extents: tuple) -> None:
+        """ Fournit l'étendue, déjà calculée (voir level_compiler.py), de la plate-forme d'une image. """
+        Pad._PAD_EXTENTS[filename] = extents
+
+    @staticmethod
+    def compute_extents(image: pygame.Surface, mask: pygame.mask.Mask) -> tuple:
+        """
+        Mesure la partie visible de la rangée supérieure de l'image (une seule fois par fichier).
+        :param image: l'image de la plateforme
+        :param mask: le masque de l'image
+        :return: un tuple (pixels transparents à gauche, pixels visibles, pixels transparents à droite,
+                 première rangée opaque du masque)
+        """
+        visible_pixels = 0
+        transparent_pixels_left = 0
+        transparent_pixels_right = 0
+        image.lock()
+        for x in range(image.get_width()):
+            if image.get_at((x, 0)).a != 0:
+                visible_pixels += 1
+            elif visible_pixels == 0:
+                transparent_pixels_left += 1
+            else:
+                transparent_pixels_right += 1
+        image.unlock()
+
+        bounding_rects = mask.get_bounding_rects()
+        top_offset = min(rect.top for rect in bounding_rects) if bounding_rects else 0
+
+        return transparent_pixels_left, visible_pixels, transparent_pixels_right, top_offset
+
     @staticmethod
     def _build_label(width: int, height: int) -> pygame.Surface:
         """
@@ -84,18 +136,12 @@ class Pad(pygame.sprite.Sprite):
         """
         surface = pygame.Surface((width, height), pygame.SRCALPHA)
 
+        # les primitives de dessin écrivent la couleur telle quelle (sans mélange) : l'alpha est donc direct
+        color = (0, 0, 0, 128)
         radius = height / 2
-        pygame.draw.circle(surface, (0, 0, 0), (radius, radius), radius)
-        pygame.draw.circle(surface, (0, 0, 0), (width - radius, radius), radius)
-        pygame.draw.rect(surface, (0, 0, 0), (radius, 0, width - 2 * radius, height))
-
-        surface.lock()
-        for x in range(surface.get_width()):
-            for y in range(surface.get_height()):
-                r, g, b, a = surface.get_at((x, y))
-                if a != 0:
-                    surface.set_at((x, y), (r, g, b, 128))
-        surface.unlock()
+        pygame.draw.circle(surface, color, (radius, radius), radius)
+        pygame.draw.circle(surface, color, (width - radius, radius), radius)
+        pygame.draw.rect(surface, color, (radius, 0, width - 2 * radius, height))
 
         return surface
 
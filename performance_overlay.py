@@ -0,0 +1,126 @@
+import pygame
+
+from frame_stats import FrameStats
+
+
+class PerformanceOverlay:
+    """
+    Superposition de performance, affichée par-dessus le jeu (touche F3) : cadence, durée de chaque phase de la
+    boucle de jeu, centiles du travail par trame, trames hors budget, durée par scène et graphique défilant de la
+    durée des dernières trames (une colonne par trame, empilée par phase, ligne rouge au budget).
+    """
+
+    TOGGLE_KEY = pygame.K_F3
+
+    _TEXT_COLOR = (255, 255, 255)
+    _BACKGROUND_COLOR = (0, 0, 0, 170)
+    _BUDGET_COLOR = (255, 60, 60)
+    _PHASE_COLORS = {'events': (160, 160, 160), 'update': (80, 200, 80), 'render': (80, 140, 255),
+                     'flip': (255, 170, 40)}
+    _PHASE_LABELS = {'events': "événements", 'update': "mise à jour", 'render': "rendu", 'flip': "affichage"}
+
+    _POS = (10, 10)
+    _MARGIN = 6
+    _LINE_SPACING = 2
+    _GRAPH_HEIGHT = 80
+    _GRAPH_SCALE = 1.5  # le haut du graphique correspond à 1,5 fois le budget d'une trame
+    _TEXT_REFRESH_FRAMES = 20  # le texte est recomposé toutes les 20 trames (il resterait illisible sinon)
+
+    def __init__(self, visible: bool = False) -> None:
+        """
+        Initialise la superposition.
+        :param visible: True pour l'afficher dès le départ
+        """
+        self.visible = visible
+        self._stats = FrameStats()
+        self._font = pygame.font.Font(None, 20)
+        self._text_surfaces = []
+        self._graph = pygame.Surface((FrameStats.WINDOW, PerformanceOverlay._GRAPH_HEIGHT), pygame.SRCALPHA)
+        self._graph.fill(PerformanceOverlay._BACKGROUND_COLOR)
+        self._nb_graphed_frames = 0
+
+    def toggle(self) -> None:
+        self.visible = not self.visible
+
+    def handle_event(self, event: pygame.event.Event) -> bool:
+        """
+        Affiche ou masque la superposition sur pression de la touche F3.
+        :return: True si la superposition vient d'être affichée ou masquée
+        """
+        if event.type == pygame.KEYDOWN and event.key == PerformanceOverlay.TOGGLE_KEY:
+            self.toggle()
+            return True
+        return False
+
+    def render(self, screen: pygame.Surface) -> None:
+        """
+        Dessine la superposition (si elle est visible) avec les mesures des trames terminées.
+        :param screen: écran (surface sur laquelle effectuer le rendu)
+        """
+        if not self.visible:
+            return
+        self._update_graph()  # après une absence, les dernières trames de la fenêtre sont toutes redessinées
+
+        if not self._text_surfaces or self._stats.nb_frames() % PerformanceOverlay._TEXT_REFRESH_FRAMES == 0:
+            self._text_surfaces = [self._font.render(line, True, PerformanceOverlay._TEXT_COLOR)
+                                   for line in self._text_lines()]
+
+        margin = PerformanceOverlay._MARGIN
+        line_height = self._font.get_linesize() + PerformanceOverlay._LINE_SPACING
+        width = max([self._graph.get_width()] + [surface.get_width() for surface in self._text_surfaces])
+        height = len(self._text_surfaces) * line_height + self._graph.get_height()
+        panel = pygame.Surface((width + 2 * margin, height + 3 * margin), pygame.SRCALPHA)
+        panel.fill(PerformanceOverlay._BACKGROUND_COLOR)
+        for number, surface in enumerate(self._text_surfaces):
+            panel.blit(surface, (margin, margin + number * line_height))
+        panel.blit(self._graph, (margin, 2 * margin + len(self._text_surfaces) * line_height))
+        screen.blit(panel, PerformanceOverlay._POS)
+
+    def _text_lines(self) -> list:
+        stats = self._stats
+        frame = stats.statistics('frame', window=True)
+        work = stats.statistics('work', window=True)
+        if not work["frames"]:
+            return ["mesures en cours..."]
+
+        lines = [f"{1000 / max(frame['mean_ms'], 1e-9):.1f} FPS   trame {frame['mean_ms']:.1f} ms",
+                 f"travail : p50 {work['p50_ms']:.2f}   p95 {work['p95_ms']:.2f}   p99 {work['p99_ms']:.2f} ms",
+                 f"hors budget ({stats.budget_ms:.1f} ms) : {stats.nb_over_budget(window=True)} / {work['frames']}"
+                 f"   (partie : {stats.nb_over_budget()} / {stats.nb_frames()})"]
+        for name in FrameStats.PHASES:
+            statistics = stats.statistics(name, window=True)
+            lines.append(f"{PerformanceOverlay._PHASE_LABELS[name]} : {statistics['mean_ms']:.2f} ms   "
+                         f"(p95 {statistics['p95_ms']:.2f})")
+
+        scenes = {}
+        for (scene, kind), statistics in stats.scene_statistics(window=True).items():
+            scenes.setdefault(scene, {})[kind] = statistics['mean_ms']
+        for scene, kinds in sorted(scenes.items()):
+            lines.append(f"{scene} : mise à jour {kinds.get('update', 0.0):.2f}   rendu {kinds.get('render', 0.0):.2f} ms")
+        return lines
+
+    def _update_graph(self) -> None:
+        """ Ajoute au graphique une colonne par trame terminée depuis le dernier appel (le graphique défile). """
+        stats = self._stats
+        nb_new_frames = min(stats.nb_frames() - self._nb_graphed_frames, FrameStats.WINDOW)
+        if nb_new_frames <= 0:
+            return
+        self._nb_graphed_frames = stats.nb_frames()
+
+        width, height = self._graph.get_size()
+        pixels_per_ms = height / (stats.budget_ms * PerformanceOverlay._GRAPH_SCALE)
+        self._graph.scroll(-nb_new_frames, 0)
+        self._graph.fill(PerformanceOverlay._BACKGROUND_COLOR, (width - nb_new_frames, 0, nb_new_frames, height))
+
+        windows = {name: stats.window(name)[-nb_new_frames:] for name in FrameStats.PHASES}
+        for column in range(nb_new_frames):
+            x = width - nb_new_frames + column
+            bottom = height
+            for name in FrameStats.PHASES:
+                top = max(0, bottom - round(windows[name][column] * pixels_per_ms))
+                if top < bottom:
+                    pygame.draw.line(self._graph, PerformanceOverlay._PHASE_COLORS[name], (x, bottom - 1), (x, top))
+                bottom = top
+
+        budget_y = height - round(stats.budget_ms * pixels_per_ms)
+        pygame.draw.line(self._graph, PerformanceOverlay._BUDGET_COLOR, (0, budget_y), (width - 1, budget_y))
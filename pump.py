@@ -1,5 +1,7 @@
 import pygame
 
+from resources import ResourceManager
+
 
 class Pump(pygame.sprite.Sprite):
     """ Une pompe à essence. """
@@ -7,8 +9,15 @@ class Pump(pygame.sprite.Sprite):
     def __init__(self, filename: str, pos: tuple) -> None:
         super(Pump, self).__init__()
 
-        self.image = pygame.image.load(filename).convert_alpha()
-        self.mask = pygame.mask.from_surface(self.image)
+        self._filename = filename
+        self.image = ResourceManager().image(filename)
+        self.mask = ResourceManager().mask(filename)
         self.rect = self.image.get_rect()
         self.rect.x = pos[0]
         self.rect.y = pos[1]
+
+    def release(self) -> None:
+        """ Libère les ressources partagées utilisées par cet objet. """
+        resources = ResourceManager()
+        resources.release('image', self._filename)
+        resources.release('mask', self._filename)
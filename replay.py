@@ -0,0 +1,262 @@
+"""
+  Enregistrement et relecture d'une partie (un niveau) :
+
+      python space_taxi.py --level 1 --record partie.str
+      python replay.py partie.str [autres parties...]
+
+  L'enregistrement contient l'état des commandes de chaque pas de simulation et la graine des générateurs
+  aléatoires. La relecture refait la simulation sans affichage et sans limite de cadence, puis compare l'état final
+  du niveau à celui de la partie enregistrée : elle sert de mesure de performance reproductible et permet de
+  retrouver rapidement le moment où la physique du taxi a changé.
+
+  Format (entiers en varint : 7 bits par octet, bit de poids fort pour « octet suivant ») :
+      en-tête  : "STRP", version, niveau, graine, options, nombre de pas, empreinte finale (SHA-1, 20 octets)
+      contenu  : suite de (nombre de pas inchangés, champs modifiés, valeurs des champs modifiés), terminée par un
+                 ensemble de champs modifiés vide. Les ensembles de touches sont triés et codés par différences ;
+                 les axes de la manette sont des réels de 64 bits.
+"""
+import hashlib
+import struct
+import sys
+import time
+
+import pygame
+
+from astronaut import Astronaut
+from black_scene import BlackScene
+from game_clock import GameClock
+from game_settings import GameSettings
+from headless import enable_headless
+from input_state import InputManager, InputState
+from level_scene import LevelScene
+from scene_manager import SceneManager
+from star import Star
+
+_MAGIC = b"STRP"
+_VERSION = 1
+_OPTION_WITH_SOUNDS = 1 << 0
+
+# champs d'un InputState, dans l'ordre de leur bit dans l'ensemble des champs modifiés
+_SET_FIELDS = ('keys', 'pressed_keys', 'buttons', 'pressed_buttons')
+_AXES_FIELD = 1 << len(_SET_FIELDS)
+
+
+class Replay:
+    """ Une partie enregistrée : le niveau, la graine aléatoire et les commandes de chaque pas de simulation. """
+
+    def __init__(self, level: int, seed: int, with_sounds: bool) -> None:
+        """
+        Initialise un enregistrement vide.
+        :param level: le numéro de niveau joué
+        :param seed: la graine des générateurs aléatoires (voir seed_random())
+        :param with_sounds: True si les sons étaient chargés (la durée du jingle rythme le niveau)
+        """
+        self.level = level
+        self.seed = seed
+        self.with_sounds = with_sounds
+        self.states = []
+        self.final_hash = None
+
+    def record(self, input_state: InputState) -> None:
+        """ Ajoute l'état des commandes d'un pas de simulation. """
+        self.states.append(input_state)
+
+    def finish(self, level_scene) -> None:
+        """ Termine l'enregistrement en retenant l'empreinte de l'état final du niveau. """
+        self.final_hash = state_hash(level_scene)
+
+    def save(self, filename: str) -> None:
+        with open(filename, "wb") as replay_file:
+            replay_file.write(_encode(self))
+
+    @staticmethod
+    def load(filename: str) -> 'Replay':
+        """ Lit un enregistrement (ValueError si le fichier n'est pas reconnu). """
+        with open(filename, "rb") as replay_file:
+            return _decode(replay_file.read())
+
+
+def seed_random(seed: int) -> None:
+    """ Initialise tous les générateurs aléatoires du jeu. """
+    Astronaut.seed_random(seed)
+    Star.seed_random(seed)
+
+
+def state_hash(level_scene) -> bytes:
+    """ Retourne l'empreinte (SHA-1) de l'état d'un niveau. """
+    return hashlib.sha1(repr(level_scene.snapshot()).encode()).digest()
+
+
+def play(replay: Replay) -> tuple:
+    """
+    Rejoue une partie sans affichage, aussi vite que possible.
+    :param replay: la partie
+    :return: un tuple contenant le nombre de pas simulés, la durée de la simulation (s) et l'empreinte finale
+    """
+    clock = GameClock()
+    clock.reset()  # la partie a été enregistrée à partir du démarrage du jeu
+    seed_random(replay.seed)
+    level_name = f"level{replay.level}"
+    level_scene = LevelScene(replay.level)
+    scene_manager = SceneManager()
+    scene_manager.clear()
+    scene_manager.add_scene(level_name, level_scene)
+    scene_manager.set_scene(level_name)
+    for exit_name in ("game_over", f"level{replay.level + 1}_load"):
+        # les scènes qui suivent le niveau ne sont pas rejouées : un écran noir suffit
+        scene_manager.add_scene(exit_name, BlackScene())
+
+    input_manager = InputManager()
+    states = iter(replay.states)
+    input_manager.set_source(lambda: next(states))
+
+    nb_steps = 0
+    start_time = time.perf_counter()
+    while nb_steps < len(replay.states) and scene_manager.has_scene(level_name):
+        clock.step()
+        input_manager.poll()
+        scene_manager.update()
+        nb_steps += 1
+    elapsed_time = time.perf_counter() - start_time
+
+    input_manager.set_source(None)
+    final_hash = state_hash(level_scene)
+    scene_manager.clear()
+    return nb_steps, elapsed_time, final_hash
+
+
+def _encode(replay: Replay) -> bytes:
+    data = bytearray(_MAGIC)
+    for value in (_VERSION, replay.level, replay.seed, _OPTION_WITH_SOUNDS if replay.with_sounds else 0,
+                  len(replay.states)):
+        _write_varint(data, value)
+    data += replay.final_hash or bytes(20)
+
+    previous = InputState()
+    nb_unchanged = 0
+    for state in replay.states:
+        if state == previous:
+            nb_unchanged += 1
+            continue
+
+        changes = sum(1 << bit for bit, field in enumerate(_SET_FIELDS)
+                      if getattr(state, field) != getattr(previous, field))
+        if state.axes != previous.axes:
+            changes |= _AXES_FIELD
+
+        _write_varint(data, nb_unchanged)
+        _write_varint(data, changes)
+        for bit, field in enumerate(_SET_FIELDS):
+            if changes & (1 << bit):
+                values = sorted(getattr(state, field))
+                _write_varint(data, len(values))
+                for value, previous_value in zip(values, [0] + values):
+                    _write_varint(data, value - previous_value)
+        if changes & _AXES_FIELD:
+            _write_varint(data, len(state.axes))
+            data += struct.pack(f"<{len(state.axes)}d", *state.axes)
+
+        previous = state
+        nb_unchanged = 0
+
+    _write_varint(data, nb_unchanged)
+    _write_varint(data, 0)  # fin
+    return bytes(data)
+
+
+def _decode(data: bytes) -> Replay:
+    if data[:len(_MAGIC)] != _MAGIC:
+        raise ValueError("fichier de partie enregistrée inconnu")
+    offset = len(_MAGIC)
+    version, offset = _read_varint(data, offset)
+    if version != _VERSION:
+        raise ValueError(f"version de partie enregistrée non prise en charge : {version}")
+    level, offset = _read_varint(data, offset)
+    seed, offset = _read_varint(data, offset)
+    options, offset = _read_varint(data, offset)
+    nb_states, offset = _read_varint(data, offset)
+
+    replay = Replay(level, seed, bool(options & _OPTION_WITH_SOUNDS))
+    replay.final_hash = data[offset:offset + 20]
+    offset += 20
+
+    previous = InputState()
+    while True:
+        nb_unchanged, offset = _read_varint(data, offset)
+        replay.states.extend([previous] * nb_unchanged)
+        changes, offset = _read_varint(data, offset)
+        if changes == 0:
+            break
+
+        fields = {field: getattr(previous, field) for field in _SET_FIELDS + ('axes',)}
+        for bit, field in enumerate(_SET_FIELDS):
+            if changes & (1 << bit):
+                count, offset = _read_varint(data, offset)
+                values = []
+                for _ in range(count):
+                    delta, offset = _read_varint(data, offset)
+                    values.append((values[-1] if values else 0) + delta)
+                fields[field] = frozenset(values)
+        if changes & _AXES_FIELD:
+            count, offset = _read_varint(data, offset)
+            fields['axes'] = struct.unpack_from(f"<{count}d", data, offset)
+            offset += 8 * count
+
+        previous = InputState(**fields)
+        replay.states.append(previous)
+
+    if len(replay.states) != nb_states:
+        raise ValueError("partie enregistrée incomplète")
+    return replay
+
+
+def _write_varint(data: bytearray, value: int) -> None:
+    while value >= 0x80:
+        data.append((value & 0x7F) | 0x80)
+        value >>= 7
+    data.append(value)
+
+
+def _read_varint(data: bytes, offset: int) -> tuple:
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def main() -> None:
+    """ Rejoue les parties passées en argument et vérifie leur état final. """
+    filenames = sys.argv[1:]
+    if not filenames:
+        print("usage : python replay.py partie.str [autres parties...]")
+        sys.exit(2)
+
+    replays = [Replay.load(filename) for filename in filenames]
+    if len({replay.with_sounds for replay in replays}) > 1:
+        print("les parties enregistrées avec et sans les sons doivent être rejouées séparément")
+        sys.exit(2)
+
+    enable_headless(keep_sounds=replays[0].with_sounds)
+    pygame.init()
+    if not GameSettings.HEADLESS:
+        pygame.mixer.init()
+    pygame.display.set_mode((GameSettings.SCREEN_WIDTH, GameSettings.SCREEN_HEIGHT))
+
+    all_identical = True
+    for filename, replay in zip(filenames, replays):
+        nb_ticks, elapsed_time, final_hash = play(replay)
+        identical = final_hash == replay.final_hash
+        all_identical = all_identical and identical
+        print(f"{filename} : {nb_ticks} pas en {elapsed_time:.2f} s ({nb_ticks / max(elapsed_time, 1e-9):.0f} pas/s), "
+              f"état final {'identique' if identical else 'DIFFÉRENT'}")
+
+    pygame.quit()
+    sys.exit(0 if all_identical else 1)
+
+
+if __name__ == "__main__":
+    main()
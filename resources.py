@@ -0,0 +1,238 @@
+import os
+from collections import OrderedDict
+
+import pygame
+
+from atlas import Atlas, frame_name
+from game_settings import GameSettings, Files
+from sound import load_sound, NullSound
+from tracing import Tracer
+
+
+class _Resource:
+    """ Une ressource chargée, avec son compteur de références et sa taille estimée en mémoire. """
+
+    def __init__(self, filename: str, value, size: int) -> None:
+        self.filename = filename
+        self.value = value
+        self.size = size
+        self.references = 0
+
+
+class ResourceManager:
+    """
+    Singleton qui charge une seule fois les images, masques, sons et polices du jeu et les partage entre tous
+    les objets qui les demandent.
+
+    Chaque demande ajoute une référence à la ressource ; release(), avec le même type, le même fichier et le même
+    paramètre (nombre d'images, taille de police) que la demande, retire cette référence. Une ressource qui n'est
+    plus référencée reste en cache (un niveau suivant la retrouve sans accès disque) jusqu'à ce que le budget
+    mémoire soit dépassé : les moins récemment utilisées sont alors évincées en premier.
+    """
+
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super(ResourceManager, cls).__new__(cls, *args, **kwargs)
+        return cls._instance
+
+    def __init__(self) -> None:
+        if not hasattr(self, '_initialized'):
+            self._resources = OrderedDict()  # (type, fichier, paramètre) -> _Resource, du moins récent au plus récent
+            self._memory_used = 0
+
+            self._initialized = True
+
+    def image(self, filename: str or Files) -> pygame.Surface:
+        """
+        Retourne l'image (convertie pour l'affichage) contenue dans un fichier.
+        :param filename: le nom du fichier, ou son identifiant dans GameSettings.FILE_NAMES
+        :return: la surface partagée (à ne pas modifier : en faire une copie au besoin)
+        """
+        filename = ResourceManager._filename(filename)
+        return self._acquire(('image', filename, None), lambda: ResourceManager._load_image(filename))
+
+    def frames(self, filename: str or Files, nb_frames: int) -> list:
+        """
+        Retourne les images, de même largeur, qui composent une feuille de sprites (de gauche à droite).
+        :param filename: le nom du fichier, ou son identifiant dans GameSettings.FILE_NAMES
+        :param nb_frames: le nombre d'images dans la feuille
+        :return: la liste des surfaces partagées
+        """
+        filename = ResourceManager._filename(filename)
+        return self._acquire(('frames', filename, nb_frames), lambda: self._load_frames(filename, nb_frames))
+
+    def mask(self, filename: str or Files) -> pygame.mask.Mask:
+        """
+        Retourne le masque de collision de l'image contenue dans un fichier.
+        :param filename: le nom du fichier, ou son identifiant dans GameSettings.FILE_NAMES
+        :return: le masque partagé
+        """
+        filename = ResourceManager._filename(filename)
+        return self._acquire(('mask', filename, None), lambda: ResourceManager._build_mask(self._peek_image(filename)))
+
+    def sound(self, filename: str or Files) -> pygame.mixer.Sound or NullSound:
+        """
+        Retourne le son contenu dans un fichier (un son muet en mode sans affichage).
+        :param filename: le nom du fichier, ou son identifiant dans GameSettings.FILE_NAMES
+        :return: le son partagé
+        """
+        filename = ResourceManager._filename(filename)
+        return self._acquire(('sound', filename, None), lambda: ResourceManager._load_sound(filename))
+
+    def font(self, filename: str or Files, size: int) -> pygame.font.Font:
+        """
+        Retourne la police contenue dans un fichier, à la taille demandée.
+        :param filename: le nom du fichier, ou son identifiant dans GameSettings.FILE_NAMES
+        :param size: la taille de la police
+        :return: la police partagée
+        """
+        filename = ResourceManager._filename(filename)
+        return self._acquire(('font', filename, size), lambda: ResourceManager._load_font(filename, size))
+
+    def is_cached(self, kind: str, filename: str or Files) -> bool:
+        """
+        Indique si une ressource est déjà en cache (peut être appelée depuis un autre fil d'exécution).
+        :param kind: 'image', 'frames', 'mask', 'sound' ou 'font'
+        :param filename: le nom du fichier, ou son identifiant dans GameSettings.FILE_NAMES
+        :return: True si la ressource est en cache, False sinon
+        """
+        filename = ResourceManager._filename(filename)
+        return any(key[0] == kind and key[1] == filename for key in list(self._resources))
+
+    def add_image(self, filename: str, surface: pygame.Surface) -> None:
+        """
+        Met en cache, sans y ajouter de référence, une image chargée ailleurs (voir level_loader.py).
+        :param filename: le nom du fichier dont l'image est tirée
+        :param surface: l'image, déjà convertie pour l'affichage
+        """
+        self._store(('image', filename, None), surface, ResourceManager._image_size(surface))
+
+    def add_mask(self, filename: str, mask: pygame.mask.Mask) -> None:
+        """
+        Met en cache, sans y ajouter de référence, un masque calculé ailleurs (voir level_compiler.py).
+        :param filename: le nom du fichier de l'image dont le masque est tiré
+        :param mask: le masque
+        """
+        width, height = mask.get_size()
+        self._store(('mask', filename, None), mask, (width * height + 7) // 8)
+
+    def add_sound(self, filename: str, sound: pygame.mixer.Sound or NullSound) -> None:
+        """
+        Met en cache, sans y ajouter de référence, un son chargé ailleurs (voir level_loader.py).
+        :param filename: le nom du fichier dont le son est tiré
+        :param sound: le son
+        """
+        self._store(('sound', filename, None), sound, ResourceManager._sound_size(sound))
+
+    def release(self, kind: str, filename: str or Files, parameter=None) -> None:
+        """
+        Retire une référence à une ressource, celle qu'a ajoutée la demande correspondante (ex. : font(FONT, 24)
+        se libère par release('font', FONT, 24), sans toucher aux autres tailles de la police).
+        :param kind: 'image', 'frames', 'mask', 'sound' ou 'font'
+        :param filename: le nom du fichier, ou son identifiant dans GameSettings.FILE_NAMES
+        :param parameter: le nombre d'images pour 'frames', la taille pour 'font' (None pour les autres types)
+        :return: aucun
+        """
+        resource = self._resources.get((kind, ResourceManager._filename(filename), parameter))
+        if resource is not None and resource.references > 0:
+            resource.references -= 1
+        self._evict()
+
+    def memory_used(self) -> int:
+        """ Retourne la taille estimée, en octets, de l'ensemble des ressources en cache. """
+        return self._memory_used
+
+    def usage(self) -> list:
+        """
+        Dresse la liste des ressources en cache (voir memory_profiler.py).
+        :return: une liste de tuples (type, fichier, paramètre, taille estimée en octets, nombre de références)
+        """
+        return [(kind, filename, parameter, resource.size, resource.references)
+                for (kind, filename, parameter), resource in self._resources.items()]
+
+    def _store(self, key: tuple, value, size: int) -> None:
+        if key not in self._resources:
+            self._resources[key] = _Resource(key[1], value, size)
+            self._memory_used += size
+            self._evict()
+
+    def _acquire(self, key: tuple, loader):
+        resource = self._resources.get(key)
+        if resource is None:
+            with Tracer().span(f"load {key[0]}", "asset", {"file": key[1]}):
+                value, size = loader()
+            resource = _Resource(key[1], value, size)
+            self._resources[key] = resource
+            self._memory_used += size
+        else:
+            self._resources.move_to_end(key)
+        resource.references += 1
+        self._evict()
+        return resource.value
+
+    def _peek_image(self, filename: str) -> pygame.Surface:
+        """ Retourne l'image d'un fichier sans y ajouter de référence (le masque est calculé à partir d'elle). """
+        resource = self._resources.get(('image', filename, None))
+        if resource is not None:
+            return resource.value
+        return ResourceManager._load_image(filename)[0]
+
+    def _load_frames(self, filename: str, nb_frames: int) -> tuple:
+        frames = [Atlas().image(frame_name(filename, frame)) for frame in range(nb_frames)]
+        if None in frames:
+            sprite_sheet = self._peek_image(filename)
+            frame_width = sprite_sheet.get_width() // nb_frames
+            frames = [sprite_sheet.subsurface((frame * frame_width, 0, frame_width, sprite_sheet.get_height()))
+                      for frame in range(nb_frames)]
+        return frames, sum(ResourceManager._image_size(frame) for frame in frames)
+
+    def _evict(self) -> None:
+        """ Évince les ressources non référencées les moins récemment utilisées, tant que le budget est dépassé. """
+        if self._memory_used <= GameSettings.RESOURCE_MEMORY_BUDGET:
+            return
+        for key in list(self._resources):
+            resource = self._resources[key]
+            if resource.references == 0:
+                del self._resources[key]
+                self._memory_used -= resource.size
+                if self._memory_used <= GameSettings.RESOURCE_MEMORY_BUDGET:
+                    return
+
+    @staticmethod
+    def _filename(filename: str or Files) -> str:
+        return GameSettings.FILE_NAMES[filename] if isinstance(filename, Files) else filename
+
+    @staticmethod
+    def _load_image(filename: str) -> tuple:
+        surface = Atlas().image(filename)
+        if surface is None:
+            surface = pygame.image.load(filename).convert_alpha()
+        return surface, ResourceManager._image_size(surface)
+
+    @staticmethod
+    def _image_size(surface: pygame.Surface) -> int:
+        return 4 * surface.get_width() * surface.get_height()
+
+    @staticmethod
+    def _build_mask(surface: pygame.Surface) -> tuple:
+        mask = pygame.mask.from_surface(surface)
+        width, height = mask.get_size()
+        return mask, (width * height + 7) // 8
+
+    @staticmethod
+    def _load_sound(filename: str) -> tuple:
+        sound = load_sound(filename)
+        return sound, ResourceManager._sound_size(sound)
+
+    @staticmethod
+    def _sound_size(sound: pygame.mixer.Sound or NullSound) -> int:
+        if isinstance(sound, NullSound):
+            return 0
+        frequency, sample_format, channels = pygame.mixer.get_init()
+        return int(sound.get_length() * frequency * channels * abs(sample_format) // 8)
+
+    @staticmethod
+    def _load_font(filename: str, size: int) -> tuple:
+        return pygame.font.Font(filename, size), os.path.getsize(filename)
@@ -20,3 +20,18 @@ class Scene(ABC):
     @abstractmethod
     def surface(self) -> pygame.Surface:
         pass
+
+    def invalidate(self) -> None:
+        """ Indique que l'écran a été modifié par autre chose que la scène (le prochain rendu doit être complet). """
+        pass
+
+    def release(self) -> None:
+        """ Libère les ressources partagées utilisées par la scène (appelée lorsqu'elle est retirée). """
+        pass
+
+    def dirty_rects(self) -> list or None:
+        """
+        Retourne les zones de l'écran modifiées par le dernier rendu.
+        :return: une liste de pygame.Rect, ou None si tout l'écran doit être rafraîchi
+        """
+        return None
@@ -1,7 +1,12 @@
 import pygame
 
+from asset_prefetcher import AssetPrefetcher
 from fade import Fade
+from frame_stats import FrameStats
+from memory_profiler import MemoryProfiler
 from scene import Scene
+from tracing import Tracer, traced
+from tween import TweenScheduler
 
 
 class SceneManager:
@@ -17,6 +22,8 @@ class SceneManager:
     def __init__(self) -> None:
         if not hasattr(self, '_initialized'):
             self._scenes = {}
+            self._factories = {}  # nom -> (fonction qui construit la scène, fichiers à précharger)
+            self._prefetchers = {}  # nom -> AssetPrefetcher en cours, pour les scènes pas encore construites
             self._current_scene = None
             self._next_scene = None
 
@@ -28,19 +35,62 @@ class SceneManager:
     def add_scene(self, name: str, scene: Scene) -> None:
         self._scenes[name] = scene
 
+    def add_scene_factory(self, name: str, factory, files: tuple = ((), (), ())) -> None:
+        """
+        Enregistre une scène qui ne sera construite qu'au moment d'y passer (set_scene() ou change_scene()), puis
+        de nouveau chaque fois qu'on y revient après qu'elle a été retirée.
+        :param name: le nom de la scène
+        :param factory: une fonction sans argument qui construit la scène
+        :param files: les ressources de la scène, en tuple (images, feuilles de sprites, sons), pour prefetch()
+        """
+        self._factories[name] = (factory, files)
+
+    def has_scene(self, name: str) -> bool:
+        return name in self._scenes or name in self._factories
+
+    def prefetch(self, name: str) -> None:
+        """
+        Commence à lire et décoder en arrière-plan les ressources d'une scène pas encore construite (voir
+        add_scene_factory()) : elles seront mises en cache juste avant sa construction.
+        :param name: le nom de la scène
+        """
+        if name in self._scenes or name in self._prefetchers or name not in self._factories:
+            return
+        _, (images, sprite_sheets, sounds) = self._factories[name]
+        prefetcher = AssetPrefetcher(images, sprite_sheets, sounds)
+        prefetcher.start()
+        self._prefetchers[name] = prefetcher
+
+    def clear(self) -> None:
+        """ Libère toutes les scènes et interrompt la transition en cours (voir replay.py). """
+        for scene in self._scenes.values():  # les scènes déjà retirées ont déjà été libérées
+            TweenScheduler().cancel(scene)
+            scene.release()
+        self._scenes.clear()
+        self._factories.clear()
+        self._prefetchers.clear()  # les fils d'arrière-plan se terminent d'eux-mêmes
+        self._current_scene = None
+        self._next_scene = None
+        self._fade = None
+        self._transitioning = False
+
     def set_scene(self, name: str) -> None:
-        self._current_scene = self._scenes.get(name, self._current_scene)
+        self._current_scene = self._scene(name) or self._current_scene
+        if self._current_scene:
+            self._current_scene.invalidate()
+            MemoryProfiler().scene_event(self._current_scene, 'enter')
 
     def change_scene(self, name: str, fade_duration: int = 0) -> None:
         if self._transitioning:
             return
+        Tracer().instant("change_scene", "scene", {"scene": name, "fade_duration": fade_duration})
 
         # Si la scène actuelle existe et n'est plus nécessaire, on peut la libérer
         if self._current_scene:
             self.remove_scene(self._current_scene)
 
         # Transition vers la nouvelle scène
-        self._next_scene = self._scenes.get(name, self._current_scene)
+        self._next_scene = self._scene(name) or self._current_scene
         self._fade = Fade(self._current_scene, self._next_scene)
         self._fade.start(fade_duration)
         self._transitioning = True
@@ -54,13 +104,35 @@ class SceneManager:
                 break
         if scene_name:
             del self._scenes[scene_name]
-
+        TweenScheduler().cancel(scene)
+        scene.release()
+        MemoryProfiler().scene_event(scene, 'exit')
+
+    def _scene(self, name: str) -> Scene or None:
+        """ Retourne la scène enregistrée sous un nom, en la construisant au besoin (voir add_scene_factory()). """
+        scene = self._scenes.get(name)
+        if scene is None and name in self._factories:
+            factory, _ = self._factories[name]
+            prefetcher = self._prefetchers.pop(name, None)
+            with Tracer().span(f"build scene {name}", "scene"):
+                if prefetcher:
+                    prefetcher.commit()
+                scene = factory()
+            self._scenes[name] = scene
+        return scene
+
+    @traced(category="scene")
     def update(self) -> None:
+        TweenScheduler().update()
+
+        stats = FrameStats()
         if self._current_scene:
-            self._current_scene.update()
+            with stats.scene(self._current_scene, 'update'):
+                self._current_scene.update()
 
         if self._next_scene:
-            self._next_scene.update()
+            with stats.scene(self._next_scene, 'update'):
+                self._next_scene.update()
 
         if self._transitioning:
             self._fade.update()
@@ -68,13 +140,42 @@ class SceneManager:
             if not self._fade.is_fading():
                 self._current_scene, self._next_scene = self._next_scene, None
                 self._transitioning = False
+                if self._current_scene:
+                    self._current_scene.invalidate()
+                    MemoryProfiler().scene_event(self._current_scene, 'enter')
 
+    @traced(category="scene")
     def render(self, screen: pygame.Surface) -> None:
+        if self._transitioning:
+            # pendant un fondu, les deux scènes se superposent : aucun rendu partiel possible
+            for scene in (self._current_scene, self._next_scene):
+                if scene:
+                    scene.invalidate()
+
+        stats = FrameStats()
         if self._current_scene:
-            self._current_scene.render(screen)
+            with stats.scene(self._current_scene, 'render'):
+                self._current_scene.render(screen)
         if self._next_scene:
-            self._next_scene.render(screen)
-
+            with stats.scene(self._next_scene, 'render'):
+                self._next_scene.render(screen)
+
+    def dirty_rects(self) -> list or None:
+        """
+        Retourne les zones de l'écran modifiées par le dernier rendu.
+        :return: une liste de pygame.Rect, ou None si tout l'écran doit être rafraîchi
+        """
+        if self._transitioning or self._current_scene is None:
+            return None
+        return self._current_scene.dirty_rects()
+
+    def invalidate(self) -> None:
+        """ Force le rendu complet des scènes affichées (l'écran a été modifié par ailleurs). """
+        for scene in (self._current_scene, self._next_scene):
+            if scene:
+                scene.invalidate()
+
+    @traced(category="scene")
     def handle_event(self, event: pygame.event.Event) -> None:
         if self._current_scene:
             self._current_scene.handle_event(event)
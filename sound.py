@@ -0,0 +1,36 @@
+import pygame
+
+from game_settings import GameSettings
+
+
+class NullSound:
+    """ Son muet, utilisé à la place de pygame.mixer.Sound lorsque le jeu roule sans périphérique audio. """
+
+    def play(self, *args, **kwargs) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+    def fadeout(self, time: int) -> None:
+        pass
+
+    def set_volume(self, value: float) -> None:
+        pass
+
+    def get_volume(self) -> float:
+        return 0.0
+
+    def get_length(self) -> float:
+        return 0.0
+
+
+def load_sound(filename: str) -> pygame.mixer.Sound or NullSound:
+    """
+    Charge un son, ou retourne un son muet en mode sans affichage (headless).
+    :param filename: le nom du fichier audio
+    :return: le son chargé
+    """
+    if GameSettings.HEADLESS or not pygame.mixer.get_init():
+        return NullSound()
+    return pygame.mixer.Sound(filename)
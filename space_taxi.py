@@ -14,25 +14,58 @@
   Eric Drouin
   Novembre 2024
 """
+import argparse
 import os
+import random
+import time
+from functools import partial
+
+_LAUNCH_TIME = time.perf_counter()  # avant l'importation de pygame et des scènes : voir le temps de démarrage
 
 from black_scene import BlackScene
+from frame_stats import FrameStats
 from game_over_scene import GameOver
 
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
 import pygame
 import sys
 
+from game_clock import GameClock
 from game_settings import GameSettings, Files
+from headless import enable_headless
+from input_state import InputManager
+from level_compiler import available_levels
 from level_loading_scene import LevelLoadingScene
+from level_scene import LevelScene
+from memory_profiler import MemoryProfiler
+from performance_overlay import PerformanceOverlay
+from replay import Replay, seed_random
 from scene_manager import SceneManager
 from splash_scene import SplashScene
+from tracing import Tracer
 
 
 def main() -> None:
     """ Programme principal. """
+    args = _parse_arguments()
+    if args.trace:
+        Tracer().enable(args.trace_buffer)
+    memory_profiler = MemoryProfiler()
+    if args.memory_profile:
+        memory_profiler.enable(args.memory_budget)
+    if args.headless:
+        enable_headless()
+    if args.dirty_rects:
+        GameSettings.DIRTY_RECTS = True
+
     pygame.init()
-    pygame.mixer.init()
+    if not GameSettings.HEADLESS:
+        pygame.mixer.init()
+
+    recording = None
+    if args.record:
+        recording = Replay(args.level, random.randrange(1 << 32), not GameSettings.HEADLESS)
+        seed_random(recording.seed)
 
     settings = GameSettings()
     screen = pygame.display.set_mode((settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT))
@@ -40,52 +73,176 @@ def main() -> None:
     window_icon = pygame.image.load(GameSettings.FILE_NAMES[Files.IMG_SPACE_TAXI_ICON])
     pygame.display.set_icon(window_icon)
 
-    clock = pygame.time.Clock()
+    clock = GameClock()
+    input_manager = InputManager()
 
-    show_fps = False
-
-    if show_fps:
-        fps_font = pygame.font.Font(None, 36)
+    frame_stats = FrameStats()
+    frame_stats.set_target_fps(args.fps)
+    if args.perf_export:
+        frame_stats.keep_history()
+    overlay = PerformanceOverlay(args.perf_overlay)
 
+    # chaque scène n'est construite qu'au moment d'y passer : le démarrage ne charge que l'écran titre
     scene_manager = SceneManager()
     scene_manager.add_scene("black", BlackScene())
-    scene_manager.add_scene("splash", SplashScene())
-    scene_manager.add_scene("level1_load", LevelLoadingScene(1))
-    scene_manager.add_scene("level2_load", LevelLoadingScene(2))
-    scene_manager.add_scene("game_over", GameOver())
-
-    scene_manager.set_scene("black")
-    scene_manager.change_scene("splash", SplashScene.FADE_IN_DURATION)
+    scene_manager.add_scene_factory("splash", SplashScene)
+    for level in available_levels():
+        scene_manager.add_scene_factory(f"level{level}_load", partial(LevelLoadingScene, level),
+                                        LevelLoadingScene.required_files())
+    scene_manager.add_scene_factory("game_over", GameOver, GameOver.required_files())
+
+    level_scene = None
+    if args.level:
+        # démarrage direct dans un niveau, sans écran titre ni chargement
+        level_scene = LevelScene(args.level)
+        scene_manager.add_scene(f"level{args.level}", level_scene)
+        scene_manager.set_scene(f"level{args.level}")
+    else:
+        scene_manager.set_scene("black")
+        scene_manager.change_scene("splash", SplashScene.FADE_IN_DURATION)
+
+    nb_ticks = 0
+    start_time = time.perf_counter()
+    startup_measured = bool(args.level)  # le temps de démarrage se mesure jusqu'à la première trame de l'écran titre
 
     try:
-        while True:
-            clock.tick(settings.FPS) / 1000
-
-            scene_manager.update()
-
-            scene_manager.render(screen)
-
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    quit_game()
-                scene_manager.handle_event(event)
-
-            if show_fps:
-                fps = clock.get_fps()
-                fps_text = fps_font.render(f"FPS: {int(fps)}", True, (255, 255, 255))
-                screen.blit(fps_text, (10, 10))
-
-            pygame.display.flip()
+        while args.ticks is None or nb_ticks < args.ticks:
+            clock.tick(args.fps)
+            frame_stats.begin_frame()
+            memory_profiler.begin_frame()
+
+            # la simulation avance par pas fixes, indépendamment de la cadence d'affichage
+            with frame_stats.phase('update'):
+                for _ in range(clock.pending_steps()):
+                    clock.step()
+                    input_state = input_manager.poll()
+                    if recording:
+                        recording.record(input_state)
+                    scene_manager.update()
+
+                    # l'enregistrement s'arrête lorsque le niveau est quitté (niveau terminé, fin de partie)
+                    if recording and not scene_manager.has_scene(f"level{args.level}"):
+                        _save_recording(recording, level_scene, args.record)
+                        recording = None
+
+            with frame_stats.phase('render'):
+                scene_manager.render(screen)
+
+            with frame_stats.phase('events'):
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        quit_game()
+                    if overlay.handle_event(event):
+                        scene_manager.invalidate()  # l'écran sous la superposition doit être redessiné
+                        continue
+                    input_manager.handle_event(event)
+                    scene_manager.handle_event(event)
+
+            overlay.render(screen)
+
+            if not GameSettings.HEADLESS:
+                with frame_stats.phase('flip'):
+                    dirty_rects = scene_manager.dirty_rects()
+                    if dirty_rects is None or overlay.visible:
+                        pygame.display.flip()
+                    else:
+                        pygame.display.update(dirty_rects)
+
+            if not startup_measured:
+                _report_startup_time(time.perf_counter() - _LAUNCH_TIME)
+                startup_measured = True
+
+            memory_profiler.end_frame()  # avant FrameStats, dont l'historique n'est pas une allocation du jeu
+            frame_stats.end_frame()
+            nb_ticks += 1
 
     except KeyboardInterrupt:
-        quit_game()
-
-
-def quit_game() -> None:
-    """ Quitte le programme. """
+        pass
+    finally:
+        if recording:
+            _save_recording(recording, level_scene, args.record)
+        if args.perf_export:
+            frame_stats.export(args.perf_export)
+            print(f"mesures de performance exportées : {args.perf_export}")
+        if args.memory_profile:
+            memory_profiler.save(args.memory_profile)
+            print(f"mesures de mémoire enregistrées : {args.memory_profile} "
+                  f"(rapport : python memory_profiler.py {args.memory_profile})")
+        if args.trace:
+            nb_dropped = Tracer().save(args.trace)
+            print(f"trace enregistrée : {args.trace}" + (f" ({nb_dropped} événements plus anciens perdus)"
+                                                         if nb_dropped else ""))
+
+    if GameSettings.HEADLESS:
+        elapsed_time = time.perf_counter() - start_time
+        print(f"{nb_ticks} ticks en {elapsed_time:.2f} s ({nb_ticks / max(elapsed_time, 1e-9):.0f} ticks/s)")
+
+    if memory_profiler.nb_over_budget():
+        print(f"budget d'allocation dépassé dans {memory_profiler.nb_over_budget()} trame(s)")
+    quit_game(1 if memory_profiler.nb_over_budget() else 0)
+
+
+def _report_startup_time(seconds: float) -> None:
+    """ Signale le temps écoulé entre le lancement du programme et la première trame de l'écran titre. """
+    startup_ms = seconds * 1000
+    FrameStats().set_startup_time(startup_ms)
+    Tracer().instant("first splash frame", "frame", {"startup_ms": startup_ms})
+    if startup_ms > GameSettings.STARTUP_BUDGET_MS:
+        print(f"attention : démarrage en {startup_ms:.0f} ms (budget : {GameSettings.STARTUP_BUDGET_MS} ms)",
+              file=sys.stderr)
+    elif GameSettings.HEADLESS:
+        print(f"démarrage en {startup_ms:.0f} ms (budget : {GameSettings.STARTUP_BUDGET_MS} ms)")
+
+
+def _save_recording(recording: Replay, level_scene: LevelScene, filename: str) -> None:
+    recording.finish(level_scene)
+    recording.save(filename)
+    print(f"partie enregistrée : {filename} ({len(recording.states)} pas)")
+
+
+def quit_game(exit_code: int = 0) -> None:
+    """
+    Quitte le programme.
+    :param exit_code: le code de sortie
+    """
     pygame.mixer.music.stop()
     pygame.quit()
-    sys.exit(0)
+    sys.exit(exit_code)
+
+
+def _parse_arguments() -> argparse.Namespace:
+    """ Analyse les arguments de la ligne de commande. """
+    parser = argparse.ArgumentParser(description="Tribute to Space Taxi!")
+    parser.add_argument("--headless", action="store_true",
+                        help="sans fenêtre ni audio, boucle de jeu non limitée (tests d'endurance, bots)")
+    parser.add_argument("--level", type=int, default=None,
+                        help="démarre directement dans le niveau indiqué")
+    parser.add_argument("--ticks", type=int, default=None,
+                        help="nombre d'itérations de la boucle de jeu avant de quitter")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="rendu partiel : ne rafraîchit que les zones modifiées de l'écran")
+    parser.add_argument("--fps", type=int, default=GameSettings.FPS,
+                        help="cadence d'affichage maximale (la simulation reste à GameSettings.SIMULATION_RATE)")
+    parser.add_argument("--record", metavar="FICHIER", default=None,
+                        help="enregistre la partie pour la rejouer avec replay.py (avec --level seulement)")
+    parser.add_argument("--perf-overlay", action="store_true",
+                        help="affiche dès le départ la superposition de performance (F3 pour l'afficher ou la masquer)")
+    parser.add_argument("--perf-export", metavar="FICHIER", default=None,
+                        help="exporte en quittant les mesures de chaque trame (.csv) ou leur résumé (.json)")
+    parser.add_argument("--memory-profile", metavar="FICHIER", default=None,
+                        help="mesure la mémoire (tracemalloc) et enregistre les mesures en quittant")
+    parser.add_argument("--memory-budget", type=int, default=None, metavar="OCTETS",
+                        help="allocation maximale par trame (avec --memory-profile) : code de sortie 1 si dépassée")
+    parser.add_argument("--trace", metavar="FICHIER", default=None,
+                        help="enregistre en quittant une trace des intervalles (format Chrome, à ouvrir dans Perfetto)")
+    parser.add_argument("--trace-buffer", type=int, default=Tracer.DEFAULT_CAPACITY, metavar="N",
+                        help="nombre d'événements de trace conservés (les plus récents)")
+    args = parser.parse_args()
+    if args.record and not args.level:
+        parser.error("--record doit être accompagné de --level")
+    if args.memory_budget is not None and not args.memory_profile:
+        parser.error("--memory-budget doit être accompagné de --memory-profile")
+    return args
 
 
 if __name__ == '__main__':
@@ -0,0 +1,52 @@
+import pygame
+
+
+class SpatialGrid:
+    """
+    Index spatial des éléments immobiles d'un niveau : une grille uniforme dont chaque cellule connaît les éléments
+    qui la recouvrent. Une recherche ne parcourt que les cellules couvertes par le rectangle demandé, son coût ne
+    dépend donc pas du nombre total d'éléments du niveau.
+    """
+
+    _DEFAULT_CELL_SIZE: int = 64  # px
+
+    def __init__(self, cell_size: int = _DEFAULT_CELL_SIZE) -> None:
+        """
+        Initialise une grille vide.
+        :param cell_size: la taille (largeur et hauteur) d'une cellule, en pixels
+        """
+        self._cell_size = cell_size
+        self._cells = {}  # (colonne, rangée) -> liste de (ordre d'insertion, élément)
+        self._nb_items = 0
+
+    def insert(self, item: pygame.sprite.Sprite) -> None:
+        """
+        Ajoute un élément à la grille, dans toutes les cellules que recouvre son rectangle (item.rect).
+        :param item: l'élément à ajouter (sa position ne doit plus changer)
+        """
+        entry = (self._nb_items, item)
+        for cell in self._cells_of(item.rect):
+            self._cells.setdefault(cell, []).append(entry)
+        self._nb_items += 1
+
+    def query(self, rect: pygame.Rect) -> list:
+        """
+        Retourne les éléments dont le rectangle touche celui demandé.
+        :param rect: le rectangle de recherche
+        :return: la liste des éléments, dans l'ordre où ils ont été ajoutés
+        """
+        found = {}
+        for cell in self._cells_of(rect):
+            for order, item in self._cells.get(cell, ()):
+                if order not in found and rect.colliderect(item.rect):
+                    found[order] = item
+        return [found[order] for order in sorted(found)]
+
+    def __len__(self) -> int:
+        return self._nb_items
+
+    def _cells_of(self, rect: pygame.Rect):
+        size = self._cell_size
+        for column in range(rect.left // size, (rect.right - 1) // size + 1):
+            for row in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                yield column, row
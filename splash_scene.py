@@ -1,9 +1,13 @@
 import pygame
 import pygame.freetype  # Module for font rendering
 
+from game_clock import GameClock
+from input_state import InputManager
 from scene import Scene
 from scene_manager import SceneManager
 from game_settings import GameSettings, Files
+from resources import ResourceManager
+from tween import Tween, TweenScheduler
 
 
 class SplashScene(Scene):
@@ -11,57 +15,38 @@ class SplashScene(Scene):
 
     _FADE_OUT_DURATION: int = 1500  # ms
     FADE_IN_DURATION: int = 1500  # ms
+    _TEXT_PULSE_DURATION: float = 0.57  # s, pour passer de transparent à opaque (et inversement)
 
     def __init__(self) -> None:
         super().__init__()
-        self._surface = pygame.image.load(GameSettings.FILE_NAMES[Files.IMG_SPLASH]).convert_alpha()
-        self._music = pygame.mixer.Sound(GameSettings.FILE_NAMES[Files.SND_SPLASH])
+        self._surface = ResourceManager().image(Files.IMG_SPLASH).copy()  # copie : modifiée par les fondus
+        self._music = ResourceManager().sound(Files.SND_SPLASH)
         self._music.play(loops=-1, fade_ms=1000)
         self._fade_out_start_time = None
 
         self._font = pygame.freetype.Font(GameSettings.FILE_NAMES[Files.FONT], 16)
         self._text_alpha = 0
-        self._fade_in = True
+        TweenScheduler().add(Tween(self, '_text_alpha', 0, 255, SplashScene._TEXT_PULSE_DURATION, repeat=-1, yoyo=True))
+
+        SceneManager().prefetch("level1_load")  # l'écran de chargement est prêt quand le joueur appuie
 
-        pygame.joystick.init()
-        if pygame.joystick.get_count() > 0:
-            self.joystick = pygame.joystick.Joystick(0)
-            self.joystick.init()
-        else:
-            self.joystick = None
 
     def handle_event(self, event: pygame.event.Event) -> None:
         """ Gère les événements du clavier et du joystick. """
-        is_key_event = (event.type == pygame.KEYDOWN and event.key in (pygame.K_RETURN, pygame.K_SPACE))
-        is_joy_event = (event.type == pygame.JOYBUTTONDOWN and pygame.joystick.Joystick(0).get_button(9))
-
-        if event.type in (pygame.KEYDOWN, pygame.JOYBUTTONDOWN):
-           if is_key_event or is_joy_event:
-                self._music.stop()
-                self._fade_out_start_time = pygame.time.get_ticks()
-                SceneManager().change_scene("level1_load", SplashScene._FADE_OUT_DURATION)
+        if InputManager.is_start_event(event):
+            self._music.stop()
+            self._fade_out_start_time = GameClock().get_ticks()
+            SceneManager().change_scene("level1_load", SplashScene._FADE_OUT_DURATION)
 
 
     def update(self) -> None:
         if self._fade_out_start_time:
-            elapsed_time = pygame.time.get_ticks() - self._fade_out_start_time
+            elapsed_time = GameClock().get_ticks() - self._fade_out_start_time
             volume = max(0.0, 1.0 - (elapsed_time / SplashScene._FADE_OUT_DURATION))
             self._music.set_volume(volume)
             if volume == 0:
                 self._fade_out_start_time = None
 
-        # Animate the text
-        if self._fade_in:
-            self._text_alpha += 5
-            if self._text_alpha >= 255:
-                self._text_alpha = 255
-                self._fade_in = False
-        else:
-            self._text_alpha -= 5
-            if self._text_alpha <= 0:
-                self._text_alpha = 0
-                self._fade_in = True
-
     def render(self, screen: pygame.Surface) -> None:
         screen.blit(self._surface, (0, 0))
 
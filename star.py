@@ -7,14 +7,21 @@ from game_settings import GameSettings
 
 
 class Star:
+    _random = random.Random()  # vitesses aléatoires (voir seed_random())
+
     def __init__(self, angle: int, position_initial: pygame.Vector2):
         self.position_initial = position_initial
         self.x, self.y = self.position_initial
         self.angle = math.radians(angle)
         self.speed_star = 0
 
+    @staticmethod
+    def seed_random(seed: int) -> None:
+        """ Initialise le générateur aléatoire des étoiles, pour qu'une partie puisse être rejouée à l'identique. """
+        Star._random.seed(seed)
+
     def move_direction(self):
-        self.speed_star += random.randint(1, 10)
+        self.speed_star += Star._random.randint(1, 10)
 
         self.x = self.position_initial[0] + self.speed_star * math.cos(self.angle)
         self.y = self.position_initial[1] + self.speed_star * math.sin(self.angle)
@@ -1,16 +1,18 @@
-import time
 from enum import Enum, auto
 
 import pygame
 from pygame import Vector2
 
 from fatal_error import FatalError
+from game_clock import GameClock
 from game_settings import GameSettings, Files
 from astronaut import Astronaut, AstronautState
 from hud import HUD
+from input_state import InputState
 
 from pad import Pad
 from pump import Pump
+from resources import ResourceManager
 
 
 class ImgSelector(Enum):
@@ -44,9 +46,18 @@ class Taxi(pygame.sprite.Sprite):
     _FLAG_GEAR_OUT = 1 << 4  # indique si le train d'atterrissage est sorti
     _FLAG_GEAR_SHOCKS = 1 << 5  # indique si le train d'atterrissage est compressé
     _FLAG_DESTROYED = 1 << 6  # indique si le taxi est détruit
+    _NB_FLAG_COMBINATIONS = 1 << 7
+
+    _cached_surfaces = None  # images partagées par tous les taxis (par état, puis par orientation)
+    _cached_masks = None
+    _cached_mask_bottoms = None
+    _cached_images_by_flags = None  # (image, masque) pour chaque combinaison d'indicateurs
 
     _REACTOR_SOUND_VOLUME = 0.25
 
+    _GEAR_KEY = pygame.K_SPACE  # sortir ou rentrer le train d'atterrissage
+    _GEAR_BUTTON = 1
+
     _REAR_REACTOR_POWER = 0.001
     _BOTTOM_REACTOR_POWER = 0.0005
     _TOP_REACTOR_POWER = 0.00025
@@ -75,27 +86,27 @@ class Taxi(pygame.sprite.Sprite):
         super(Taxi, self).__init__()
 
         self._initial_pos = pos
+        self.collision_world = None  # décor immobile du niveau, pour le balayage des déplacements rapides
 
         self._hud = HUD()
         try:
-            self._reactor_sound = pygame.mixer.Sound(GameSettings.FILE_NAMES[Files.SND_REACTOR])
+            self._reactor_sound = ResourceManager().sound(Files.SND_REACTOR)
             self._reactor_sound.set_volume(0)
             self._reactor_sound.play(-1)
 
-            self._crash_sound = pygame.mixer.Sound(GameSettings.FILE_NAMES[Files.SND_CRASH])
+            self._crash_sound = ResourceManager().sound(Files.SND_CRASH)
 
-            self._smooth_landing_sound = pygame.mixer.Sound(GameSettings.FILE_NAMES[Files.SMOOTH_LANDING])
-            self._rough_landing_sound = pygame.mixer.Sound(GameSettings.FILE_NAMES[Files.ROUGH_LANDING])
+            self._smooth_landing_sound = ResourceManager().sound(Files.SMOOTH_LANDING)
+            self._rough_landing_sound = ResourceManager().sound(Files.ROUGH_LANDING)
             self._has_unboarded = False
-            self._surfaces, self._masks = Taxi._load_and_build_surfaces()
+            if Taxi._cached_images_by_flags is None:
+                Taxi._build_shared_images()
 
             self._fuel_status = 100
             self._fuel_consumption = 0.0
 
             self.door_position = 0
 
-            pygame.joystick.init()
-
             self._reinitialize()
         except FileNotFoundError as e:
             directory_plus_filename = str(e).split("'")[1]
@@ -122,37 +133,47 @@ class Taxi(pygame.sprite.Sprite):
         if self._flags & Taxi._FLAG_DESTROYED == Taxi._FLAG_DESTROYED:
             return False
 
+        if not self.rect.colliderect(obstacle.rect):
+            return False
+
         #Aidé par ChatGPT
         offset = (obstacle.rect.x - self.rect.x, obstacle.rect.y - self.rect.y)
         if isinstance(obstacle, Pad):
-            taxi_mask = self._masks[ImgSelector.IDLE][self._flags & Taxi._FLAG_LEFT]
-            fire_mask = self._masks[ImgSelector.BOTTOM_REACTOR][self._flags & Taxi._FLAG_LEFT]
+            taxi_mask = Taxi._cached_masks[ImgSelector.IDLE][self._flags & Taxi._FLAG_LEFT]
+            fire_mask = Taxi._cached_masks[ImgSelector.BOTTOM_REACTOR][self._flags & Taxi._FLAG_LEFT]
             fire_collision = fire_mask.overlap(obstacle.mask, offset)
             full_collision = taxi_mask.overlap(obstacle.mask, offset)
 
             if fire_collision and not full_collision:
                 return False
 
-        if self.rect.colliderect(obstacle.rect):
-            if pygame.sprite.collide_mask(self, obstacle):
-                self._flags = self._FLAG_DESTROYED
-                self._crash_sound.play()
-                self._velocity = pygame.Vector2(0.0, 0.0)
-                self._acceleration = pygame.Vector2(0.0, Taxi._CRASH_ACCELERATION)
-                self._fuel_status = 100
-                self._hud.set_current_fuel(self._fuel_status)
-                return True
+        if pygame.sprite.collide_mask(self, obstacle):
+            self._flags = self._FLAG_DESTROYED
+            self._crash_sound.play()
+            self._velocity = pygame.Vector2(0.0, 0.0)
+            self._acceleration = pygame.Vector2(0.0, Taxi._CRASH_ACCELERATION)
+            self._fuel_status = 100
+            self._hud.set_current_fuel(self._fuel_status)
+            return True
 
         return False
 
-    def draw(self, surface: pygame.Surface) -> None:
-        """ Dessine le taxi sur la surface fournie comme argument. """
-        surface.blit(self.image, self.rect)
+    def draw(self, surface: pygame.Surface) -> pygame.Rect:
+        """
+        Dessine le taxi sur la surface fournie comme argument, à une position interpolée entre
+        les deux derniers pas de simulation (l'affichage peut être plus fréquent que la simulation).
+        :return: la zone de la surface où le taxi a été dessiné
+        """
+        return surface.blit(self.image, self.draw_area())
+
+    def draw_area(self) -> pygame.Rect:
+        """ Retourne, sans dessiner, la zone que draw() couvrirait (à la même position interpolée). """
+        position = self._previous_position.lerp(self._position, GameClock().interpolation())
+        return self.image.get_rect(topleft=(round(position.x), round(position.y)))
 
-    def handle_event(self, event: pygame.event.Event) -> None:
-        """ Gère les événements du taxi. """
-        if (event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE) or \
-                (event.type == pygame.JOYBUTTONDOWN and event.button == 1):
+    def _handle_gear(self, input_state: InputState) -> None:
+        """ Sort ou rentre le train d'atterrissage si le joueur l'a demandé depuis le pas précédent. """
+        if input_state.was_key_pressed(Taxi._GEAR_KEY) or input_state.was_button_pressed(Taxi._GEAR_BUTTON):
             if self._pad_landed_on is None:
                 if self._flags & Taxi._FLAG_GEAR_OUT != Taxi._FLAG_GEAR_OUT:
                     # Pas de réacteurs du dessus et arrière lorsque le train d'atterrissage est sorti
@@ -183,10 +204,7 @@ class Taxi(pygame.sprite.Sprite):
                 astronaut.play_hey_clip()
                 if self._has_unboarded:
                     astronaut._state = AstronautState.REACHED_DESTINATION
-                    hitting_fines = self._hud._last_saved_money / 2
-                    self._hud._bank_money -= hitting_fines
-                    self._hud._bank_money_surface = self._hud._render_bank_money_surface()
-                    self._hud._last_saved_money = 0.0
+                    self._hud.pay_hitting_fine()
                     self._has_unboarded = False
                     return False
                 return True
@@ -216,36 +234,23 @@ class Taxi(pygame.sprite.Sprite):
         if not self.rect.colliderect(pad.rect):
             return False
 
-        taxi_edges_position = (self.rect.left, self.rect.right)
-
-        visible_platform = 0
-        invisible_left_image = 0
-        invisible_right_image = 0
-
-        pad.image.lock()
-        for x in range(pad.image.get_width()):
-            r, g, b, a = pad.image.get_at((x, 0))
-            if a != 0:
-                visible_platform += 1
-            elif a == 0 and visible_platform == 0:
-                invisible_left_image += 1
-            elif a == 0:
-                invisible_right_image += 1
-        pad.image.unlock()
-
-        platform_edges_position = (pad.rect.left + invisible_left_image, pad.rect.right - invisible_right_image)
-
-        if taxi_edges_position[0] < platform_edges_position[0] or taxi_edges_position[1] > platform_edges_position[1]:
+        if self.rect.left < pad.platform_left or self.rect.right > pad.platform_right:
             return False
 
-        if pygame.sprite.collide_mask(self, pad):
+        # le taxi est au-dessus de la surface d'atterrissage : il la touche quand sa rangée opaque la plus basse
+        # franchit, pendant ce pas, la première rangée opaque de la plateforme (un taxi déjà posé y reste) ;
+        # un taxi qui se trouve plus bas, sous une plateforme flottante par exemple, n'y atterrit pas
+        mask_bottom = Taxi._cached_mask_bottoms[self.mask]
+        previous_bottom = round(self._previous_position.y) + mask_bottom
+        touches_platform = self.rect.top + mask_bottom > pad.landing_y
+        if touches_platform and (previous_bottom <= pad.landing_y or self._pad_landed_on is pad):
             self.rect.bottom = pad.rect.top + 4
             self._position.y = float(self.rect.y)
             self._flags &= Taxi._FLAG_LEFT | Taxi._FLAG_GEAR_OUT
 
             if self._velocity.x > self._MIN_VELOCITY_SLIDE or self._velocity.x < -self._MIN_VELOCITY_SLIDE:
                 self._sliding = True
-                self._last_slide_frame_time = time.time()
+                self._last_slide_frame_time = GameClock().time()
                 self._accumulated_slide_frame_time = 0
                 self._top_slide_length = self._velocity.x * self._SLIDE_POWER
                 if self._top_slide_length > self._max_slide_length:
@@ -254,7 +259,7 @@ class Taxi(pygame.sprite.Sprite):
                     self._top_slide_length = -self._max_slide_length
 
             if Taxi._MAX_VELOCITY_ROUGH_LANDING > self._velocity.y > Taxi._MAX_VELOCITY_SMOOTH_LANDING:
-                self._last_rough_landing_frame_time = time.time()
+                self._last_rough_landing_frame_time = GameClock().time()
                 self._accumulated_rough_landing_frame_time = 0
                 self._rough_landing = True
                 self._rough_landing_sound.play()
@@ -306,15 +311,21 @@ class Taxi(pygame.sprite.Sprite):
         self._has_unboarded = True
         self._astronaut = None
 
-    def update(self, *args, **kwargs) -> None:
+    def update(self, input_state: InputState = None, *args, **kwargs) -> None:
         """
-        Met à jour le taxi. Cette méthode est appelée à chaque itération de la boucle de jeu.
+        Met à jour le taxi. Cette méthode est appelée à chaque pas de simulation (durée fixe).
+        :param input_state: l'état des commandes pour ce pas (aucune commande si absent)
         :param args: inutilisé
         :param kwargs: inutilisé
         """
+        if input_state is None:
+            input_state = InputState()
+
+        self._previous_position.update(self._position)
 
-        # ÉTAPE 1 - gérer les touches présentement enfoncées
-        self._handle_keys()
+        # ÉTAPE 1 - gérer le train d'atterrissage et les commandes présentement enfoncées
+        self._handle_gear(input_state)
+        self._handle_keys(input_state)
 
         # ÉTAPE 2 - Trouver la position de la porte du taxi
         if self._flags & Taxi._FLAG_LEFT == Taxi._FLAG_LEFT:
@@ -323,7 +334,7 @@ class Taxi(pygame.sprite.Sprite):
             self.door_position = self.rect.x + self._TAXI_DOOR_OFFSET_RIGHT
 
         # ÉTAPE 3 - gérer le taxi qui glisse et ses atterrissages limites
-        current_time = time.time()
+        current_time = GameClock().time()
         self._accumulated_slide_frame_time = current_time - self._last_slide_frame_time
         self._accumulated_rough_landing_frame_time = current_time - self._last_rough_landing_frame_time
 
@@ -355,8 +366,14 @@ class Taxi(pygame.sprite.Sprite):
         if self._pad_landed_on is None:
             self._velocity.y += Taxi._GRAVITY_ADD
 
+        start = pygame.Vector2(self._position)
         self._position += self._velocity
 
+        # un déplacement rapide s'arrête au premier contact plutôt que de traverser un obstacle mince
+        if self.collision_world and not self.is_destroyed():
+            time_of_impact = self.collision_world.time_of_impact(self.mask, start, self._position)
+            self._position = start.lerp(self._position, time_of_impact)
+
         self.rect.x = round(self._position.x)
         self.rect.y = round(self._position.y)
 
@@ -374,41 +391,41 @@ class Taxi(pygame.sprite.Sprite):
         # ÉTAPE 6 - sélectionner la bonne image en fonction de l'état du taxi
         self._select_image()
 
-    def _handle_keys(self) -> None:
+    def _handle_keys(self, input_state: InputState) -> None:
         """ Change ou non l'état du taxi en fonction des touches présentement enfoncées"""
         if self._flags & Taxi._FLAG_DESTROYED == Taxi._FLAG_DESTROYED:
             return
 
-        keys = pygame.key.get_pressed()
-        gamepad = pygame.joystick.Joystick(0) if pygame.joystick.get_count() > 0 else None
-        if gamepad:
-            gamepad.init()
+        left = input_state.is_key_held(pygame.K_LEFT)
+        right = input_state.is_key_held(pygame.K_RIGHT)
+        up = input_state.is_key_held(pygame.K_UP)
+        down = input_state.is_key_held(pygame.K_DOWN)
 
-        gamepad_left_x = gamepad.get_axis(0) if gamepad else 0
-        gamepad_left_y = gamepad.get_axis(1) if gamepad else 0
-        gamepad_right_x = gamepad.get_axis(3) if gamepad else 0
-        gamepad_right_y = gamepad.get_axis(4) if gamepad else 0
+        gamepad_left_x = input_state.axis(0)
+        gamepad_left_y = input_state.axis(1)
+        gamepad_right_x = input_state.axis(3)
+        gamepad_right_y = input_state.axis(4)
 
         gear_out = self._flags & (Taxi._FLAG_GEAR_OUT | Taxi._FLAG_GEAR_SHOCKS) != 0
 
         self._fuel_consumption = 0.0
 
-        if (keys[pygame.K_RIGHT] and keys[pygame.K_LEFT]) or (keys[pygame.K_UP] and keys[pygame.K_DOWN]) or \
+        if (right and left) or (up and down) or \
                 (gamepad_left_x < 0 < gamepad_left_x) or (gamepad_left_y < 0 < gamepad_left_y):
             return
 
-        if (keys[pygame.K_LEFT] or gamepad_right_x < -0.5) and not gear_out:
+        if (left or gamepad_right_x < -0.5) and not gear_out:
             self._flags |= Taxi._FLAG_LEFT | Taxi._FLAG_REAR_REACTOR
             self._acceleration.x = max(self._acceleration.x - Taxi._REAR_REACTOR_POWER, -Taxi._MAX_ACCELERATION_X)
             self._fuel_consumption += abs(self._acceleration.x)
 
-        if (keys[pygame.K_RIGHT] or gamepad_right_x > 0.5) and not gear_out:
+        if (right or gamepad_right_x > 0.5) and not gear_out:
             self._flags &= ~Taxi._FLAG_LEFT
             self._flags |= Taxi._FLAG_REAR_REACTOR
             self._acceleration.x = min(self._acceleration.x + Taxi._REAR_REACTOR_POWER, Taxi._MAX_ACCELERATION_X)
             self._fuel_consumption += abs(self._acceleration.x)
 
-        if keys[pygame.K_UP] or gamepad_right_y < -0.5:
+        if up or gamepad_right_y < -0.5:
             self._flags &= ~Taxi._FLAG_TOP_REACTOR
             self._flags |= Taxi._FLAG_BOTTOM_REACTOR
             self._acceleration.y = max(self._acceleration.y - Taxi._BOTTOM_REACTOR_POWER, -Taxi._MAX_ACCELERATION_Y_UP)
@@ -417,21 +434,21 @@ class Taxi(pygame.sprite.Sprite):
                 self._pad_landed_on = None
                 self.hide_gear()
 
-        if (keys[pygame.K_DOWN] or gamepad_right_y > 0.5) and not gear_out:
+        if (down or gamepad_right_y > 0.5) and not gear_out:
             self._flags &= ~Taxi._FLAG_BOTTOM_REACTOR
             self._flags |= Taxi._FLAG_TOP_REACTOR
             self._acceleration.y = min(self._acceleration.y + Taxi._TOP_REACTOR_POWER, Taxi._MAX_ACCELERATION_Y_DOWN)
             self._fuel_consumption += abs(self._acceleration.y)
 
-        if not (keys[pygame.K_LEFT] or keys[pygame.K_RIGHT] or abs(gamepad_left_x) > 0.1 or abs(gamepad_right_x) > 0.1):
+        if not (left or right or abs(gamepad_left_x) > 0.1 or abs(gamepad_right_x) > 0.1):
             self._flags &= ~Taxi._FLAG_REAR_REACTOR
             self._acceleration.x = 0.0
 
-        if not (keys[pygame.K_UP] or keys[pygame.K_DOWN] or abs(gamepad_right_y) > 0.1 or abs(gamepad_left_y) > 0.1):
+        if not (up or down or abs(gamepad_right_y) > 0.1 or abs(gamepad_left_y) > 0.1):
             self._flags &= ~(Taxi._FLAG_TOP_REACTOR | Taxi._FLAG_BOTTOM_REACTOR)
             self._acceleration.y = 0.0
 
-        if any(keys) or any([gamepad_left_x, gamepad_left_y, gamepad_right_x, gamepad_right_y]):
+        if input_state.is_any_key_held() or any([gamepad_left_x, gamepad_left_y, gamepad_right_x, gamepad_right_y]):
             self._fuel_status -= abs(self._fuel_consumption)
         else:
             self._fuel_consumption = 0.0
@@ -444,6 +461,12 @@ class Taxi(pygame.sprite.Sprite):
 
         self._hud.set_current_fuel(self._fuel_status)
 
+    def snapshot(self) -> tuple:
+        """ Retourne l'état du taxi qui détermine la suite de la simulation (voir replay.py). """
+        return (self._position.x, self._position.y, self._velocity.x, self._velocity.y, self._acceleration.x,
+                self._acceleration.y, self._flags, self._fuel_status,
+                self._pad_landed_on.number if self._pad_landed_on else 0)
+
     def is_refueling(self):
         if self._fuel_status < 100:
             self._fuel_status += 0.05
@@ -456,6 +479,12 @@ class Taxi(pygame.sprite.Sprite):
         if self._flags & (Taxi._FLAG_GEAR_OUT | Taxi._FLAG_GEAR_SHOCKS):  # Si le taxi a sorti ses pattes
             self._flags &= ~(Taxi._FLAG_GEAR_OUT | Taxi._FLAG_GEAR_SHOCKS)  # On enlève ses pattes
 
+    def release(self) -> None:
+        """ Libère les ressources partagées utilisées par le taxi. """
+        resources = ResourceManager()
+        for file in (Files.SND_REACTOR, Files.SND_CRASH, Files.SMOOTH_LANDING, Files.ROUGH_LANDING):
+            resources.release('sound', file)
+
     def _reinitialize(self) -> None:
         """ Initialise (ou réinitialise) les attributs de l'instance. """
         self._flags = 0
@@ -466,6 +495,7 @@ class Taxi(pygame.sprite.Sprite):
         self.rect.y = self._initial_pos[1] - self.rect.height / 2
 
         self._position = pygame.Vector2(self.rect.x, self.rect.y)
+        self._previous_position = pygame.Vector2(self._position)
         self._velocity = pygame.Vector2(0.0, 0.0)
         self._acceleration = pygame.Vector2(0.0, 0.0)
 
@@ -488,176 +518,120 @@ class Taxi(pygame.sprite.Sprite):
 
     def _select_image(self) -> None:
         """ Sélectionne l'image et le masque à utiliser pour l'affichage du taxi en fonction de son état. """
-        facing = self._flags & Taxi._FLAG_LEFT
+        self.image, self.mask = Taxi._cached_images_by_flags[self._flags]
 
         if self._flags & Taxi._FLAG_DESTROYED:
-            self.image = self._surfaces[ImgSelector.DESTROYED][facing]
-            self.mask = self._masks[ImgSelector.DESTROYED][facing]
             self._fuel_status = 100
-            return
+
+    @staticmethod
+    def _image_selector(flags: int) -> ImgSelector:
+        """
+        Détermine l'image de taxi correspondant à une combinaison d'indicateurs (sert à construire la table
+        de sélection : n'est pas appelée pendant la partie).
+        :param flags: les indicateurs d'état du taxi
+        :return: le sélecteur d'image
+        """
+        if flags & Taxi._FLAG_DESTROYED:
+            return ImgSelector.DESTROYED
 
         condition_flags = Taxi._FLAG_TOP_REACTOR | Taxi._FLAG_REAR_REACTOR
-        if self._flags & condition_flags == condition_flags:
-            self.image = self._surfaces[ImgSelector.TOP_AND_REAR_REACTORS][facing]
-            self.mask = self._masks[ImgSelector.TOP_AND_REAR_REACTORS][facing]
-            return
+        if flags & condition_flags == condition_flags:
+            return ImgSelector.TOP_AND_REAR_REACTORS
 
         condition_flags = Taxi._FLAG_BOTTOM_REACTOR | Taxi._FLAG_REAR_REACTOR
-        if self._flags & condition_flags == condition_flags:
-            self.image = self._surfaces[ImgSelector.BOTTOM_AND_REAR_REACTORS][facing]
-            self.mask = self._masks[ImgSelector.BOTTOM_AND_REAR_REACTORS][facing]
-            return
+        if flags & condition_flags == condition_flags:
+            return ImgSelector.BOTTOM_AND_REAR_REACTORS
 
-        if self._flags & Taxi._FLAG_REAR_REACTOR:
-            self.image = self._surfaces[ImgSelector.REAR_REACTOR][facing]
-            self.mask = self._masks[ImgSelector.REAR_REACTOR][facing]
-            return
+        if flags & Taxi._FLAG_REAR_REACTOR:
+            return ImgSelector.REAR_REACTOR
 
         condition_flags = Taxi._FLAG_GEAR_OUT | Taxi._FLAG_BOTTOM_REACTOR
-        if self._flags & condition_flags == condition_flags:
-            self.image = self._surfaces[ImgSelector.GEAR_OUT_AND_BOTTOM_REACTOR][facing]
-            self.mask = self._masks[ImgSelector.GEAR_OUT_AND_BOTTOM_REACTOR][facing]
-            return
+        if flags & condition_flags == condition_flags:
+            return ImgSelector.GEAR_OUT_AND_BOTTOM_REACTOR
 
-        if self._flags & Taxi._FLAG_BOTTOM_REACTOR:
-            self.image = self._surfaces[ImgSelector.BOTTOM_REACTOR][facing]
-            self.mask = self._masks[ImgSelector.BOTTOM_REACTOR][facing]
-            return
+        if flags & Taxi._FLAG_BOTTOM_REACTOR:
+            return ImgSelector.BOTTOM_REACTOR
 
-        if self._flags & Taxi._FLAG_TOP_REACTOR:
-            self.image = self._surfaces[ImgSelector.TOP_REACTOR][facing]
-            self.mask = self._masks[ImgSelector.TOP_REACTOR][facing]
-            return
+        if flags & Taxi._FLAG_TOP_REACTOR:
+            return ImgSelector.TOP_REACTOR
 
-        if self._flags & Taxi._FLAG_GEAR_OUT:
-            self.image = self._surfaces[ImgSelector.GEAR_OUT][facing]
-            self.mask = self._masks[ImgSelector.GEAR_OUT][facing]
-            return
+        if flags & Taxi._FLAG_GEAR_OUT:
+            return ImgSelector.GEAR_OUT
 
-        if self._flags & Taxi._FLAG_GEAR_SHOCKS:
-            self.image = self._surfaces[ImgSelector.GEAR_SHOCKS][facing]
-            self.mask = self._masks[ImgSelector.GEAR_SHOCKS][facing]
-            return
+        if flags & Taxi._FLAG_GEAR_SHOCKS:
+            return ImgSelector.GEAR_SHOCKS
 
-        self.image = self._surfaces[ImgSelector.IDLE][facing]
-        self.mask = self._masks[ImgSelector.IDLE][facing]
+        return ImgSelector.IDLE
+
+    @staticmethod
+    def _build_shared_images() -> None:
+        """
+        Construit, une seule fois pour tout le processus, les images et masques du taxi (partagés par toutes
+        les instances) ainsi que la table qui associe chaque combinaison d'indicateurs à son image et son masque.
+        """
+        Taxi._cached_surfaces, Taxi._cached_masks = Taxi._load_and_build_surfaces()
+        Taxi._cached_mask_bottoms = Taxi._compute_mask_bottoms(Taxi._cached_masks)
+
+        images_by_flags = []
+        for flags in range(Taxi._NB_FLAG_COMBINATIONS):
+            selector = Taxi._image_selector(flags)
+            facing = flags & Taxi._FLAG_LEFT
+            images_by_flags.append((Taxi._cached_surfaces[selector][facing], Taxi._cached_masks[selector][facing]))
+        Taxi._cached_images_by_flags = images_by_flags
+
+    @staticmethod
+    def _compute_mask_bottoms(masks: dict) -> dict:
+        """
+        Calcule, pour chaque masque du taxi, la position de sa rangée opaque la plus basse.
+        :param masks: les masques (par état, puis par orientation)
+        :return: un dictionnaire masque -> hauteur de la partie opaque (depuis le haut de l'image)
+        """
+        mask_bottoms = {}
+        for masks_by_facing in masks.values():
+            for mask in masks_by_facing:
+                bounding_rects = mask.get_bounding_rects()
+                mask_bottoms[mask] = max(rect.bottom for rect in bounding_rects) if bounding_rects else 0
+        return mask_bottoms
 
     @staticmethod
     def _load_and_build_surfaces() -> tuple:
         """
-        Charge et découpe la feuille de sprites (sprite sheet) pour le taxi.
+        Obtient les images (déjà découpées) de la feuille de sprites (sprite sheet) pour le taxi et les superpose.
         Construit les images et les masques pour chaque état.
         :return: un tuple contenant deux dictionnaires (avec les états comme clés):
                      - un dictionnaire d'images (pygame.Surface)
                      - un dictionnaire de masques (pygame.Mask)
         """
+        images = ResourceManager().frames(Taxi._TAXIS_FILENAME, Taxi._NB_TAXI_IMAGES)
+        taxi, bottom_reactor, top_reactor, rear_reactor, gear_out, gear_shocks = range(Taxi._NB_TAXI_IMAGES)
+
+        def compose(*layers: int) -> pygame.Surface:
+            surface = pygame.Surface(images[0].get_size(), flags=pygame.SRCALPHA)
+            for layer in layers:
+                surface.blit(images[layer], (0, 0))
+            return surface
+
+        compositions = {
+            ImgSelector.IDLE: compose(taxi),  # aucun réacteur - aucun train d'atterrissage
+            ImgSelector.BOTTOM_REACTOR: compose(taxi, bottom_reactor),
+            ImgSelector.TOP_REACTOR: compose(taxi, top_reactor),
+            ImgSelector.REAR_REACTOR: compose(taxi, rear_reactor),
+            ImgSelector.BOTTOM_AND_REAR_REACTORS: compose(taxi, bottom_reactor, rear_reactor),
+            ImgSelector.TOP_AND_REAR_REACTORS: compose(taxi, top_reactor, rear_reactor),
+            ImgSelector.GEAR_OUT: compose(taxi, gear_out),
+            ImgSelector.GEAR_SHOCKS: compose(gear_shocks),  # le train comprimé inclut le taxi
+            ImgSelector.GEAR_OUT_AND_BOTTOM_REACTOR: compose(taxi, bottom_reactor, gear_out),
+            ImgSelector.DESTROYED: pygame.transform.flip(compose(taxi), False, True),  # taxi à l'envers
+        }
+
         surfaces = {}
         masks = {}
-        sprite_sheet = pygame.image.load(Taxi._TAXIS_FILENAME).convert_alpha()
-        sheet_width = sprite_sheet.get_width()
-        sheet_height = sprite_sheet.get_height()
-
-        # taxi normal - aucun réacteur - aucun train d'atterrissage
-        surface = pygame.Surface((sheet_width / Taxi._NB_TAXI_IMAGES, sheet_height), flags=pygame.SRCALPHA)
-        source_rect = surface.get_rect()
-        surface.blit(sprite_sheet, (0, 0), source_rect)
-        flipped = pygame.transform.flip(surface, True, False)
-        surfaces[ImgSelector.IDLE] = surface, flipped
-        masks[ImgSelector.IDLE] = pygame.mask.from_surface(surface), pygame.mask.from_surface(flipped)
-
-        # taxi avec réacteur du dessous
-        surface = pygame.Surface((sheet_width / Taxi._NB_TAXI_IMAGES, sheet_height), flags=pygame.SRCALPHA)
-        source_rect = surface.get_rect()
-        surface.blit(sprite_sheet, (0, 0), source_rect)
-        source_rect.x = source_rect.width
-        surface.blit(sprite_sheet, (0, 0), source_rect)
-        flipped = pygame.transform.flip(surface, True, False)
-        surfaces[ImgSelector.BOTTOM_REACTOR] = surface, flipped
-        masks[ImgSelector.BOTTOM_REACTOR] = pygame.mask.from_surface(surface), pygame.mask.from_surface(flipped)
-
-        # taxi avec réacteur du dessus
-        surface = pygame.Surface((sheet_width / Taxi._NB_TAXI_IMAGES, sheet_height), flags=pygame.SRCALPHA)
-        source_rect = surface.get_rect()
-        surface.blit(sprite_sheet, (0, 0), source_rect)
-        source_rect.x = 2 * source_rect.width
-        surface.blit(sprite_sheet, (0, 0), source_rect)
-        flipped = pygame.transform.flip(surface, True, False)
-        surfaces[ImgSelector.TOP_REACTOR] = surface, flipped
-        masks[ImgSelector.TOP_REACTOR] = pygame.mask.from_surface(surface), pygame.mask.from_surface(flipped)
-
-        # taxi avec réacteur arrière
-        surface = pygame.Surface((sheet_width / Taxi._NB_TAXI_IMAGES, sheet_height), flags=pygame.SRCALPHA)
-        source_rect = surface.get_rect()
-        surface.blit(sprite_sheet, (0, 0), source_rect)
-        source_rect.x = 3 * source_rect.width
-        surface.blit(sprite_sheet, (0, 0), source_rect)
-        flipped = pygame.transform.flip(surface, True, False)
-        surfaces[ImgSelector.REAR_REACTOR] = surface, flipped
-        masks[ImgSelector.REAR_REACTOR] = pygame.mask.from_surface(surface), pygame.mask.from_surface(flipped)
-
-        # taxi avec réacteurs du dessous et arrière
-        surface = pygame.Surface((sheet_width / Taxi._NB_TAXI_IMAGES, sheet_height), flags=pygame.SRCALPHA)
-        source_rect = surface.get_rect()
-        surface.blit(sprite_sheet, (0, 0), source_rect)
-        source_rect.x = source_rect.width
-        surface.blit(sprite_sheet, (0, 0), source_rect)
-        source_rect.x = 3 * source_rect.width
-        surface.blit(sprite_sheet, (0, 0), source_rect)
-        flipped = pygame.transform.flip(surface, True, False)
-        surfaces[ImgSelector.BOTTOM_AND_REAR_REACTORS] = surface, flipped
-        masks[ImgSelector.BOTTOM_AND_REAR_REACTORS] = pygame.mask.from_surface(surface), pygame.mask.from_surface(
-            flipped)
-
-        # taxi avec réacteurs du dessus et arrière
-        surface = pygame.Surface((sheet_width / Taxi._NB_TAXI_IMAGES, sheet_height), flags=pygame.SRCALPHA)
-        source_rect = surface.get_rect()
-        surface.blit(sprite_sheet, (0, 0), source_rect)
-        source_rect.x = 2 * source_rect.width
-        surface.blit(sprite_sheet, (0, 0), source_rect)
-        source_rect.x = 3 * source_rect.width
-        surface.blit(sprite_sheet, (0, 0), source_rect)
-        flipped = pygame.transform.flip(surface, True, False)
-        surfaces[ImgSelector.TOP_AND_REAR_REACTORS] = surface, flipped
-        masks[ImgSelector.TOP_AND_REAR_REACTORS] = pygame.mask.from_surface(surface), pygame.mask.from_surface(flipped)
-
-        # taxi avec train d'atterrissage
-        surface = pygame.Surface((sheet_width / Taxi._NB_TAXI_IMAGES, sheet_height), flags=pygame.SRCALPHA)
-        source_rect = surface.get_rect()
-        surface.blit(sprite_sheet, (0, 0), source_rect)
-        source_rect.x = 4 * source_rect.width
-        surface.blit(sprite_sheet, (0, 0), source_rect)
-        flipped = pygame.transform.flip(surface, True, False)
-        surfaces[ImgSelector.GEAR_OUT] = surface, flipped
-        masks[ImgSelector.GEAR_OUT] = pygame.mask.from_surface(surface), pygame.mask.from_surface(flipped)
-
-        # taxi avec train d'atterrissage comprimé
-        surface = pygame.Surface((sheet_width / Taxi._NB_TAXI_IMAGES, sheet_height), flags=pygame.SRCALPHA)
-        source_rect = surface.get_rect()
-        source_rect.x = 5 * source_rect.width
-        surface.blit(sprite_sheet, (0, 0), source_rect)
-        flipped = pygame.transform.flip(surface, True, False)
-        surfaces[ImgSelector.GEAR_SHOCKS] = surface, flipped
-        masks[ImgSelector.GEAR_SHOCKS] = pygame.mask.from_surface(surface), pygame.mask.from_surface(flipped)
-
-        # taxi avec réacteur du dessous et train d'atterrissage
-        surface = pygame.Surface((sheet_width / Taxi._NB_TAXI_IMAGES, sheet_height), flags=pygame.SRCALPHA)
-        source_rect = surface.get_rect()
-        surface.blit(sprite_sheet, (0, 0), source_rect)
-        source_rect.x = source_rect.width
-        surface.blit(sprite_sheet, (0, 0), source_rect)
-        source_rect.x = 4 * source_rect.width
-        surface.blit(sprite_sheet, (0, 0), source_rect)
-        flipped = pygame.transform.flip(surface, True, False)
-        surfaces[ImgSelector.GEAR_OUT_AND_BOTTOM_REACTOR] = surface, flipped
-        masks[ImgSelector.GEAR_OUT_AND_BOTTOM_REACTOR] = masks[ImgSelector.GEAR_OUT]
+        for selector, surface in compositions.items():
+            flipped = pygame.transform.flip(surface, True, False)
+            surfaces[selector] = surface, flipped
+            masks[selector] = pygame.mask.from_surface(surface), pygame.mask.from_surface(flipped)
 
-        # taxi détruit
-        surface = pygame.Surface((sheet_width / Taxi._NB_TAXI_IMAGES, sheet_height), flags=pygame.SRCALPHA)
-        source_rect = surface.get_rect()
-        surface.blit(sprite_sheet, (0, 0), source_rect)
-        surface = pygame.transform.flip(surface, False, True)
-        flipped = pygame.transform.flip(surface, True, False)
-        surfaces[ImgSelector.DESTROYED] = surface, flipped
-        masks[ImgSelector.DESTROYED] = pygame.mask.from_surface(surface), pygame.mask.from_surface(flipped)
+        # le réacteur du dessous ne touche pas le sol : même masque qu'avec le train d'atterrissage seul
+        masks[ImgSelector.GEAR_OUT_AND_BOTTOM_REACTOR] = masks[ImgSelector.GEAR_OUT]
 
         return surfaces, masks
@@ -0,0 +1,173 @@
+"""
+  Traçage des intervalles (spans) de la boucle de jeu, du cycle de vie des scènes, des chargements et des tests de
+  collision, au format Chrome Trace Event (JSON) : le fichier s'ouvre dans Perfetto (ui.perfetto.dev) ou dans
+  chrome://tracing.
+
+      python space_taxi.py --trace partie.json
+
+  Désactivé par défaut : un intervalle ne coûte alors qu'un test. Une fois activé, les événements sont gardés dans
+  une mémoire circulaire : seuls les plus récents sont conservés, ce qui permet de tracer une longue partie pour
+  n'en garder que la fin.
+"""
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+class _Span:
+    """ Intervalle en cours de mesure (voir Tracer.span()). """
+
+    __slots__ = ('_tracer', '_name', '_category', '_args', '_start_ns')
+
+    def __init__(self, tracer: 'Tracer', name: str, category: str, args: dict or None) -> None:
+        self._tracer = tracer
+        self._name = name
+        self._category = category
+        self._args = args
+        self._start_ns = 0
+
+    def __enter__(self) -> '_Span':
+        self._start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._tracer._add_span(self._name, self._category, self._args, self._start_ns, time.perf_counter_ns())
+
+
+class _NullSpan:
+    """ Intervalle qui ne mesure rien, retourné lorsque le traçage est désactivé. """
+
+    __slots__ = ()
+
+    def __enter__(self) -> '_NullSpan':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """ Singleton qui recueille les intervalles et les événements ponctuels, puis les enregistre (save()). """
+
+    DEFAULT_CAPACITY = 200000  # événements conservés (les plus anciens sont écrasés)
+
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super(Tracer, cls).__new__(cls, *args, **kwargs)
+        return cls._instance
+
+    def __init__(self) -> None:
+        if not hasattr(self, '_initialized'):
+            self._events = None  # mémoire circulaire des événements, None lorsque le traçage est désactivé
+            self._nb_events = 0
+            self._origin_ns = time.perf_counter_ns()
+            self._pid = os.getpid()
+            self._thread_names = {}
+            self._thread_ids = itertools.count(1)  # un numéro par fil : le système réutilise ceux des fils terminés
+            self._local = threading.local()
+
+            self._initialized = True
+
+    def enable(self, capacity: int = DEFAULT_CAPACITY) -> None:
+        """
+        Active le traçage (les événements déjà recueillis sont abandonnés).
+        :param capacity: le nombre maximal d'événements conservés
+        """
+        self._events = deque(maxlen=capacity)
+        self._nb_events = 0
+        self._origin_ns = time.perf_counter_ns()
+
+    def disable(self) -> None:
+        self._events = None
+
+    def is_enabled(self) -> bool:
+        return self._events is not None
+
+    def span(self, name: str, category: str = "game", args: dict = None):
+        """
+        Mesure un intervalle : with Tracer().span("LevelScene.collisions", "collision"): ...
+        :param name: le nom affiché
+        :param category: la catégorie (permet de filtrer dans Perfetto)
+        :param args: des détails à joindre à l'intervalle (ex. : le fichier chargé)
+        :return: un gestionnaire de contexte
+        """
+        if self._events is None:
+            return _NULL_SPAN
+        return _Span(self, name, category, args)
+
+    def instant(self, name: str, category: str = "game", args: dict = None) -> None:
+        """ Marque un événement ponctuel (ex. : un changement de scène). """
+        if self._events is None:
+            return
+        event = {"name": name, "cat": category, "ph": "i", "s": "p", "ts": self._timestamp(time.perf_counter_ns()),
+                 "pid": self._pid, "tid": self._thread_id()}
+        if args:
+            event["args"] = args
+        self._append(event)
+
+    def save(self, filename: str) -> int:
+        """
+        Enregistre les événements conservés au format Chrome Trace Event.
+        :param filename: le nom du fichier (.json)
+        :return: le nombre d'événements perdus parce que la mémoire circulaire était pleine
+        """
+        events = list(self._events or ())
+        metadata = [{"name": "thread_name", "ph": "M", "pid": self._pid, "tid": tid, "args": {"name": name}}
+                    for tid, name in self._thread_names.items()]
+        with open(filename, "w") as trace_file:
+            json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, trace_file)
+        return self._nb_events - len(events)
+
+    def _add_span(self, name: str, category: str, args: dict or None, start_ns: int, end_ns: int) -> None:
+        if self._events is None:
+            return
+        event = {"name": name, "cat": category, "ph": "X", "ts": self._timestamp(start_ns),
+                 "dur": (end_ns - start_ns) / 1000, "pid": self._pid, "tid": self._thread_id()}
+        if args:
+            event["args"] = args
+        self._append(event)
+
+    def _append(self, event: dict) -> None:
+        self._events.append(event)  # deque.append est sûr entre fils d'exécution
+        self._nb_events += 1
+
+    def _timestamp(self, ns: int) -> float:
+        return (ns - self._origin_ns) / 1000  # µs
+
+    def _thread_id(self) -> int:
+        thread_id = getattr(self._local, 'thread_id', None)
+        if thread_id is None:
+            thread_id = self._local.thread_id = next(self._thread_ids)
+            self._thread_names[thread_id] = threading.current_thread().name
+        return thread_id
+
+
+def traced(name: str = None, category: str = "game"):
+    """
+    Décorateur qui trace chaque appel d'une fonction ou d'une méthode (un seul test lorsque le traçage est désactivé).
+    :param name: le nom affiché (par défaut, le nom qualifié de la fonction, ex. : SceneManager.update)
+    :param category: la catégorie
+    """
+    def decorator(function):
+        span_name = name or function.__qualname__
+        tracer = Tracer()
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if tracer._events is None:
+                return function(*args, **kwargs)
+            with _Span(tracer, span_name, category, None):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
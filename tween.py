@@ -0,0 +1,124 @@
+import math
+
+import pygame
+
+from game_clock import GameClock
+
+
+def linear(t: float) -> float:
+    return t
+
+
+def ease_in_out(t: float) -> float:
+    return 0.5 - math.cos(t * math.pi) / 2
+
+
+class Tween:
+    """
+    Animation d'un attribut d'un objet entre deux valeurs, sur une durée donnée. L'attribut peut être un
+    nombre (opacité, échelle, volume...) ou un pygame.Vector2 (position, échelle en x et y).
+    """
+
+    def __init__(self, target: object, attribute: str, start, end, duration: float, delay: float = 0.0,
+                 easing=linear, repeat: int = 0, yoyo: bool = False, on_complete=None) -> None:
+        """
+        Initialise une animation (elle ne débute qu'une fois confiée au TweenScheduler).
+        :param target: l'objet animé
+        :param attribute: le nom de l'attribut animé
+        :param start: valeur de départ
+        :param end: valeur d'arrivée
+        :param duration: durée d'un cycle, en secondes
+        :param delay: délai avant le début de l'animation, en secondes
+        :param easing: fonction d'interpolation (t de 0 à 1 -> progression de 0 à 1)
+        :param repeat: nombre de cycles supplémentaires (-1 = à l'infini)
+        :param yoyo: si True, un cycle sur deux est joué à l'envers (aller-retour)
+        :param on_complete: fonction appelée (sans argument) à la fin de l'animation
+        """
+        self.target = target
+        self.attribute = attribute
+        self._start = pygame.Vector2(start) if isinstance(start, tuple) else start
+        self._end = pygame.Vector2(end) if isinstance(end, tuple) else end
+        self._duration = duration
+        self._delay = delay
+        self._easing = easing
+        self._repeat = repeat
+        self._yoyo = yoyo
+        self._on_complete = on_complete
+        self._start_time = None
+
+    def begin(self, now: float) -> None:
+        self._start_time = now + self._delay
+
+    def update(self, now: float) -> bool:
+        """
+        Applique la valeur correspondant au temps fourni.
+        :param now: temps de simulation, en secondes
+        :return: True si l'animation est terminée, False sinon
+        """
+        elapsed_time = now - self._start_time
+        if elapsed_time < 0:
+            return False
+
+        cycle = int(elapsed_time // self._duration) if self._duration > 0 else 0
+        finished = self._repeat != -1 and cycle > self._repeat
+        if finished:
+            cycle = self._repeat
+            t = 1.0
+        else:
+            t = (elapsed_time - cycle * self._duration) / self._duration if self._duration > 0 else 1.0
+
+        if self._yoyo and cycle % 2 == 1:
+            t = 1.0 - t
+
+        progress = self._easing(t)
+        setattr(self.target, self.attribute, self._start + (self._end - self._start) * progress)
+
+        if finished and self._on_complete:
+            self._on_complete()
+        return finished
+
+
+class TweenScheduler:
+    """
+    Singleton qui fait progresser toutes les animations en cours, au rythme de l'horloge de simulation
+    (aucun fil d'exécution : tout se déroule dans la boucle de jeu).
+    """
+
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super(TweenScheduler, cls).__new__(cls, *args, **kwargs)
+        return cls._instance
+
+    def __init__(self) -> None:
+        if not hasattr(self, '_initialized'):
+            self._tweens = []
+
+            self._initialized = True
+
+    def add(self, tween: Tween) -> Tween:
+        """ Démarre une animation et la retourne. """
+        tween.begin(GameClock().time())
+        self._tweens.append(tween)
+        return tween
+
+    def cancel(self, target: object, attribute: str = None) -> None:
+        """
+        Arrête les animations d'un objet (l'attribut garde sa valeur courante).
+        :param target: l'objet animé
+        :param attribute: si fourni, seules les animations de cet attribut sont arrêtées
+        """
+        self._tweens = [tween for tween in self._tweens
+                        if tween.target is not target or (attribute and tween.attribute != attribute)]
+
+    def is_animating(self, target: object, attribute: str = None) -> bool:
+        return any(tween.target is target and (attribute is None or tween.attribute == attribute)
+                   for tween in self._tweens)
+
+    def update(self) -> None:
+        """ Fait progresser les animations en cours. Appelée à chaque pas de simulation. """
+        now = GameClock().time()
+        for tween in list(self._tweens):
+            if tween.update(now) and tween in self._tweens:
+                self._tweens.remove(tween)